@@ -119,11 +119,12 @@ class AdvancedYouTubeDownloader:
                         ], check=True, capture_output=True)
                         final_filename.unlink()
                     
-                    # استخراج صدا
+                    # استخراج صدای آماده رونویسی (PCM مونو 16kHz، همان فرمت ورودی Whisper)
                     audio_path = self.work_dir / 'audio.wav'
                     subprocess.run([
-                        'ffmpeg', '-i', str(self.work_dir / 'input_video.mp4'), 
-                        '-vn', str(audio_path), '-y'
+                        'ffmpeg', '-i', str(self.work_dir / 'input_video.mp4'),
+                        '-vn', '-acodec', 'pcm_s16le', '-ar', '16000', '-ac', '1',
+                        str(audio_path), '-y'
                     ], check=True, capture_output=True)
                     
                     print(f"✅ {method} موفق بود!")
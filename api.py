@@ -3,7 +3,7 @@
 Auto Video Dubbing - API Service
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
@@ -18,6 +18,10 @@ import logging
 from datetime import datetime
 
 from dubbing_functions import VideoDubbingApp
+from job_workspace import JobWorkspace
+from worker_pool import WorkerPool
+from job_store import ACTIVE_STATUSES, JobStore
+from whisper_models import get_registry, preload_whisper_model
 from config import get_config, get_safety_settings
 
 # تنظیمات لاگ
@@ -78,6 +82,12 @@ class SubtitleRequest(BaseModel):
     target_language: str = Field(default="Persian (FA)", description="زبان مقصد")
     subtitle_config: Optional[Dict[str, Any]] = Field(default=None, description="تنظیمات زیرنویس")
     fixed_text_config: Optional[Dict[str, Any]] = Field(default=None, description="تنظیمات متن ثابت")
+    source_job_id: Optional[str] = Field(default=None, description="شناسه کار قبلی که ویدیو و زیرنویس آن استفاده می‌شود")
+
+class ResumeRequest(BaseModel):
+    """ادامه کار نیمه‌کاره؛ کلیدها ذخیره نمی‌شوند و دوباره ارسال می‌شوند"""
+    api_key: str = Field(..., description="کلید Google API")
+    youtube_api_key: Optional[str] = Field(default=None, description="کلید YouTube API (اختیاری)")
 
 class ProcessStatus(BaseModel):
     """وضعیت پردازش"""
@@ -90,55 +100,76 @@ class ProcessStatus(BaseModel):
     updated_at: datetime
     result: Optional[Dict[str, Any]] = None
 
-# ذخیره‌سازی وضعیت‌های پردازش
-processing_jobs: Dict[str, ProcessStatus] = {}
+# ذخیره‌سازی پایدار وضعیت‌های پردازش (SQLite)
+jobs_config = get_config().get("jobs", {})
+job_store = JobStore.from_config()
+
+# استخر کارگرها: کارها و مراحل سنگین خارج از event loop اجرا می‌شوند
+worker_pool = WorkerPool.from_config()
 
-# ذخیره‌سازی instance های دوبله
+# ذخیره‌سازی instance های دوبله (هر کار فضای کاری ایزوله خودش را دارد)
 dubbing_instances: Dict[str, VideoDubbingApp] = {}
 
-def get_dubbing_app(api_key: str, youtube_api_key: str = None) -> VideoDubbingApp:
-    """دریافت یا ایجاد instance دوبله"""
-    if api_key not in dubbing_instances:
-        dubbing_instances[api_key] = VideoDubbingApp(api_key, youtube_api_key)
-    return dubbing_instances[api_key]
-
-def create_job_status(job_id: str, status: str, current_step: str, message: str) -> ProcessStatus:
-    """ایجاد وضعیت کار"""
-    now = datetime.now()
-    return ProcessStatus(
-        job_id=job_id,
-        status=status,
-        progress=0,
-        current_step=current_step,
-        message=message,
-        created_at=now,
-        updated_at=now
-    )
+def get_dubbing_app(api_key: str, youtube_api_key: str = None, job_id: str = None) -> VideoDubbingApp:
+    """دریافت یا ایجاد instance دوبله برای یک کار
+
+    هر job_id یک فضای کاری مجزا در dubbing_work/jobs/<job_id> دارد تا کارهای
+    هم‌زمان فایل‌های یکدیگر را بازنویسی نکنند. بدون job_id فضای کاری مشترک قدیمی
+    استفاده می‌شود.
+    """
+    if job_id and job_id in dubbing_instances:
+        return dubbing_instances[job_id]
+    workspace = JobWorkspace.for_job(job_id) if job_id else JobWorkspace.shared()
+    dubbing_app = VideoDubbingApp(api_key, youtube_api_key, workspace=workspace)
+    if job_id:
+        dubbing_instances[job_id] = dubbing_app
+    return dubbing_app
+
+def open_job_app(api_key: str, job_id: Optional[str]) -> VideoDubbingApp:
+    """instance فعال یک کار یا instance موقت روی فضای کاری آن
+
+    برخلاف get_dubbing_app چیزی در dubbing_instances ثبت نمی‌شود؛ کارهای
+    وابسته (مثل زیرنویس) نباید instance کار مبدأ را آزاد کنند.
+    """
+    if job_id and job_id in dubbing_instances:
+        return dubbing_instances[job_id]
+    workspace = JobWorkspace.for_job(job_id) if job_id else JobWorkspace.shared()
+    return VideoDubbingApp(api_key, workspace=workspace)
+
+def latest_dubbing_job_id() -> Optional[str]:
+    """آخرین کار دوبله تکمیل‌شده (برای فراخوانی‌های /create-subtitles بدون source_job_id)"""
+    jobs, _ = job_store.list(status="completed", limit=50)
+    for job in jobs:
+        if job["kind"] in ("upload", "youtube"):
+            return job["job_id"]
+    return None
+
+def release_dubbing_app(job_id: str) -> None:
+    """آزادسازی instance کار پس از پایان (فایل‌ها در فضای کاری باقی می‌مانند)"""
+    dubbing_instances.pop(job_id, None)
+
+def create_job_status(job_id: str, status: str, current_step: str, message: str,
+                      kind: str = "", request_data: Dict[str, Any] = None) -> Dict[str, Any]:
+    """ایجاد وضعیت کار
+
+    request_data (بدون کلیدهای API) همراه کار ذخیره می‌شود تا کارهای
+    نیمه‌کاره پس از راه‌اندازی مجدد سرویس قابل شناسایی باشند.
+    """
+    return job_store.create(job_id, status, current_step, message, kind=kind, request=request_data)
 
 def update_job_status(job_id: str, status: str = None, progress: int = None, 
                      current_step: str = None, message: str = None, result: Dict = None):
     """به‌روزرسانی وضعیت کار"""
-    if job_id in processing_jobs:
-        job = processing_jobs[job_id]
-        if status is not None:
-            job.status = status
-        if progress is not None:
-            job.progress = progress
-        if current_step is not None:
-            job.current_step = current_step
-        if message is not None:
-            job.message = message
-        if result is not None:
-            job.result = result
-        job.updated_at = datetime.now()
-
-async def process_video_workflow(job_id: str, dubbing_app: VideoDubbingApp, 
-                                video_path: str, request_data: Dict[str, Any]):
-    """پردازش کامل ویدیو"""
+    job_store.update(job_id, status=status, progress=progress, current_step=current_step,
+                     message=message, result=result)
+
+def process_video_workflow(job_id: str, dubbing_app: VideoDubbingApp, 
+                           video_path: str, request_data: Dict[str, Any]):
+    """پردازش کامل ویدیو (داخل thread کار در worker_pool اجرا می‌شود)"""
     try:
         # مرحله 1: استخراج صدا
         update_job_status(job_id, "processing", 10, "extracting_audio", "استخراج صدا از ویدیو...")
-        audio_path = dubbing_app.work_dir / 'audio.wav'
+        audio_path = dubbing_app.workspace.audio_path
         # اگر session_id ست نشده بود، از مسیر ویدیو محلی یک شناسه مشتق کنیم
         try:
             if not getattr(dubbing_app, 'session_id', None):
@@ -150,7 +181,7 @@ async def process_video_workflow(job_id: str, dubbing_app: VideoDubbingApp,
         
         # مرحله 2: استخراج متن
         update_job_status(job_id, "processing", 20, "extracting_text", "استخراج متن از صدا...")
-        success = dubbing_app.extract_audio_with_whisper()
+        success = worker_pool.run_cpu(dubbing_app.extract_audio_with_whisper)
         if not success:
             raise Exception("خطا در استخراج متن")
         
@@ -163,7 +194,7 @@ async def process_video_workflow(job_id: str, dubbing_app: VideoDubbingApp,
         # مرحله 4: ترجمه
         update_job_status(job_id, "processing", 40, "translating", "ترجمه زیرنویس‌ها...")
         target_language = request_data.get('target_language', 'Persian (FA)')
-        success = dubbing_app.translate_subtitles(target_language)
+        success = worker_pool.run_io(dubbing_app.translate_subtitles, target_language)
         if not success:
             raise Exception("خطا در ترجمه")
         
@@ -174,7 +205,8 @@ async def process_video_workflow(job_id: str, dubbing_app: VideoDubbingApp,
         speech_prompt = request_data.get('speech_prompt', '')
         sleep_time = request_data.get('sleep_between_requests', 30)
         
-        success = dubbing_app.create_audio_segments(
+        success = worker_pool.run_io(
+            dubbing_app.create_audio_segments,
             voice=voice,
             model=tts_model,
             speech_prompt=speech_prompt,
@@ -188,7 +220,8 @@ async def process_video_workflow(job_id: str, dubbing_app: VideoDubbingApp,
         keep_original_audio = request_data.get('keep_original_audio', False)
         original_audio_volume = request_data.get('original_audio_volume', 0.3)
         
-        output_path = dubbing_app.create_final_video(
+        output_path = worker_pool.run_cpu(
+            dubbing_app.create_final_video,
             keep_original_audio=keep_original_audio,
             original_audio_volume=original_audio_volume
         )
@@ -207,13 +240,17 @@ async def process_video_workflow(job_id: str, dubbing_app: VideoDubbingApp,
                 "output_path": output_path,
                 "file_name": os.path.basename(output_path),
                 "file_size": os.path.getsize(output_path),
-                "video_duration": "N/A"  # می‌توانید از ffprobe استفاده کنید
+                "video_duration": "N/A",  # می‌توانید از ffprobe استفاده کنید
+                "session_id": dubbing_app.session_id,
+                "translation_stats": dubbing_app.last_translation_stats
             }
         )
         
     except Exception as e:
         logger.error(f"خطا در پردازش ویدیو {job_id}: {str(e)}")
         update_job_status(job_id, "failed", 0, "failed", f"خطا: {str(e)}")
+    finally:
+        release_dubbing_app(job_id)
 
 # Endpoints اصلی
 
@@ -232,13 +269,14 @@ async def root():
             "job_status": "GET /job-status/{job_id}",
             "download_result": "GET /download/{job_id}",
             "list_jobs": "GET /jobs",
+            "resume_job": "POST /jobs/{job_id}/resume",
+            "workers": "GET /workers",
             "cleanup": "POST /cleanup"
         }
     }
 
 @app.post("/upload-video")
 async def upload_video(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     api_key: str = Form(...),
     target_language: str = Form(default="Persian (FA)"),
@@ -257,11 +295,11 @@ async def upload_video(
         # ایجاد job ID
         job_id = str(uuid.uuid4())
         
-        # ایجاد instance دوبله
-        dubbing_app = get_dubbing_app(api_key)
+        # ایجاد instance دوبله با فضای کاری مخصوص این کار
+        dubbing_app = get_dubbing_app(api_key, job_id=job_id)
         
         # ذخیره فایل ویدیو
-        video_path = dubbing_app.work_dir / f'input_video_{job_id}.mp4'
+        video_path = dubbing_app.workspace.video_path
         with open(video_path, "wb") as buffer:
             content = await file.read()
             buffer.write(content)
@@ -275,21 +313,12 @@ async def upload_video(
         except Exception:
             pass
 
-        # استخراج صدا
-        audio_path = dubbing_app.work_dir / 'audio.wav'
-        import subprocess
-        subprocess.run([
-            'ffmpeg', '-i', str(video_path), '-vn', 
-            str(audio_path), '-y'
-        ], check=True, capture_output=True)
-        
-        # ایجاد وضعیت کار
-        processing_jobs[job_id] = create_job_status(
-            job_id, "pending", "uploaded", "ویدیو آپلود شد، در انتظار پردازش..."
-        )
+        # استخراج صدای آماده رونویسی (16kHz مونو)
+        await worker_pool.run_io_async(dubbing_app.extract_transcription_audio, video_path)
         
         # شروع پردازش در پس‌زمینه
         request_data = {
+            'session_id': dubbing_app.session_id,
             'target_language': target_language,
             'voice': voice,
             'speech_prompt': speech_prompt,
@@ -301,7 +330,13 @@ async def upload_video(
             'sleep_between_requests': sleep_between_requests
         }
         
-        background_tasks.add_task(process_video_workflow, job_id, dubbing_app, str(video_path), request_data)
+        # ایجاد وضعیت کار
+        create_job_status(
+            job_id, "pending", "uploaded", "ویدیو آپلود شد، در انتظار پردازش...",
+            kind="upload", request_data=request_data
+        )
+        
+        worker_pool.submit_job(process_video_workflow, job_id, dubbing_app, str(video_path), request_data)
         
         return {
             "job_id": job_id,
@@ -317,7 +352,6 @@ async def upload_video(
 
 @app.post("/download-youtube")
 async def download_youtube_video(
-    background_tasks: BackgroundTasks,
     request: YouTubeDownloadRequest
 ):
     """دانلود ویدیو از یوتیوب و شروع پردازش"""
@@ -325,17 +359,18 @@ async def download_youtube_video(
         # ایجاد job ID
         job_id = str(uuid.uuid4())
         
-        # ایجاد instance دوبله
-        dubbing_app = get_dubbing_app(request.api_key)
+        # ایجاد instance دوبله با فضای کاری مخصوص این کار
+        dubbing_app = get_dubbing_app(request.api_key, job_id=job_id)
         
         # ایجاد وضعیت کار
-        processing_jobs[job_id] = create_job_status(
-            job_id, "pending", "downloading", "در حال دانلود ویدیو از یوتیوب..."
+        request_data = request.dict()
+        create_job_status(
+            job_id, "pending", "downloading", "در حال دانلود ویدیو از یوتیوب...",
+            kind="youtube", request_data=request_data
         )
         
         # شروع پردازش در پس‌زمینه
-        request_data = request.dict()
-        background_tasks.add_task(process_youtube_workflow, job_id, dubbing_app, request_data)
+        worker_pool.submit_job(process_youtube_workflow, job_id, dubbing_app, request_data)
         
         return {
             "job_id": job_id,
@@ -349,8 +384,8 @@ async def download_youtube_video(
         logger.error(f"خطا در دانلود ویدیو: {str(e)}")
         raise HTTPException(status_code=500, detail=f"خطا در دانلود ویدیو: {str(e)}")
 
-async def process_youtube_workflow(job_id: str, dubbing_app: VideoDubbingApp, request_data: Dict[str, Any]):
-    """پردازش ویدیو یوتیوب"""
+def process_youtube_workflow(job_id: str, dubbing_app: VideoDubbingApp, request_data: Dict[str, Any]):
+    """پردازش ویدیو یوتیوب (داخل thread کار در worker_pool اجرا می‌شود)"""
     try:
         # مرحله 1: دانلود ویدیو
         update_job_status(job_id, "processing", 10, "downloading", "دانلود ویدیو از یوتیوب...")
@@ -365,7 +400,7 @@ async def process_youtube_workflow(job_id: str, dubbing_app: VideoDubbingApp, re
                     dubbing_app.set_session_id(vid)
         except Exception:
             pass
-        success = dubbing_app.download_youtube_video(youtube_url)
+        success = worker_pool.run_io(dubbing_app.download_youtube_video, youtube_url)
         if not success:
             raise Exception("خطا در دانلود ویدیو از یوتیوب")
         
@@ -374,23 +409,24 @@ async def process_youtube_workflow(job_id: str, dubbing_app: VideoDubbingApp, re
         extraction_method = request_data.get('extraction_method', 'whisper')
         
         if extraction_method == 'youtube':
-            success = dubbing_app.extract_transcript_from_youtube(youtube_url)
+            success = worker_pool.run_io(dubbing_app.extract_transcript_from_youtube, youtube_url)
         else:
-            success = dubbing_app.extract_audio_with_whisper()
+            success = worker_pool.run_cpu(dubbing_app.extract_audio_with_whisper)
         
         if not success:
             raise Exception("خطا در استخراج متن")
         
         # ادامه پردازش مشابه ویدیو آپلود شده
-        await process_video_workflow(job_id, dubbing_app, str(dubbing_app.work_dir / 'input_video.mp4'), request_data)
+        process_video_workflow(job_id, dubbing_app, str(dubbing_app.workspace.video_path), request_data)
         
     except Exception as e:
         logger.error(f"خطا در پردازش ویدیو یوتیوب {job_id}: {str(e)}")
         update_job_status(job_id, "failed", 0, "failed", f"خطا: {str(e)}")
+    finally:
+        release_dubbing_app(job_id)
 
 @app.post("/create-subtitles")
 async def create_subtitled_video(
-    background_tasks: BackgroundTasks,
     request: SubtitleRequest
 ):
     """ایجاد ویدیو با زیرنویس"""
@@ -398,12 +434,25 @@ async def create_subtitled_video(
         # ایجاد job ID
         job_id = str(uuid.uuid4())
         
-        # ایجاد instance دوبله
-        dubbing_app = get_dubbing_app(request.api_key)
+        # کار مبدأ: شناسه داده‌شده، یا (برای سازگاری) آخرین کار دوبله تکمیل‌شده
+        source_job_id = request.source_job_id or latest_dubbing_job_id()
+        source_job = job_store.get(source_job_id) if source_job_id else None
+        if request.source_job_id and not source_job:
+            raise HTTPException(status_code=404, detail="کار مبدأ یافت نشد")
+        
+        # بدون کار مبدأ، فضای کاری مشترک قدیمی (Streamlit/CLI) استفاده می‌شود
+        dubbing_app = open_job_app(request.api_key, source_job_id)
+        source_session = ((source_job or {}).get('result') or {}).get('session_id')
+        if source_session and not dubbing_app.session_id:
+            dubbing_app.set_session_id(source_session)
         
         # بررسی وجود فایل‌های لازم
-        video_path = dubbing_app.work_dir / 'input_video.mp4'
-        srt_path = dubbing_app.work_dir / 'audio_fa.srt'
+        video_path = dubbing_app.workspace.video_path
+        srt_path = dubbing_app._srt_fa_path()
+        if not srt_path.exists():
+            fa_srt_files = list(dubbing_app.work_dir.glob("*_fa.srt"))
+            if fa_srt_files:
+                srt_path = fa_srt_files[0]
         
         if not video_path.exists():
             raise HTTPException(status_code=400, detail="فایل ویدیو یافت نشد. ابتدا ویدیو را آپلود یا دانلود کنید.")
@@ -412,12 +461,15 @@ async def create_subtitled_video(
             raise HTTPException(status_code=400, detail="فایل زیرنویس یافت نشد. ابتدا ویدیو را پردازش کنید.")
         
         # ایجاد وضعیت کار
-        processing_jobs[job_id] = create_job_status(
-            job_id, "pending", "creating_subtitles", "ایجاد ویدیو با زیرنویس..."
+        request_data = request.dict()
+        request_data['source_job_id'] = source_job_id
+        create_job_status(
+            job_id, "pending", "creating_subtitles", "ایجاد ویدیو با زیرنویس...",
+            kind="subtitles", request_data=request_data
         )
         
         # شروع پردازش در پس‌زمینه
-        background_tasks.add_task(process_subtitle_workflow, job_id, dubbing_app, request.dict())
+        worker_pool.submit_job(process_subtitle_workflow, job_id, dubbing_app, request_data)
         
         return {
             "job_id": job_id,
@@ -427,19 +479,22 @@ async def create_subtitled_video(
             "download_url": f"/download/{job_id}"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"خطا در ایجاد زیرنویس: {str(e)}")
         raise HTTPException(status_code=500, detail=f"خطا در ایجاد زیرنویس: {str(e)}")
 
-async def process_subtitle_workflow(job_id: str, dubbing_app: VideoDubbingApp, request_data: Dict[str, Any]):
-    """پردازش زیرنویس"""
+def process_subtitle_workflow(job_id: str, dubbing_app: VideoDubbingApp, request_data: Dict[str, Any]):
+    """پردازش زیرنویس (داخل thread کار در worker_pool اجرا می‌شود)"""
     try:
         update_job_status(job_id, "processing", 50, "creating_subtitles", "ایجاد ویدیو با زیرنویس...")
         
         subtitle_config = request_data.get('subtitle_config')
         fixed_text_config = request_data.get('fixed_text_config')
         
-        output_path = dubbing_app.create_subtitled_video(
+        output_path = worker_pool.run_cpu(
+            dubbing_app.create_subtitled_video,
             subtitle_config=subtitle_config,
             fixed_text_config=fixed_text_config
         )
@@ -467,87 +522,217 @@ async def process_subtitle_workflow(job_id: str, dubbing_app: VideoDubbingApp, r
 @app.get("/job-status/{job_id}")
 async def get_job_status(job_id: str):
     """دریافت وضعیت کار"""
-    if job_id not in processing_jobs:
+    job = job_store.get(job_id)
+    if not job:
         raise HTTPException(status_code=404, detail="کار یافت نشد")
     
-    job = processing_jobs[job_id]
     return {
-        "job_id": job.job_id,
-        "status": job.status,
-        "progress": job.progress,
-        "current_step": job.current_step,
-        "message": job.message,
-        "created_at": job.created_at.isoformat(),
-        "updated_at": job.updated_at.isoformat(),
-        "result": job.result
+        "job_id": job["job_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "current_step": job["current_step"],
+        "message": job["message"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "result": job["result"]
     }
 
 @app.get("/download/{job_id}")
 async def download_result(job_id: str):
     """دانلود نتیجه کار"""
-    if job_id not in processing_jobs:
+    job = job_store.get(job_id)
+    if not job:
         raise HTTPException(status_code=404, detail="کار یافت نشد")
     
-    job = processing_jobs[job_id]
-    
-    if job.status != "completed":
+    if job["status"] != "completed":
         raise HTTPException(status_code=400, detail="کار هنوز تکمیل نشده است")
     
-    if not job.result or 'output_path' not in job.result:
+    result = job.get("result")
+    if not result or 'output_path' not in result:
         raise HTTPException(status_code=404, detail="فایل نتیجه یافت نشد")
     
-    output_path = job.result['output_path']
+    output_path = result['output_path']
     if not os.path.exists(output_path):
         raise HTTPException(status_code=404, detail="فایل نتیجه وجود ندارد")
     
     return FileResponse(
         path=output_path,
-        filename=job.result.get('file_name', 'output.mp4'),
+        filename=result.get('file_name', 'output.mp4'),
         media_type='video/mp4'
     )
 
 @app.get("/jobs")
-async def list_jobs():
-    """لیست تمام کارها"""
+async def list_jobs(status: Optional[str] = None, kind: Optional[str] = None,
+                    limit: int = 50, offset: int = 0):
+    """لیست صفحه‌بندی‌شده کارها با فیلتر اختیاری وضعیت و نوع"""
+    jobs, total = job_store.list(status=status, kind=kind, limit=limit, offset=offset)
     return {
         "jobs": [
             {
-                "job_id": job.job_id,
-                "status": job.status,
-                "progress": job.progress,
-                "current_step": job.current_step,
-                "created_at": job.created_at.isoformat(),
-                "updated_at": job.updated_at.isoformat()
+                "job_id": job["job_id"],
+                "kind": job["kind"],
+                "status": job["status"],
+                "progress": job["progress"],
+                "current_step": job["current_step"],
+                "created_at": job["created_at"],
+                "updated_at": job["updated_at"]
             }
-            for job in processing_jobs.values()
+            for job in jobs
         ],
-        "total": len(processing_jobs)
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "counts": job_store.count_by_status()
+    }
+
+@app.post("/jobs/{job_id}/resume")
+async def resume_job(job_id: str, request: ResumeRequest):
+    """ادامه کاری که با راه‌اندازی مجدد سرویس یا خطا متوقف شده است
+
+    همان فضای کاری و داده‌های ذخیره‌شده درخواست استفاده می‌شوند؛ مراحل تمام‌شده
+    (کش دانلود/رونویسی، حافظه ترجمه، مانیفست TTS) دوباره هزینه‌ای ندارند.
+    """
+    job = job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="کار یافت نشد")
+    # Jobs left active by a crash were marked failed at startup, so an active status means running here
+    if job["status"] == "completed" or job["status"] in ACTIVE_STATUSES:
+        raise HTTPException(status_code=409, detail="کار تمام شده یا در حال اجراست")
+    request_data = dict(job.get("request") or {})
+    if job["kind"] not in ("upload", "youtube", "subtitles") or not request_data:
+        raise HTTPException(status_code=400, detail="داده‌های درخواست این کار برای ادامه موجود نیست")
+
+    if job["kind"] == "subtitles":
+        dubbing_app = open_job_app(request.api_key, request_data.get("source_job_id"))
+        workflow, args = process_subtitle_workflow, (job_id, dubbing_app, request_data)
+    else:
+        if not JobWorkspace.for_job(job_id).video_path.exists() and job["kind"] == "upload":
+            raise HTTPException(status_code=400, detail="ویدیو آپلودشده این کار دیگر موجود نیست؛ دوباره آپلود کنید")
+        request_data["api_key"] = request.api_key
+        dubbing_app = get_dubbing_app(request.api_key, request.youtube_api_key, job_id=job_id)
+        if request_data.get("session_id"):
+            dubbing_app.set_session_id(request_data["session_id"])
+        if job["kind"] == "youtube":
+            workflow, args = process_youtube_workflow, (job_id, dubbing_app, request_data)
+        else:
+            workflow, args = resume_upload_workflow, (job_id, dubbing_app, request_data)
+
+    job_store.mark_attempt(job_id)
+    update_job_status(job_id, "pending", 0, "resuming", "ادامه کار در صف...")
+    worker_pool.submit_job(workflow, *args)
+    return {
+        "job_id": job_id,
+        "status": "resuming",
+        "message": "کار دوباره در صف پردازش قرار گرفت",
+        "check_status_url": f"/job-status/{job_id}",
+        "download_url": f"/download/{job_id}"
     }
 
+def resume_upload_workflow(job_id: str, dubbing_app: VideoDubbingApp, request_data: Dict[str, Any]):
+    """ادامه کار آپلود: صدای رونویسی در صورت نبود دوباره استخراج می‌شود"""
+    video_path = dubbing_app.workspace.video_path
+    try:
+        if not dubbing_app.workspace.audio_path.exists():
+            update_job_status(job_id, "processing", 5, "extracting_audio", "استخراج دوباره صدا...")
+            dubbing_app.extract_transcription_audio(video_path)
+    except Exception as e:
+        logger.error(f"خطا در ادامه کار {job_id}: {str(e)}")
+        update_job_status(job_id, "failed", 0, "failed", f"خطا: {str(e)}")
+        release_dubbing_app(job_id)
+        return
+    process_video_workflow(job_id, dubbing_app, str(video_path), request_data)
+
 @app.post("/cleanup")
-async def cleanup_files(api_key: str = Form(...)):
-    """پاکسازی فایل‌های موقت"""
+async def cleanup_files(api_key: str = Form(...), job_id: Optional[str] = Form(default=None)):
+    """پاکسازی فایل‌های موقت (فضای کاری یک کار یا فضای کاری مشترک)
+
+    فضای کاری کارهای در صف یا در حال اجرا حذف نمی‌شود (409).
+    """
     try:
-        dubbing_app = get_dubbing_app(api_key)
-        dubbing_app.clean_previous_files()
+        if job_id:
+            job = job_store.get(job_id)
+            if not job:
+                raise HTTPException(status_code=404, detail="کار یافت نشد")
+            if job["status"] in ACTIVE_STATUSES:
+                raise HTTPException(status_code=409, detail="کار هنوز در حال اجراست؛ پس از پایان آن پاکسازی کنید")
+            JobWorkspace.for_job(job_id).remove()
+            release_dubbing_app(job_id)
+        else:
+            get_dubbing_app(api_key).clean_previous_files()
         
         return {
             "message": "فایل‌های موقت پاکسازی شدند",
             "status": "success"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"خطا در پاکسازی: {str(e)}")
         raise HTTPException(status_code=500, detail=f"خطا در پاکسازی: {str(e)}")
 
+@app.get("/workers")
+async def workers_status():
+    """وضعیت استخر کارگرها (عمق صف، کارهای در حال اجرا، حداکثر هم‌زمانی)"""
+    return worker_pool.stats()
+
 @app.get("/health")
 async def health_check():
     """بررسی سلامت سرویس"""
+    stats = worker_pool.stats()
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "active_jobs": len([job for job in processing_jobs.values() if job.status == "processing"])
+        "active_jobs": stats["running"],
+        "queued_jobs": stats["queue_depth"],
+        "max_concurrency": stats["max_concurrency"],
+        "whisper_models_loaded": get_registry().loaded_models()
     }
 
+# ===== کارهای نیمه‌کاره و حذف کارهای قدیمی =====
+
+def fail_interrupted_jobs() -> int:
+    """کارهایی که هنگام توقف سرویس در حال اجرا یا در صف بودند
+
+    کلید API فراخواننده ذخیره نمی‌شود، پس این کارها خودکار ادامه داده نمی‌شوند؛
+    فراخواننده با POST /jobs/{job_id}/resume و کلید خودش آن‌ها را روی همان
+    فضای کاری ادامه می‌دهد. فایل‌های فضای کاری تا پایان TTL باقی می‌مانند.
+    """
+    interrupted = job_store.interrupted_jobs()
+    for job in interrupted:
+        update_job_status(job["job_id"], "failed", 0, "interrupted",
+                          f"کار به دلیل راه‌اندازی مجدد سرویس متوقف شد؛ با POST /jobs/{job['job_id']}/resume ادامه دهید")
+    return len(interrupted)
+
+def evict_expired_jobs() -> int:
+    """حذف کارهای تمام‌شده قدیمی‌تر از TTL به همراه فضای کاری آن‌ها"""
+    ttl_seconds = jobs_config.get("ttl_hours", 72) * 3600
+    evicted = job_store.evict_finished(ttl_seconds)
+    for job_id in evicted:
+        JobWorkspace.for_job(job_id).remove()
+    if evicted:
+        logger.info(f"{len(evicted)} کار منقضی حذف شد")
+    return len(evicted)
+
+async def _eviction_loop():
+    interval = jobs_config.get("eviction_interval_minutes", 30) * 60
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await worker_pool.run_io_async(evict_expired_jobs)
+        except Exception as e:
+            logger.error(f"خطا در حذف کارهای منقضی: {str(e)}")
+
+@app.on_event("startup")
+async def on_startup():
+    """حذف کارهای منقضی، بستن کارهای نیمه‌کاره و زمان‌بندی پاکسازی دوره‌ای"""
+    evict_expired_jobs()
+    preload_whisper_model()
+    interrupted = fail_interrupted_jobs()
+    if interrupted:
+        logger.info(f"{interrupted} کار نیمه‌کاره متوقف شد")
+    asyncio.create_task(_eviction_loop())
+
 # اجرای سرور
 if __name__ == "__main__":
     import uvicorn
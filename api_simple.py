@@ -15,6 +15,9 @@ import string
 import uuid
 from pathlib import Path
 from dubbing_functions import VideoDubbingApp
+from job_store import JobStore
+from whisper_models import preload_whisper_model
+from config import get_config as get_app_config
 from typing import Optional
 import asyncio
 import threading
@@ -91,8 +94,21 @@ class ProcessingStatus(BaseModel):
     download_url: Optional[str] = None
     error: Optional[str] = None
 
-# ذخیره وضعیت پردازش
-processing_tasks = {}
+# ذخیره پایدار وضعیت پردازش (SQLite)
+jobs_config = get_app_config().get("jobs", {})
+processing_tasks = JobStore.from_config(key="api_simple_db_path")
+
+def task_to_status(task: dict) -> dict:
+    """تبدیل رکورد ذخیره‌شده به ساختار ProcessingStatus"""
+    result = task.get("result") or {}
+    return {
+        "task_id": task["job_id"],
+        "status": task["status"],
+        "progress": task["progress"],
+        "message": task["message"],
+        "download_url": result.get("download_url"),
+        "error": task.get("error")
+    }
 
 # ایجاد instance از کلاس دوبله
 try:
@@ -114,33 +130,28 @@ def generate_random_filename():
 def process_video_task(task_id: str, youtube_url: str):
     """پردازش ویدیو در background"""
     try:
-        processing_tasks[task_id]["status"] = "processing"
-        processing_tasks[task_id]["progress"] = 10
-        processing_tasks[task_id]["message"] = "در حال دانلود ویدیو..."
+        processing_tasks.update(task_id, status="processing", progress=10, message="در حال دانلود ویدیو...")
         
         # مرحله 1: دانلود ویدیو
         success = dubbing_app.download_youtube_video(str(youtube_url))
         if not success:
             raise Exception("خطا در دانلود ویدیو")
         
-        processing_tasks[task_id]["progress"] = 30
-        processing_tasks[task_id]["message"] = "در حال استخراج متن..."
+        processing_tasks.update(task_id, progress=30, message="در حال استخراج متن...")
         
         # مرحله 2: استخراج متن با Whisper
         success = dubbing_app.extract_audio_with_whisper()
         if not success:
             raise Exception("خطا در استخراج متن")
         
-        processing_tasks[task_id]["progress"] = 50
-        processing_tasks[task_id]["message"] = "در حال ترجمه زیرنویس‌ها..."
+        processing_tasks.update(task_id, progress=50, message="در حال ترجمه زیرنویس‌ها...")
         
         # مرحله 3: ترجمه
         success = dubbing_app.translate_subtitles(TARGET_LANGUAGE)
         if not success:
             raise Exception("خطا در ترجمه")
         
-        processing_tasks[task_id]["progress"] = 70
-        processing_tasks[task_id]["message"] = "در حال ایجاد ویدیو با زیرنویس..."
+        processing_tasks.update(task_id, progress=70, message="در حال ایجاد ویدیو با زیرنویس...")
         
         # مرحله 4: ایجاد ویدیو با زیرنویس (با نام‌گذاری مبتنی بر YouTube ID)
         try:
@@ -156,17 +167,15 @@ def process_video_task(task_id: str, youtube_url: str):
         )
         
         if output_path and os.path.exists(output_path):
-            processing_tasks[task_id]["status"] = "completed"
-            processing_tasks[task_id]["progress"] = 100
-            processing_tasks[task_id]["message"] = "ویدیو با موفقیت ایجاد شد"
-            processing_tasks[task_id]["download_url"] = f"/download/{task_id}"
+            processing_tasks.update(
+                task_id, status="completed", progress=100, message="ویدیو با موفقیت ایجاد شد",
+                result={"download_url": f"/download/{task_id}", "output_path": str(output_path)}
+            )
         else:
             raise Exception("خطا در ایجاد ویدیو")
             
     except Exception as e:
-        processing_tasks[task_id]["status"] = "failed"
-        processing_tasks[task_id]["error"] = str(e)
-        processing_tasks[task_id]["message"] = f"خطا: {str(e)}"
+        processing_tasks.update(task_id, status="failed", error=str(e), message=f"خطا: {str(e)}")
 
 @app.get("/", response_class=JSONResponse)
 async def root():
@@ -202,38 +211,44 @@ async def start_processing(request: YouTubeRequest, background_tasks: Background
     task_id = str(uuid.uuid4())
     
     # مقداردهی اولیه وضعیت
-    processing_tasks[task_id] = {
-        "task_id": task_id,
-        "status": "processing",
-        "progress": 0,
-        "message": "شروع پردازش...",
-        "download_url": None,
-        "error": None
-    }
+    task = processing_tasks.create(
+        task_id, "processing", message="شروع پردازش...",
+        kind="youtube", request={"url": str(request.url)}
+    )
     
     # شروع پردازش در background
     background_tasks.add_task(process_video_task, task_id, request.url)
     
-    return ProcessingStatus(**processing_tasks[task_id])
+    return ProcessingStatus(**task_to_status(task))
 
 @app.get("/status/{task_id}", response_model=ProcessingStatus)
 async def get_status(task_id: str):
     """بررسی وضعیت پردازش"""
-    if task_id not in processing_tasks:
+    task = processing_tasks.get(task_id)
+    if not task:
         raise HTTPException(status_code=404, detail="Task یافت نشد")
     
-    return ProcessingStatus(**processing_tasks[task_id])
+    return ProcessingStatus(**task_to_status(task))
 
 @app.get("/download/{task_id}")
 async def download_video(task_id: str):
     """دانلود ویدیو پردازش شده"""
-    if task_id not in processing_tasks:
+    task = processing_tasks.get(task_id)
+    if not task:
         raise HTTPException(status_code=404, detail="Task یافت نشد")
     
-    task = processing_tasks[task_id]
     if task["status"] != "completed":
         raise HTTPException(status_code=400, detail="ویدیو هنوز آماده نیست")
     
+    # فایل خروجی همین task (در صورت ثبت)
+    output_path = (task.get("result") or {}).get("output_path")
+    if output_path and os.path.exists(output_path):
+        return FileResponse(
+            path=output_path,
+            filename=os.path.basename(output_path),
+            media_type="video/mp4"
+        )
+    
     # پیدا کردن فایل ویدیو
     work_dir = dubbing_app.work_dir
     video_files = list(work_dir.glob("dubbed_video_*.mp4"))
@@ -251,20 +266,22 @@ async def download_video(task_id: str):
     )
 
 @app.get("/tasks")
-async def list_tasks():
-    """لیست تمام task ها"""
+async def list_tasks(status: Optional[str] = None, limit: int = 50, offset: int = 0):
+    """لیست صفحه‌بندی‌شده task ها با فیلتر اختیاری وضعیت"""
+    tasks, total = processing_tasks.list(status=status, limit=limit, offset=offset)
     return {
-        "tasks": list(processing_tasks.values()),
-        "total": len(processing_tasks)
+        "tasks": [task_to_status(task) for task in tasks],
+        "total": total,
+        "limit": limit,
+        "offset": offset
     }
 
 @app.delete("/tasks/{task_id}")
 async def delete_task(task_id: str):
     """حذف task"""
-    if task_id not in processing_tasks:
+    if not processing_tasks.delete(task_id):
         raise HTTPException(status_code=404, detail="Task یافت نشد")
     
-    del processing_tasks[task_id]
     return {"message": "Task حذف شد"}
 
 @app.get("/config")
@@ -280,6 +297,36 @@ async def get_config():
         "output_type": OUTPUT_TYPE
     }
 
+def resume_interrupted_tasks():
+    """ادامه task های نیمه‌کاره پس از راه‌اندازی مجدد (به ترتیب، چون فضای کاری مشترک است)"""
+    max_attempts = jobs_config.get("max_resume_attempts", 2)
+    for task in processing_tasks.interrupted_jobs():
+        task_id = task["job_id"]
+        url = (task.get("request") or {}).get("url")
+        if not dubbing_app or not url or not jobs_config.get("resume_interrupted", True) \
+                or task["attempts"] >= max_attempts:
+            processing_tasks.update(task_id, status="failed", error="interrupted",
+                                    message="پردازش به دلیل توقف سرویس متوقف شد")
+            continue
+        processing_tasks.mark_attempt(task_id)
+        print(f"🔄 ادامه task نیمه‌کاره: {task_id}")
+        process_video_task(task_id, url)
+
+async def _eviction_loop():
+    interval = jobs_config.get("eviction_interval_minutes", 30) * 60
+    ttl_seconds = jobs_config.get("ttl_hours", 72) * 3600
+    while True:
+        await asyncio.sleep(interval)
+        processing_tasks.evict_finished(ttl_seconds)
+
+@app.on_event("startup")
+async def on_startup():
+    """حذف task های منقضی و ادامه task های نیمه‌کاره"""
+    processing_tasks.evict_finished(jobs_config.get("ttl_hours", 72) * 3600)
+    preload_whisper_model()
+    threading.Thread(target=resume_interrupted_tasks, daemon=True).start()
+    asyncio.create_task(_eviction_loop())
+
 if __name__ == "__main__":
     import uvicorn
     print("🚀 در حال اجرای API دوبله خودکار ویدیو...")
@@ -6,9 +6,9 @@ Auto Video Dubbing - Streamlit Web Interface
 import streamlit as st
 import os
 import tempfile
-import subprocess
 from pathlib import Path
 from dubbing_functions import VideoDubbingApp
+from whisper_models import preload_whisper_model
 from config import get_config, get_safety_settings
 
 # تنظیمات صفحه
@@ -140,6 +140,8 @@ if api_key:
         dubbing_app = VideoDubbingApp(api_key)
         st.session_state['dubbing_app'] = dubbing_app
         st.success("✅ اتصال به Google AI برقرار شد")
+        # بارگذاری مدل Whisper در پس‌زمینه (یک بار برای هر پردازه)
+        preload_whisper_model()
     except Exception as e:
         st.error(f"❌ خطا در اتصال به Google AI: {str(e)}")
         st.stop()
@@ -202,10 +204,7 @@ else:  # فایل محلی
         
         # استخراج صدا
         with st.spinner("در حال استخراج صدا..."):
-            subprocess.run([
-                'ffmpeg', '-i', str(video_path), '-vn', 
-                str(st.session_state['dubbing_app'].work_dir / 'audio.wav'), '-y'
-            ], check=True, capture_output=True)
+            st.session_state['dubbing_app'].extract_transcription_audio(video_path)
         
         st.success("✅ فایل ویدیو آپلود و صدا استخراج شد")
         st.session_state['video_downloaded'] = True
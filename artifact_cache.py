@@ -0,0 +1,257 @@
+"""
+کش آرتیفکت‌ها بین اجراها (دانلود، رونویسی، ترجمه، رندر)
+Content-addressed artifact cache shared across dubbing runs
+
+Each entry is keyed by ``stage + source_id + hash(params)`` and holds the
+files a stage produced. On a hit the files are hard-linked back into the job
+workspace (falling back to a copy across filesystems). Small text artifacts
+such as SRTs are always copied because the pipeline rewrites them in place
+(e.g. ``compress_srt_dialogues``), which would otherwise corrupt the shared
+inode. The size and mtime of every stored file are recorded, so an entry whose
+hard-linked file was rewritten in place by a later run is detected and dropped
+instead of being served. Entries are evicted least-recently-used once the disk
+budget is hit.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from config import get_config
+from sqlite_store import SharedInstance, open_sqlite
+
+
+# Files below this size are copied instead of hard-linked (see module docstring)
+LINK_MIN_BYTES = 1024 * 1024
+
+
+def hash_params(params: Optional[Dict[str, Any]]) -> str:
+    """هش پایدار پارامترها (ترتیب کلیدها اهمیتی ندارد)"""
+    payload = json.dumps(params or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def hash_file(path: Union[str, Path], block_size: int = 1024 * 1024) -> str:
+    """هش محتوای فایل برای کلیدهای وابسته به ورودی (مثل SRT)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _file_stamp(path: Path) -> List[int]:
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+    if src.stat().st_size >= LINK_MIN_BYTES:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    stage TEXT NOT NULL,
+    source_id TEXT NOT NULL,
+    files TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access);
+"""
+
+
+class ArtifactCache:
+    def __init__(self, root: Union[str, Path] = "dubbing_work/cache", max_bytes: int = 20 * 1024 ** 3):
+        """
+        Args:
+            root: مسیر ذخیره کش
+            max_bytes: بودجه دیسک؛ با عبور از آن قدیمی‌ترین ورودی‌ها حذف می‌شوند
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.root / "index.db", _SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, section: Optional[str] = None) -> Optional["ArtifactCache"]:
+        """ساخت کش از بخش cache در config.py یا زیربخش آن مثل cache.tts (None اگر غیرفعال باشد)
+
+        cache.enabled=False همه کش‌ها، از جمله زیربخش‌ها، را غیرفعال می‌کند.
+        """
+        cache_config = get_config().get("cache", {})
+        if not cache_config.get("enabled", True):
+            return None
+        if section:
+            cache_config = cache_config.get(section, {})
+        if not cache_config.get("enabled", True):
+            return None
+        return cls(
+            root=cache_config.get("root", f"dubbing_work/{section}_cache" if section else "dubbing_work/cache"),
+            max_bytes=int(cache_config.get("max_size_gb", 20) * 1024 ** 3),
+        )
+
+    @staticmethod
+    def make_key(stage: str, source_id: str, params: Optional[Dict[str, Any]] = None) -> str:
+        return hashlib.sha256(f"{stage}\0{source_id}\0{hash_params(params)}".encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, stage: str, key: str) -> Path:
+        return self.root / stage / key[:2] / key
+
+    # ===== Lookup =====
+    def fetch(self, stage: str, source_id: str, params: Optional[Dict[str, Any]],
+              targets: Dict[str, Union[str, Path]]) -> bool:
+        """
+        بازیابی خروجی یک مرحله به مسیرهای فضای کاری
+
+        Args:
+            targets: نگاشت نام فایل ذخیره‌شده به مسیر مقصد در فضای کاری
+
+        Returns:
+            True اگر همه فایل‌ها از کش بازیابی شدند
+        """
+        if not source_id:
+            return False
+        key = self.make_key(stage, source_id, params)
+        with self._lock:
+            row = self._conn.execute("SELECT files FROM entries WHERE key = ?", (key,)).fetchone()
+        entry_dir = self._entry_dir(stage, key)
+        if not row or not self._is_intact(entry_dir, json.loads(row[0]), targets):
+            with self._lock:
+                self.misses += 1
+            if row:
+                self._drop(key, entry_dir)
+            return False
+        try:
+            for name, dst in targets.items():
+                _link_or_copy(entry_dir / name, Path(dst))
+        except OSError as e:
+            print(f"⚠️ خطا در بازیابی از کش ({stage}): {e}")
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+        print(f"♻️ استفاده از کش برای مرحله {stage} ({source_id})")
+        return True
+
+    @staticmethod
+    def _is_intact(entry_dir: Path, stamps: Dict[str, List[int]], targets: Dict[str, Any]) -> bool:
+        """بررسی وجود، اندازه و زمان تغییر فایل‌ها (تشخیص فایل‌هایی که در جای خود بازنویسی شده‌اند)"""
+        for name in targets:
+            path = entry_dir / name
+            if name not in stamps or not path.exists() or _file_stamp(path) != stamps[name]:
+                return False
+        return True
+
+    # ===== Store =====
+    def store(self, stage: str, source_id: str, params: Optional[Dict[str, Any]],
+              files: Dict[str, Union[str, Path]]) -> bool:
+        """ذخیره خروجی یک مرحله؛ فایل‌های بزرگ با hard-link و بدون کپی ذخیره می‌شوند"""
+        if not source_id:
+            return False
+        files = {name: Path(path) for name, path in files.items()}
+        if not files or not all(path.exists() for path in files.values()):
+            return False
+        key = self.make_key(stage, source_id, params)
+        entry_dir = self._entry_dir(stage, key)
+        try:
+            tmp_dir = entry_dir.with_name(entry_dir.name + ".tmp")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            tmp_dir.mkdir(parents=True)
+            for name, src in files.items():
+                _link_or_copy(src, tmp_dir / name)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            tmp_dir.rename(entry_dir)
+        except OSError as e:
+            print(f"⚠️ خطا در ذخیره کش ({stage}): {e}")
+            return False
+
+        stamps = {name: _file_stamp(entry_dir / name) for name in files}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, stage, source_id, files, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, stage, source_id, json.dumps(stamps), sum(size for size, _ in stamps.values()), now, now)
+            )
+            self._conn.commit()
+        self.evict()
+        return True
+
+    # ===== Eviction =====
+    def total_size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """حذف LRU تا رسیدن به بودجه دیسک؛ تعداد ورودی‌های حذف‌شده برگردانده می‌شود"""
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        removed = 0
+        total = self.total_size()
+        while total > budget:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT key, stage, size FROM entries ORDER BY last_access ASC LIMIT 1"
+                ).fetchone()
+            if not row:
+                break
+            key, stage, size = row
+            self._drop(key, self._entry_dir(stage, key))
+            total -= size
+            removed += 1
+        return removed
+
+    def _drop(self, key: str, entry_dir: Path) -> None:
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            hits, misses = self.hits, self.misses
+        return {
+            "entries": count,
+            "size_bytes": self.total_size(),
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        }
+
+
+_shared_cache = SharedInstance(ArtifactCache.from_config)
+_tts_cache = SharedInstance(lambda: ArtifactCache.from_config("tts"))
+
+
+def get_shared_cache() -> Optional[ArtifactCache]:
+    """کش مشترک در سطح پردازه (یک اتصال برای همه instance های دوبله)"""
+    return _shared_cache.get()
+
+
+def get_tts_cache() -> Optional[ArtifactCache]:
+    """کش مشترک صداهای TTS با بودجه دیسک جداگانه (بخش cache.tts در config.py)"""
+    return _tts_cache.get()
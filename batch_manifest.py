@@ -0,0 +1,129 @@
+"""
+مانیفست قابل ادامه برای پردازش دسته‌ای
+Append-only, crash-safe manifest for resumable CSV batches
+
+Every completed stage of every URL is appended as one JSON line (flushed and
+fsync'ed), together with the artifact paths it produced. Replaying the file
+gives, per URL, the completed stages and the final result, so a restarted
+batch can skip finished URLs and start half-done ones at their first stage
+whose artifacts are missing. Artifacts are recorded with their size and
+mtime, so a file that a later URL overwrote in the shared workspace (e.g.
+``input_video.mp4``) does not count as done. A torn last line from a crash is
+ignored.
+"""
+
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from jsonl_manifest import JsonlManifest, file_stamp
+
+
+DEFAULT_MANIFEST_DIR = "dubbing_work/batches"
+# Archived manifests kept per URL list when a batch is restarted from scratch
+KEEP_ARCHIVES = 3
+
+
+def batch_id_for(urls: Sequence[str]) -> str:
+    """شناسه پایدار batch بر اساس فهرست URL ها (همان CSV → همان مانیفست)"""
+    return hashlib.sha1("\n".join(urls).encode("utf-8")).hexdigest()[:12]
+
+
+class BatchManifest(JsonlManifest):
+    def __init__(self, path: Union[str, Path]):
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        super().__init__(path)
+
+    @classmethod
+    def for_urls(cls, urls: Sequence[str], base_dir: Union[str, Path] = DEFAULT_MANIFEST_DIR,
+                 fresh: bool = False, keep_archives: int = KEEP_ARCHIVES) -> "BatchManifest":
+        """
+        مانیفست مربوط به یک فهرست URL
+
+        Args:
+            fresh: شروع از ابتدا؛ مانیفست قبلی با پسوند زمان بایگانی می‌شود
+            keep_archives: تعداد بایگانی‌های نگه‌داشته‌شده همین فهرست (قدیمی‌ترها حذف می‌شوند)
+        """
+        path = Path(base_dir) / f"manifest_{batch_id_for(urls)}.jsonl"
+        if fresh and path.exists():
+            path.rename(path.with_name(f"{path.stem}.{time.time_ns()}.jsonl"))
+            archives = sorted(path.parent.glob(f"{path.stem}.*.jsonl"),
+                              key=lambda archive: int(archive.name.split(".")[1]), reverse=True)
+            for archive in archives[max(0, keep_archives):]:
+                archive.unlink(missing_ok=True)
+        return cls(path)
+
+    @property
+    def batch_id(self) -> str:
+        return self.path.stem.replace("manifest_", "", 1)
+
+    # ===== Replay =====
+    def _entry(self, url: str) -> Dict[str, Any]:
+        return self._entries.setdefault(url, {"stages": {}, "session_id": None, "status": None, "detail": ""})
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        entry = self._entry(record["url"])
+        if record["event"] == "stage":
+            entry["stages"][record["stage"]] = record.get("artifacts") or {}
+            if record.get("session_id"):
+                entry["session_id"] = record["session_id"]
+        elif record["event"] == "result":
+            entry["status"] = record["status"]
+            entry["detail"] = record.get("detail", "")
+
+    # ===== Recording =====
+    def record_stage(self, url: str, stage: str, artifacts: Optional[Dict[str, Any]] = None,
+                     session_id: Optional[str] = None) -> None:
+        """ثبت پایان موفق یک مرحله و مسیر آرتیفکت‌های آن"""
+        self._append({
+            "event": "stage",
+            "url": url,
+            "stage": stage,
+            "artifacts": {name: [str(path), file_stamp(path)] for name, path in (artifacts or {}).items()
+                          if path and os.path.exists(path)},
+            "session_id": session_id,
+        })
+
+    def record_result(self, url: str, ok: bool, detail: str = "") -> None:
+        self._append({"event": "result", "url": url, "status": "ok" if ok else "failed", "detail": detail})
+
+    # ===== Queries =====
+    def is_finished(self, url: str) -> bool:
+        entry = self._entries.get(url)
+        return bool(entry and entry["status"] == "ok")
+
+    def detail(self, url: str) -> str:
+        entry = self._entries.get(url)
+        return entry["detail"] if entry else ""
+
+    def session_id(self, url: str) -> Optional[str]:
+        entry = self._entries.get(url)
+        return entry["session_id"] if entry else None
+
+    def artifacts(self, url: str, stage: str) -> Dict[str, str]:
+        entry = self._entries.get(url)
+        if not entry:
+            return {}
+        return {name: path for name, (path, _) in entry["stages"].get(stage, {}).items()}
+
+    def completed_stages(self, url: str) -> List[str]:
+        entry = self._entries.get(url)
+        return list(entry["stages"]) if entry else []
+
+    def resume_point(self, url: str, stages: Sequence[str]) -> int:
+        """
+        اندیس اولین مرحله ناتمام یک URL
+
+        A stage only counts as done while all of its recorded artifacts still
+        exist unchanged, so files removed or overwritten since are rebuilt.
+        """
+        entry = self._entries.get(url)
+        if not entry:
+            return 0
+        for index, stage in enumerate(stages):
+            artifacts = entry["stages"].get(stage)
+            if artifacts is None or any(file_stamp(path) != stamp for path, stamp in artifacts.values()):
+                return index
+        return len(stages)
@@ -6,6 +6,21 @@ Usage:
     --api-key <GOOGLE_API_KEY> [--youtube-api-key <YOUTUBE_API_KEY>] \
     [--method whisper|youtube] [--target Persian (FA)]
 
+Pipelined mode (URL N+1 downloads while URL N transcribes and N-1 renders):
+  python batch_process_csv.py --csv urls.csv --pipeline \
+    [--download-workers 2] [--transcript-workers 1] \
+    [--translate-workers 2] [--render-workers 1] [--max-in-flight N]
+
+Disk usage (pipeline mode): each URL runs in its own workspace under
+dubbing_work/jobs/; after a successful render everything but the final video
+is deleted (pass --keep-intermediates to keep the media and SRTs). Failed
+URLs keep their files so --resume can continue them.
+
+Resuming (every completed stage is checkpointed to dubbing_work/batches/):
+  python batch_process_csv.py --csv urls.csv --resume
+  Finished URLs are skipped; half-done URLs restart at their first stage
+  whose recorded artifacts are missing or changed.
+
 CSV format:
   - One URL per line, OR
   - With header containing a column named 'YouTube_Short_URL' or 'url'.
@@ -14,13 +29,32 @@ CSV format:
 import argparse
 import csv
 import os
+import queue
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from typing import List, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from batch_manifest import BatchManifest
+from job_workspace import JobWorkspace
+from whisper_models import preload_whisper_model
+
+if TYPE_CHECKING:
+    # Imported in main(); the runner itself only needs objects with the app's stage methods
+    from dubbing_functions import VideoDubbingApp
 
-from dubbing_functions import VideoDubbingApp
+
+STAGES = ('download', 'transcript', 'translate', 'render')
+STAGE_FAILURES = {
+    'download': 'download_failed',
+    'transcript': 'transcript_failed',
+    'translate': 'translate_failed',
+    'render': 'video_failed',
+}
+REPORT_HEADER = ['status', 'url', 'detail'] + [f'{stage}_s' for stage in STAGES]
 
 
 def read_urls(csv_path: Path) -> List[str]:
@@ -59,34 +93,213 @@ def read_urls(csv_path: Path) -> List[str]:
     return urls
 
 
-def process_url(app: VideoDubbingApp, url: str, extraction_method: str, target_language: str) -> Tuple[str, bool, str]:
-    start_ts = time.time()
-    try:
-        ok = app.download_youtube_video(url)
-        if not ok:
-            return (url, False, 'download_failed')
+class UrlJob:
+    """وضعیت پردازش یک URL در batch (نتیجه، خروجی و زمان هر مرحله)"""
 
-        if extraction_method == 'youtube':
-            ok = app.extract_transcript_from_youtube(url)
-        else:
-            ok = app.extract_audio_with_whisper()
-        if not ok:
-            return (url, False, 'transcript_failed')
+    def __init__(self, index: int, url: str, app: Optional["VideoDubbingApp"] = None):
+        self.index = index
+        self.url = url
+        self.app = app
+        self.ok = False
+        self.detail = ''
+        self.output_path: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        # Set when the first stage starts, so queue time before a slot frees up is not counted
+        self.started_at: Optional[float] = None
+        # Index into STAGES to start from (set when resuming from a manifest)
+        self.start_stage = 0
+        self.resumed_session_id: Optional[str] = None
+
+    def attach_app(self, app: "VideoDubbingApp") -> None:
+        self.app = app
+        if self.start_stage > 0 and self.resumed_session_id:
+            # Later stages locate SRTs/outputs through the session id chosen at download time
+            app.set_session_id(self.resumed_session_id)
+
+    def report_row(self) -> List[str]:
+        status = 'SUCCESS' if self.ok else 'FAIL'
+        return [status, self.url, self.detail] + [
+            f"{self.timings[stage]:.1f}" if stage in self.timings else '' for stage in STAGES
+        ]
 
-        ok = app.translate_subtitles(target_language)
-        if not ok:
-            return (url, False, 'translate_failed')
 
-        # Create video with subtitles using default configs inside the class
-        output_path = app.create_subtitled_video()
-        if not output_path or not os.path.exists(output_path):
-            return (url, False, 'video_failed')
+def plan_job(job: UrlJob, manifest: Optional[BatchManifest]) -> UrlJob:
+    """تعیین نقطه شروع یک URL بر اساس مانیفست (رد کردن URL های تمام‌شده)"""
+    if manifest is None:
+        return job
+    if manifest.is_finished(job.url):
+        job.ok = True
+        job.detail = manifest.detail(job.url)
+        job.start_stage = len(STAGES)
+        return job
+    job.start_stage = manifest.resume_point(job.url, STAGES)
+    job.resumed_session_id = manifest.session_id(job.url)
+    return job
 
-        dur = int(time.time() - start_ts)
-        return (url, True, f'ok:{Path(output_path).name} ({dur}s)')
 
+def stage_artifacts(job: UrlJob, stage: str) -> Dict[str, Path]:
+    """مسیر آرتیفکت‌های تولیدشده در هر مرحله (برای ثبت در مانیفست)"""
+    app = job.app
+    if stage == 'download':
+        return {'video': app.workspace.video_path, 'audio': app.workspace.audio_path}
+    if stage == 'transcript':
+        return {'srt_en': app._srt_en_path()}
+    if stage == 'translate':
+        return {'srt_fa': app._srt_fa_path()}
+    return {'output': Path(job.output_path)} if job.output_path else {}
+
+
+def run_stage(job: UrlJob, stage: str, extraction_method: str, target_language: str,
+              manifest: Optional[BatchManifest] = None) -> bool:
+    """اجرای یک مرحله برای یک URL؛ در صورت شکست job.detail تنظیم می‌شود"""
+    ok = _execute_stage(job, stage, extraction_method, target_language)
+    if manifest is not None:
+        try:
+            if ok:
+                manifest.record_stage(job.url, stage, stage_artifacts(job, stage), session_id=job.app.session_id)
+            if not ok or stage == STAGES[-1]:
+                manifest.record_result(job.url, job.ok, job.detail)
+        except OSError as e:
+            print(f"⚠️ Could not write batch manifest: {e}")
+    return ok
+
+
+def _execute_stage(job: UrlJob, stage: str, extraction_method: str, target_language: str) -> bool:
+    stage_start = time.time()
+    if job.started_at is None:
+        job.started_at = stage_start
+    try:
+        app = job.app
+        if stage == 'download':
+            ok = app.download_youtube_video(job.url)
+        elif stage == 'transcript':
+            if extraction_method == 'youtube':
+                ok = app.extract_transcript_from_youtube(job.url)
+            else:
+                ok = app.extract_audio_with_whisper()
+        elif stage == 'translate':
+            ok = app.translate_subtitles(target_language)
+        else:
+            # Create video with subtitles using default configs inside the class
+            output_path = app.create_subtitled_video()
+            ok = bool(output_path and os.path.exists(output_path))
+            job.output_path = output_path if ok else None
     except Exception as e:
-        return (url, False, f'exception:{str(e)[:120]}')
+        job.detail = f'exception:{str(e)[:120]}'
+        return False
+    finally:
+        job.timings[stage] = time.time() - stage_start
+
+    if not ok:
+        job.detail = STAGE_FAILURES[stage]
+        return False
+    if stage == STAGES[-1]:
+        job.ok = True
+        dur = int(time.time() - job.started_at)
+        job.detail = f'ok:{Path(job.output_path).name} ({dur}s)'
+    return True
+
+
+def run_job(job: UrlJob, extraction_method: str, target_language: str,
+            manifest: Optional[BatchManifest] = None) -> UrlJob:
+    """اجرای ترتیبی مراحل یک URL (از job.start_stage)"""
+    for stage in STAGES[job.start_stage:]:
+        if not run_stage(job, stage, extraction_method, target_language, manifest):
+            break
+    return job
+
+
+def process_url(app: "VideoDubbingApp", url: str, extraction_method: str, target_language: str) -> Tuple[str, bool, str]:
+    job = run_job(UrlJob(0, url, app), extraction_method, target_language)
+    return (url, job.ok, job.detail)
+
+
+class PipelinedBatchRunner:
+    """
+    اجرای batch به صورت خط لوله: هر مرحله استخر نخ محدود خود را دارد.
+
+    A URL moves to the next stage's pool as soon as its current stage finishes,
+    so network-bound stages (download, translate) overlap with CPU-bound ones
+    (Whisper, libx264 render). Every URL gets its own JobWorkspace so
+    concurrent URLs never share artifact paths. ``max_in_flight`` bounds how
+    many URLs are admitted at once, so downloads cannot race ahead and fill the
+    disk while Whisper is the bottleneck. Unless ``keep_intermediates`` is set,
+    a URL's workspace is pruned to its final video once it renders, so long
+    batches do not keep every download and WAV on disk.
+    """
+
+    def __init__(self, app_factory: Callable[[str], "VideoDubbingApp"], extraction_method: str,
+                 target_language: str, concurrency: Dict[str, int], max_in_flight: int = 0,
+                 manifest: Optional[BatchManifest] = None, keep_intermediates: bool = False):
+        self.app_factory = app_factory
+        self.manifest = manifest
+        self.keep_intermediates = keep_intermediates
+        self.extraction_method = extraction_method
+        self.target_language = target_language
+        self.concurrency = {stage: max(1, int(concurrency.get(stage, 1))) for stage in STAGES}
+        self.max_in_flight = max_in_flight or sum(self.concurrency.values())
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._finished: "queue.Queue[UrlJob]" = queue.Queue()
+
+    def _submit(self, job: UrlJob, stage_index: int) -> None:
+        self._pools[STAGES[stage_index]].submit(self._step, job, stage_index)
+
+    def _step(self, job: UrlJob, stage_index: int) -> None:
+        stage = STAGES[stage_index]
+        try:
+            if job.app is None:
+                job.attach_app(self.app_factory(f"batch_{job.index}"))
+            ok = run_stage(job, stage, self.extraction_method, self.target_language, self.manifest)
+        except Exception as e:
+            job.detail = f'exception:{str(e)[:120]}'
+            ok = False
+        if ok and stage_index + 1 < len(STAGES):
+            self._submit(job, stage_index + 1)
+            return
+        if job.ok and not self.keep_intermediates:
+            self._prune(job)
+        job.app = None
+        self._slots.release()
+        self._finished.put(job)
+
+    def _prune(self, job: UrlJob) -> None:
+        try:
+            removed = job.app.workspace.prune(keep=[job.output_path])
+            if removed:
+                print(f"🧹 {removed} intermediate files removed for {job.url}")
+        except Exception as e:
+            print(f"⚠️ Could not prune workspace of {job.url}: {e}")
+
+    def run(self, urls: List[str], on_finished: Optional[Callable[[UrlJob, int], None]] = None) -> List[UrlJob]:
+        """پردازش همه URL ها و بازگرداندن نتایج به ترتیب ورودی"""
+        self._pools = {
+            stage: ThreadPoolExecutor(max_workers=self.concurrency[stage], thread_name_prefix=f"batch-{stage}")
+            for stage in STAGES
+        }
+        results: List[UrlJob] = []
+        try:
+            feeder = threading.Thread(target=self._feed, args=(urls,), daemon=True)
+            feeder.start()
+            while len(results) < len(urls):
+                job = self._finished.get()
+                results.append(job)
+                if on_finished:
+                    on_finished(job, len(results))
+            feeder.join()
+        finally:
+            for pool in self._pools.values():
+                pool.shutdown(wait=True)
+        return sorted(results, key=lambda job: job.index)
+
+    def _feed(self, urls: List[str]) -> None:
+        for index, url in enumerate(urls, start=1):
+            job = plan_job(UrlJob(index, url), self.manifest)
+            if job.start_stage >= len(STAGES):
+                self._finished.put(job)
+                continue
+            self._slots.acquire()
+            self._submit(job, job.start_stage)
 
 
 def main():
@@ -96,8 +309,22 @@ def main():
     parser.add_argument('--youtube-api-key', default=os.getenv('YOUTUBE_API_KEY', ''), help='YouTube API key (optional)')
     parser.add_argument('--method', choices=['whisper', 'youtube'], default='whisper', help='Transcription method')
     parser.add_argument('--target', default='Persian (FA)', help='Target language for subtitles')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Overlap stages across URLs using one bounded pool per stage')
+    parser.add_argument('--download-workers', type=int, default=2, help='Concurrent downloads (pipeline mode)')
+    parser.add_argument('--transcript-workers', type=int, default=1, help='Concurrent Whisper/transcript jobs (pipeline mode)')
+    parser.add_argument('--translate-workers', type=int, default=2, help='Concurrent translations (pipeline mode)')
+    parser.add_argument('--render-workers', type=int, default=1, help='Concurrent subtitle renders (pipeline mode)')
+    parser.add_argument('--max-in-flight', type=int, default=0,
+                        help='Max URLs admitted at once (pipeline mode, default: sum of stage workers)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue a previous run of the same CSV from its manifest')
+    parser.add_argument('--keep-intermediates', action='store_true',
+                        help='Keep downloaded media, WAVs and SRTs of finished URLs (pipeline mode)')
     args = parser.parse_args()
 
+    from dubbing_functions import VideoDubbingApp
+
     csv_path = Path(args.csv)
     if not csv_path.exists():
         print(f"❌ CSV not found: {csv_path}")
@@ -114,22 +341,68 @@ def main():
         sys.exit(1)
 
     print(f"🗂️ Found {len(urls)} URLs. Starting batch...")
-    app = VideoDubbingApp(api_key, args.youtube_api_key or None)
-
-    report_lines: List[str] = []
-    success_count = 0
-    for idx, url in enumerate(urls, start=1):
-        print(f"\n[{idx}/{len(urls)}] ▶️ {url}")
-        url_result = process_url(app, url, args.method, args.target)
-        status = 'SUCCESS' if url_result[1] else 'FAIL'
-        print(f"   → {status} | {url_result[2]}")
-        report_lines.append(f"{status},{url},{url_result[2]}")
-        if url_result[1]:
-            success_count += 1
+    batch_start = time.time()
+    if args.method == 'whisper':
+        # Warm the shared model while the first downloads run
+        preload_whisper_model()
+    manifest = BatchManifest.for_urls(urls, fresh=not args.resume)
+    if args.resume:
+        finished = sum(1 for url in urls if manifest.is_finished(url))
+        print(f"♻️ Resuming from {manifest.path}: {finished}/{len(urls)} URLs already finished")
 
+    if args.pipeline:
+        concurrency = {
+            'download': args.download_workers,
+            'transcript': args.transcript_workers,
+            'translate': args.translate_workers,
+            'render': args.render_workers,
+        }
+        print(f"🚀 Pipeline mode: {concurrency}")
+        youtube_api_key = args.youtube_api_key or None
+
+        def make_app(job_name: str) -> VideoDubbingApp:
+            return VideoDubbingApp(api_key, youtube_api_key,
+                                   workspace=JobWorkspace.for_job(f"{job_name}_{manifest.batch_id}"))
+
+        def on_finished(job: UrlJob, done: int) -> None:
+            status = 'SUCCESS' if job.ok else 'FAIL'
+            print(f"\n[{done}/{len(urls)}] {status} | {job.url} | {job.detail}")
+
+        runner = PipelinedBatchRunner(make_app, args.method, args.target, concurrency,
+                                      args.max_in_flight, manifest, args.keep_intermediates)
+        jobs = runner.run(urls, on_finished)
+    else:
+        app = VideoDubbingApp(api_key, args.youtube_api_key or None)
+        jobs = []
+        for idx, url in enumerate(urls, start=1):
+            job = plan_job(UrlJob(idx, url), manifest)
+            if job.start_stage >= len(STAGES):
+                print(f"\n[{idx}/{len(urls)}] ⏭️ {url} (already finished)")
+                jobs.append(job)
+                continue
+            print(f"\n[{idx}/{len(urls)}] ▶️ {url}")
+            if job.start_stage > 0:
+                print(f"   ♻️ Resuming at stage: {STAGES[job.start_stage]}")
+            job.attach_app(app)
+            job = run_job(job, args.method, args.target, manifest)
+            job.app = None
+            print(f"   → {'SUCCESS' if job.ok else 'FAIL'} | {job.detail}")
+            jobs.append(job)
+
+    success_count = sum(1 for job in jobs if job.ok)
     report_path = Path('dubbing_work') / f'batch_report_{int(time.time())}.csv'
-    report_path.write_text('\n'.join(['status,url,detail'] + report_lines), encoding='utf-8')
-    print(f"\n✅ Done. {success_count}/{len(urls)} succeeded. Report: {report_path}")
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(REPORT_HEADER)
+        for job in jobs:
+            writer.writerow(job.report_row())
+
+    elapsed = int(time.time() - batch_start)
+    print(f"\n✅ Done. {success_count}/{len(urls)} succeeded in {elapsed}s. Report: {report_path}")
+    for stage in STAGES:
+        stage_total = sum(job.timings.get(stage, 0.0) for job in jobs)
+        print(f"   ⏱️ {stage}: {stage_total:.1f}s total")
 
 
 if __name__ == '__main__':
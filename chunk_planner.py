@@ -0,0 +1,160 @@
+"""
+برنامه‌ریز تکه‌بندی ترجمه بر اساس بودجه توکن
+Token-budget-aware, self-adapting chunk planner for subtitle translation
+
+Chunks are filled up to a per-request token budget instead of a fixed cue
+count. The budget is kept per provider/model and adapts to what the backend
+reports: a throttled or timed-out request halves it, a request that finishes
+within the target latency grows it back by a step. Other failures (a
+malformed reply, a 5xx) say nothing about the request size and leave it
+alone. ``stream`` cuts chunks lazily as workers pick them up, so a budget
+change applies to the rest of the current job, not just later ones. Planners
+are shared process-wide, so later jobs start from the learned budget.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import get_config
+from rate_limiter import estimate_tokens
+
+Cue = Tuple[str, str, str, str]
+
+DEFAULT_BUDGET = {
+    "tokens_per_request": 1500,
+    "min_tokens": 300,
+    "max_tokens": 6000,
+    "max_items": 40,
+    "target_latency_seconds": 20,
+    "growth": 1.15,
+}
+
+# Prompt overhead per cue: the id/number wrapper, plus the timestamp line in SRT mode
+CUE_OVERHEAD_TOKENS = {"json": 8, "srt": 16}
+
+
+class ChunkPlanner:
+    def __init__(self, tokens_per_request: int = 1500, min_tokens: int = 300, max_tokens: int = 6000,
+                 max_items: int = 40, target_latency_seconds: float = 20, growth: float = 1.15):
+        self.min_tokens = min_tokens
+        self.max_tokens = max(min_tokens, max_tokens)
+        self.max_items = max(1, max_items)
+        self.target_latency_seconds = target_latency_seconds
+        self.growth = max(1.0, growth)
+        self.budget = float(min(self.max_tokens, max(self.min_tokens, tokens_per_request)))
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.throttled = 0
+
+    @classmethod
+    def from_config(cls, provider: str, model: str) -> "ChunkPlanner":
+        """تنظیمات از translation.chunk_budget (پیش‌فرض، سپس provider و سپس provider/model)"""
+        budgets = get_config().get("translation", {}).get("chunk_budget", {})
+        settings: Dict[str, Any] = dict(DEFAULT_BUDGET)
+        for key in ("default", provider, f"{provider}/{model}"):
+            settings.update(budgets.get(key, {}))
+        return cls(**{name: settings[name] for name in DEFAULT_BUDGET})
+
+    def _take(self, entries: Sequence[Cue], start: int, protocol: str, max_items: Optional[int]) -> int:
+        """پایان تکه‌ای که از اندیس start شروع می‌شود و در بودجه فعلی جا می‌شود"""
+        overhead = CUE_OVERHEAD_TOKENS.get(protocol, CUE_OVERHEAD_TOKENS["srt"])
+        budget = self.budget
+        max_items = min(self.max_items, max_items or self.max_items)
+        end, tokens = start, 0
+        while end < len(entries):
+            cost = estimate_tokens(entries[end][3].strip()) + overhead
+            if end > start and (end - start >= max_items or tokens + cost > budget):
+                break
+            tokens += cost
+            end += 1
+        return end
+
+    def plan(self, entries: Sequence[Cue], protocol: str = "json", max_items: Optional[int] = None) -> List[List[Cue]]:
+        """تقسیم زیرنویس‌ها به تکه‌هایی که هر کدام در بودجه توکن فعلی جا می‌شوند"""
+        chunks: List[List[Cue]] = []
+        start = 0
+        while start < len(entries):
+            end = self._take(entries, start, protocol, max_items)
+            chunks.append(list(entries[start:end]))
+            start = end
+        return chunks
+
+    def stream(self, entries: Sequence[Cue], protocol: str = "json", max_items: Optional[int] = None) -> "ChunkStream":
+        """تکه‌بندی تنبل: هر تکه هنگام برداشتن با بودجه همان لحظه بریده می‌شود"""
+        return ChunkStream(self, entries, protocol, max_items)
+
+    def record(self, latency_seconds: float, ok: bool, throttled: bool = False, timed_out: bool = False) -> None:
+        """ثبت نتیجه یک درخواست و تنظیم بودجه (نصف شدن با محدودیت/timeout، رشد تدریجی با پاسخ سریع)"""
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.failures += 1
+                self.throttled += int(throttled)
+                if throttled or timed_out:
+                    self.budget = max(self.min_tokens, self.budget / 2)
+            elif latency_seconds <= self.target_latency_seconds:
+                self.budget = min(self.max_tokens, self.budget * self.growth)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "budget_tokens": int(self.budget),
+                "requests": self.requests,
+                "failures": self.failures,
+                "throttled": self.throttled,
+            }
+
+
+class ChunkStream:
+    """صف تکه‌ها برای کارگرهای هم‌زمان؛ next() شماره و تکه بعدی (یا None) را برمی‌گرداند"""
+
+    def __init__(self, planner: ChunkPlanner, entries: Sequence[Cue], protocol: str, max_items: Optional[int]):
+        self._planner = planner
+        self._entries = list(entries)
+        self._protocol = protocol
+        self._max_items = max_items
+        self._position = 0
+        self._lock = threading.Lock()
+        self.taken = 0
+
+    def next(self) -> Optional[Tuple[int, List[Cue]]]:
+        with self._lock:
+            if self._position >= len(self._entries):
+                return None
+            end = self._planner._take(self._entries, self._position, self._protocol, self._max_items)
+            chunk = self._entries[self._position:end]
+            self._position = end
+            self.taken += 1
+            return self.taken, chunk
+
+
+def is_throttle_error(error: Any) -> bool:
+    """تشخیص خطای محدودیت نرخ/سهمیه از متن خطا"""
+    status = getattr(error, "status_code", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in ("429", "resource_exhausted", "quota", "rate limit", "too many requests"))
+
+
+def is_timeout_error(error: Any) -> bool:
+    """تشخیص timeout (درخواست برای مهلت پاسخ بیش از حد بزرگ بوده است)"""
+    if isinstance(error, TimeoutError) or getattr(error, "status_code", None) in (408, 504):
+        return True
+    message = f"{type(error).__name__} {error}".lower()
+    return any(marker in message for marker in ("timeout", "timed out", "deadline", "deadline_exceeded"))
+
+
+_planners: Dict[Tuple[str, str], ChunkPlanner] = {}
+_planners_lock = threading.Lock()
+
+
+def get_chunk_planner(provider: str, model: str) -> ChunkPlanner:
+    """برنامه‌ریز مشترک هر provider/model در سطح پردازه"""
+    with _planners_lock:
+        planner = _planners.get((provider, model))
+        if planner is None:
+            planner = ChunkPlanner.from_config(provider, model)
+            _planners[(provider, model)] = planner
+        return planner
@@ -18,14 +18,29 @@ DEFAULT_CONFIG = {
         "sample_rate": 44100,
         "channels": 2,
         "bitrate": "192k",
-        "format": "wav"
+        "format": "wav",
+        # صدای ورودی Whisper مستقیماً با فرمت مورد نیاز آن استخراج می‌شود
+        "transcription_sample_rate": 16000,
+        "transcription_channels": 1
     },
     
     # تنظیمات Whisper
     "whisper": {
         "model": "base",  # tiny, base, small, medium, large
         "language": None,  # None for auto-detect
-        "task": "transcribe"
+        "task": "transcribe",
+        "preload": True,  # بارگذاری مدل هنگام راه‌اندازی API/Streamlit
+        # رونویسی موازی صداهای طولانی (برش در سکوت‌ها و اجرای چندپردازه‌ای)
+        # هر کارگر یک نسخه کامل از مدل را بارگذاری می‌کند؛ پیش‌فرض خاموش است
+        "chunked": {
+            "enabled": False,
+            "min_duration_minutes": 10,  # فقط برای صداهای طولانی‌تر از این
+            "chunk_minutes": 5,
+            "search_window_seconds": 30,  # بازه جستجوی سکوت اطراف هر مرز
+            "min_silence_ms": 500,
+            "workers": 0,  # 0 = خودکار (محدود به حافظه آزاد، اندازه مدل و workers.cpu_workers)
+            "max_workers": None  # سقف کارگرها (None = تعداد هسته‌های CPU؛ حافظه آزاد همچنان محدود می‌کند)
+        }
     },
     
     # تنظیمات ترجمه
@@ -38,7 +53,43 @@ DEFAULT_CONFIG = {
         "max_retries": 3,
         "retry_delay": 2,  # seconds
         "rate_limit_delay": 1,  # seconds between requests (کاهش یافته)
-        "quality_mode": True  # فعال‌سازی حالت کیفیت بالا
+        "quality_mode": True,  # فعال‌سازی حالت کیفیت بالا
+        # "json": فقط آرایه {id, text} ارسال می‌شود | "srt": ارسال کامل SRT با تایم‌کدها
+        "protocol": "json",
+        "max_concurrent_chunks": 4,  # تعداد تکه‌هایی که هم‌زمان ترجمه می‌شوند
+        # بودجه توکن هر درخواست ترجمه؛ با خطا/محدودیت نرخ کوچک و با پاسخ سریع بزرگ می‌شود
+        "chunk_budget": {
+            "default": {"tokens_per_request": 1500, "min_tokens": 300, "max_tokens": 6000,
+                        "max_items": 40, "target_latency_seconds": 20},
+            "Azure": {"max_tokens": 3000}  # سقف خروجی Azure در translate_with_azure_openai برابر 4000 توکن است
+        },
+        # مسیریابی بین مدل‌ها/سرویس‌ها: مدار سرویس خراب یا محدودشده برای مدتی باز می‌شود
+        "router": {
+            # استفاده از سرویس دیگر (Azure/Gemini) در صورت خرابی سرویس انتخاب‌شده؛ پیش‌فرض خاموش است
+            # چون متن به سرویسی فرستاده می‌شود که کاربر انتخاب نکرده (هزینه، مسیر داده و سبک ترجمه)
+            "cross_provider": False,
+            "failure_threshold": 3,
+            "cooldown_seconds": 60,
+            "max_cooldown_seconds": 600,
+            "window": 20,
+            "prior_latency_seconds": 5,
+            "max_wait_seconds": 60
+        },
+        # زیرنویس‌های جاافتاده یا خراب در چند دور کوچک دوباره درخواست می‌شوند
+        "missing_cue_retries": 2,
+        "retry_batch_size": 8,
+        # سقف درخواست/توکن در دقیقه و درخواست در روز (UTC) برای هر سرویس و هر کلید API
+        # (مشترک بین همه کارهای همان کلید؛ مصرف روزانه در quota_db_path ذخیره می‌شود)
+        "rate_limits": {
+            "Gemini": {"requests_per_minute": 15, "tokens_per_minute": 250000, "requests_per_day": 1000},
+            "Azure": {"requests_per_minute": 60, "tokens_per_minute": 150000}
+        },
+        "quota_db_path": "dubbing_work/quota.db",
+        # حافظه ترجمه: جمله‌های تکراری فقط یک بار به مدل فرستاده می‌شوند
+        "memory": {
+            "enabled": True,
+            "db_path": "dubbing_work/translation_memory.db"
+        }
     },
     
     # تنظیمات TTS
@@ -58,10 +109,16 @@ DEFAULT_CONFIG = {
         "default_voice": "Fenrir",
         "sleep_between_requests": 30,  # افزایش زمان انتظار برای رعایت محدودیت‌ها
         "max_retries": 5,  # افزایش تعداد تلاش‌ها
-        "quota_limit_per_day": 15,  # محدودیت روزانه
+        # سهمیه هر کلید API که زمان‌بند سطل توکن اعمال می‌کند (به جای تاخیرهای ثابت)
+        "quota_limit_per_day": 15,  # محدودیت روزانه (روز تقویمی UTC)
+        "quota_db_path": "dubbing_work/quota.db",  # شمارنده پایدار مصرف روزانه هر کلید
         "quota_limit_per_minute": 3,  # محدودیت دقیقه‌ای
-        "batch_size": 3,  # تعداد سگمنت‌ها در هر batch
-        "batch_delay": 60  # تاخیر بین batch ها (ثانیه)
+        "max_backoff_seconds": 120,  # سقف عقب‌نشینی پس از خطای 429
+        "max_quota_wait_seconds": 900,  # بیشترین انتظار برای آزاد شدن سهمیه
+        "max_concurrent_requests": 3,  # تعداد درخواست‌های TTS هم‌زمان (1 = ترتیبی)
+        "stretch_workers": 0,  # کارگرهای تنظیم سرعت (0 = نصف هسته‌های CPU)
+        "stretch_engine": "wsola",  # "wsola": تغییر سرعت در حافظه | "rubberband": ffmpeg برای هر سگمنت
+        "resume": True  # رد شدن از سگمنت‌هایی که طبق مانیفست برای همین متن/صدا/مدل ساخته شده‌اند
     },
     
     # تنظیمات فشرده‌سازی
@@ -101,6 +158,36 @@ DEFAULT_CONFIG = {
         "cleanup_on_exit": True
     },
     
+    # تنظیمات اجرای هم‌زمان کارها در API
+    "workers": {
+        "max_concurrent_jobs": 2,  # حداکثر تعداد کارهای هم‌زمان
+        "cpu_workers": 1,  # استخر مراحل سنگین (Whisper، ffmpeg)
+        "io_workers": 4  # استخر مراحل شبکه‌ای (دانلود، ترجمه، TTS)
+    },
+
+    # کش آرتیفکت‌ها بین اجراها (دانلود، رونویسی، ترجمه، رندر)
+    "cache": {
+        "enabled": True,
+        "root": "dubbing_work/cache",
+        "max_size_gb": 20,  # بودجه دیسک؛ حذف LRU پس از عبور از آن
+        # کش جداگانه صداهای TTS با کلید (متن، صدا، مدل، پرامپت گفتار)
+        "tts": {
+            "enabled": True,
+            "root": "dubbing_work/tts_cache",
+            "max_size_gb": 2
+        }
+    },
+
+    # تنظیمات ذخیره‌سازی پایدار کارها
+    "jobs": {
+        "db_path": "dubbing_work/jobs.db",
+        "api_simple_db_path": "dubbing_work/api_simple_jobs.db",  # task های api_simple جدا نگه داشته می‌شوند
+        "ttl_hours": 72,  # حذف کارهای تمام‌شده پس از این مدت
+        "eviction_interval_minutes": 30,
+        "resume_interrupted": True,  # ادامه کارهای نیمه‌کاره پس از راه‌اندازی مجدد
+        "max_resume_attempts": 2
+    },
+
     # تنظیمات لاگ
     "logging": {
         "level": "INFO",
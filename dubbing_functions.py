@@ -7,16 +7,17 @@ import os
 import re
 import time
 import base64
-import struct
+import hashlib
 import tempfile
 import subprocess
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 
 import yt_dlp
 import pysrt
-import google.generativeai as genai
 from google.genai import types
 import google.genai as genai_client
 from wordpress_uploader import WordPressUploader
@@ -61,31 +62,54 @@ except ImportError:
                 # Copy file
                 subprocess.run(['cp', self.file_path, output_path], check=True)
             else:
-                # Create silent audio with proper duration
+                # Create silent audio with proper duration (zero-filled WAV, no ffmpeg spawn)
                 duration_seconds = max(self.duration, 0.1)  # حداقل 0.1 ثانیه
-                subprocess.run([
-                    'ffmpeg', '-f', 'lavfi', '-i', f'anullsrc=duration={duration_seconds}',
-                    '-ac', '2', '-ar', '44100', '-y', str(output_path)
-                ], check=True, capture_output=True)
+                write_silence_wav(output_path, duration_seconds, sample_rate=44100, channels=2)
 from youtube_transcript_api import YouTubeTranscriptApi
-import whisper
 from youtube_api_client import YouTubeAPIClient, YouTubeSimpleAPI
+from config import get_config
+from job_workspace import JobWorkspace
+from rate_limiter import estimate_tokens, get_rate_limiter
+from translation_memory import get_translation_memory
+from provider_clients import AzureChatClient, GeminiTextClient, ProviderHTTPError
+from chunk_planner import get_chunk_planner, is_throttle_error, is_timeout_error
+from wav_writer import StreamingWavWriter, wav_header, write_silence_wav
+from time_stretch import stretch_wav, tempo_for, wav_duration
+from timeline_mixer import TimelineMixer, volume_to_gain
+from quota_scheduler import QuotaExceededError, get_quota_scheduler, parse_retry_delay
+from translation_router import get_translation_router
+from tts_manifest import STATUS_OK, STATUS_SILENCE, STATUS_UNSTRETCHED, TtsManifest, segment_fingerprint
+from translation_alignment import align_chunk, build_json_payload, parse_json_reply
+from artifact_cache import get_shared_cache, get_tts_cache, hash_file, hash_params
+from whisper_models import configured_model_name, get_registry
+from whisper_chunked import get_chunked_transcriber, should_chunk
 
 
 class VideoDubbingApp:
     def __init__(self, api_key: str, youtube_api_key: str = None, 
                  azure_endpoint: str = None, azure_api_key: str = None, 
-                 azure_model: str = "grok-4-fast-reasoning"):
-        """Initialize the dubbing application with Google API key and optional YouTube API key"""
+                 azure_model: str = "grok-4-fast-reasoning",
+                 workspace: Optional[JobWorkspace] = None):
+        """Initialize the dubbing application with Google API key and optional YouTube API key.
+
+        ``workspace`` scopes every artifact path to one job; when omitted the
+        legacy shared ``dubbing_work`` directory is used.
+        """
         self.api_key = api_key
         self.youtube_api_key = youtube_api_key
-        genai.configure(api_key=api_key)
+        # Every Gemini call goes through this key-scoped client; google.generativeai's
+        # process-wide genai.configure would let concurrent jobs use each other's key
         self.client = genai_client.Client(api_key=api_key)
         
         # Initialize Azure OpenAI settings
         self.azure_endpoint = azure_endpoint
         self.azure_api_key = azure_api_key
         self.azure_model = azure_model
+
+        # Long-lived translation clients (cached Gemini models, pooled Azure HTTP session)
+        pool_size = get_config().get("translation", {}).get("max_concurrent_chunks", 4)
+        self.gemini_client = GeminiTextClient(client=self.client)
+        self.azure_client = AzureChatClient(pool_size=pool_size)
         
         # Initialize YouTube API client if key is provided
         self.youtube_client = None
@@ -97,15 +121,31 @@ class VideoDubbingApp:
                 print(f"⚠️ Warning: Could not initialize YouTube API client: {e}")
                 self.youtube_client = None
         
-        # Create necessary directories
-        self.work_dir = Path("dubbing_work")
-        self.work_dir.mkdir(exist_ok=True)
-        self.segments_dir = self.work_dir / "dubbed_segments"
-        self.segments_dir.mkdir(exist_ok=True)
-        self.instagram_dir = self.work_dir / "instagram"
-        self.instagram_dir.mkdir(exist_ok=True)
+        # Create necessary directories (all artifact paths resolve through the workspace)
+        self.workspace = workspace or JobWorkspace.shared()
+        self.work_dir = self.workspace.root
+        self.segments_dir = self.workspace.segments_dir
+        self.instagram_dir = self.workspace.instagram_dir
         # Shared session identifier used for naming outputs (YouTube ID or derived local ID)
         self.session_id: Optional[str] = None
+        # Content-addressed cache of stage outputs across runs (None when disabled)
+        try:
+            self.artifact_cache = get_shared_cache()
+        except Exception as e:
+            print(f"⚠️ Warning: Could not initialize artifact cache: {e}")
+            self.artifact_cache = None
+        try:
+            self.tts_cache = get_tts_cache()
+        except Exception as e:
+            print(f"⚠️ Warning: Could not initialize TTS cache: {e}")
+            self.tts_cache = None
+        # Per-job translation statistics of the last translate_subtitles call
+        self.last_translation_stats: Dict[str, Any] = {}
+        # Cache source identity of the current input (set for YouTube sources only)
+        # and the stat stamp of its audio, so a later upload into the same
+        # workspace silently disables caching instead of reusing stale results.
+        self._cache_source_id: Optional[str] = None
+        self._cache_source_stamp = None
 
 
 
@@ -145,38 +185,117 @@ class VideoDubbingApp:
 
     # ===== Path helpers (ID-aware with legacy fallback) =====
     def _srt_en_path(self) -> Path:
-        if self.session_id:
-            return self.work_dir / f"audio_{self.session_id}.srt"
-        return self.work_dir / 'audio.srt'
+        return self.workspace.srt_en_path(self.session_id)
 
     def _srt_fa_path(self) -> Path:
-        if self.session_id:
-            return self.work_dir / f"audio_{self.session_id}_fa.srt"
-        return self.work_dir / 'audio_fa.srt'
+        return self.workspace.srt_fa_path(self.session_id)
 
     def _output_video_path(self) -> Path:
         # Unified final output name
-        if self.session_id:
-            return self.work_dir / f"dubbed_video__{self.session_id}_fa.mp4"
-        return self.work_dir / 'dubbed_video_fa.mp4'
+        return self.workspace.output_video_path(self.session_id)
         
+    def set_api_key(self, api_key: str) -> None:
+        """تغییر کلید Gemini روی instance زنده (clientهای TTS و ترجمه با کلید جدید ساخته می‌شوند)"""
+        self.api_key = api_key
+        self.client = genai_client.Client(api_key=api_key)
+        self.gemini_client = GeminiTextClient(client=self.client)
+
+    # ===== Artifact cache helpers =====
+    def _media_stamp(self):
+        audio_path = self.workspace.audio_path
+        if not audio_path.exists():
+            return None
+        stat = audio_path.stat()
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _cache_active(self) -> bool:
+        if not self.artifact_cache or not self._cache_source_id:
+            return False
+        if self._media_stamp() != self._cache_source_stamp:
+            # Input media was replaced (e.g. a local upload) since the YouTube download
+            self._cache_source_id = None
+            return False
+        return True
+
+    def _cache_fetch(self, stage: str, params: Dict[str, Any], targets: Dict[str, Path]) -> bool:
+        if not self._cache_active():
+            return False
+        try:
+            return self.artifact_cache.fetch(stage, self._cache_source_id, params, targets)
+        except Exception as e:
+            print(f"⚠️ خطا در خواندن کش ({stage}): {e}")
+            return False
+
+    def _cache_store(self, stage: str, params: Dict[str, Any], files: Dict[str, Path]) -> None:
+        if not self._cache_active():
+            return
+        try:
+            self.artifact_cache.store(stage, self._cache_source_id, params, files)
+        except Exception as e:
+            print(f"⚠️ خطا در ذخیره کش ({stage}): {e}")
+
     def clean_previous_files(self):
         """پاکسازی فایل‌های قبلی"""
-        files_to_clean = [
-            "input_video.mp4", "audio.wav", "final_dubbed_video.mp4"
-        ]
-        
-        for file_name in files_to_clean:
-            file_path = self.work_dir / file_name
-            if file_path.exists():
-                file_path.unlink()
-                
-        # Clean segments directory
-        if self.segments_dir.exists():
-            for file in self.segments_dir.glob("*"):
-                file.unlink()
+        self.workspace.clean()
+
+    def extract_transcription_audio(self, video_path: Optional[Path] = None) -> Path:
+        """استخراج صدای آماده رونویسی (PCM مونو 16kHz) از ویدیو
+
+        Whisper resamples everything to 16 kHz mono anyway; writing that format
+        directly keeps audio.wav about 6x smaller than 44.1/48 kHz stereo.
+        The full-quality track is extracted separately, only when
+        ``create_final_video`` needs to keep the original audio.
+        """
+        audio_config = get_config().get("audio", {})
+        audio_path = self.workspace.audio_path
+        subprocess.run([
+            'ffmpeg', '-i', str(video_path or self.workspace.video_path), '-vn',
+            '-acodec', 'pcm_s16le',
+            '-ar', str(audio_config.get("transcription_sample_rate", 16000)),
+            '-ac', str(audio_config.get("transcription_channels", 1)),
+            '-y', str(audio_path)
+        ], check=True, capture_output=True)
+        return audio_path
+    
+    def _download_params(self) -> Dict[str, Any]:
+        """تنظیماتی که محتوای input_video.mp4 و audio.wav به آن‌ها وابسته است (بخشی از کلید کش)"""
+        audio_config = get_config().get("audio", {})
+        return {
+            'format': 'bestvideo+bestaudio/best',
+            'transcription_sample_rate': audio_config.get("transcription_sample_rate", 16000),
+            'transcription_channels': audio_config.get("transcription_channels", 1),
+        }
     
     def download_youtube_video(self, url: str) -> bool:
+        """دانلود ویدیو از یوتیوب؛ در صورت وجود در کش آرتیفکت‌ها دوباره دانلود نمی‌شود"""
+        try:
+            vid = self._extract_video_id(url)
+        except Exception:
+            vid = None
+        self._cache_source_id = None
+        targets = {'input_video.mp4': self.workspace.video_path, 'audio.wav': self.workspace.audio_path}
+        download_params = self._download_params()
+        if vid:
+            self.set_session_id(vid)
+            if self.artifact_cache:
+                try:
+                    if self.artifact_cache.fetch('download', f"youtube:{vid}", download_params, targets):
+                        self._cache_source_id = f"youtube:{vid}"
+                        self._cache_source_stamp = self._media_stamp()
+                        return True
+                except Exception as e:
+                    print(f"⚠️ خطا در خواندن کش (download): {e}")
+
+        # Never let ffmpeg/yt-dlp rewrite a hard-linked cache entry in place
+        self.workspace.reset_media()
+        success = self._download_youtube_video(url)
+        if success and vid:
+            self._cache_source_id = f"youtube:{vid}"
+            self._cache_source_stamp = self._media_stamp()
+            self._cache_store('download', download_params, targets)
+        return success
+
+    def _download_youtube_video(self, url: str) -> bool:
         """دانلود ویدیو از یوتیوب - نسخه بهینه شده برای سرور لینوکس"""
         try:
             # Set session id from YouTube URL (11-char ID) when available
@@ -190,8 +309,8 @@ class VideoDubbingApp:
             for file in self.work_dir.glob('temp_video*'):
                 file.unlink()
             
-            format_option = 'bestvideo+bestaudio/best'
-            temp_filename = str(self.work_dir / 'temp_video.%(ext)s')
+            format_option = self._download_params()['format']
+            temp_filename = self.workspace.temp_video_template()
 
             # استراتژی‌های چندگانه دانلود با استفاده از کوکی‌ها
             strategies = []
@@ -261,23 +380,19 @@ class VideoDubbingApp:
 
             if os.path.exists(downloaded_file):
                 _, file_extension = os.path.splitext(downloaded_file)
-                final_filename = self.work_dir / f'input_video{file_extension}'
+                final_filename = self.workspace.input_video_with_ext(file_extension)
                 os.rename(downloaded_file, str(final_filename))
                 
                 if file_extension.lower() != '.mp4':
-                    mp4_path = self.work_dir / 'input_video.mp4'
+                    mp4_path = self.workspace.video_path
                     subprocess.run([
                         'ffmpeg', '-i', str(final_filename), 
                         '-c', 'copy', str(mp4_path), '-y'
                     ], check=True, capture_output=True)
                     final_filename.unlink()
                 
-                # Extract audio
-                audio_path = self.work_dir / 'audio.wav'
-                subprocess.run([
-                    'ffmpeg', '-i', str(self.work_dir / 'input_video.mp4'), 
-                    '-vn', str(audio_path), '-y'
-                ], check=True, capture_output=True)
+                # Extract transcription-ready audio
+                self.extract_transcription_audio()
                 
                 return True
             return False
@@ -314,7 +429,7 @@ class VideoDubbingApp:
                 file.unlink()
             
             format_option = 'best'
-            temp_filename = str(self.work_dir / 'temp_video.%(ext)s')
+            temp_filename = self.workspace.temp_video_template()
             
             # تنظیمات پایه
             base_opts = {
@@ -404,8 +519,8 @@ class VideoDubbingApp:
                     mp4_filename = self._get_instagram_filename(url, 'video', 'mp4')
                     mp4_path = self.instagram_dir / mp4_filename
                 else:
-                    final_filename = self.work_dir / f'input_video{file_extension}'
-                    mp4_path = self.work_dir / 'input_video.mp4'
+                    final_filename = self.workspace.input_video_with_ext(file_extension)
+                    mp4_path = self.workspace.video_path
                 
                 # تغییر نام فایل
                 os.rename(downloaded_file, str(final_filename))
@@ -422,12 +537,8 @@ class VideoDubbingApp:
                     if final_filename != mp4_path:
                         os.rename(final_filename, str(mp4_path))
                 
-                # استخراج صدا (همیشه در work_dir)
-                audio_path = self.work_dir / 'audio.wav'
-                subprocess.run([
-                    'ffmpeg', '-i', str(mp4_path),
-                    '-vn', str(audio_path), '-y'
-                ], check=True, capture_output=True)
+                # استخراج صدای آماده رونویسی (همیشه در work_dir)
+                self.extract_transcription_audio(mp4_path)
                 
                 print("✅ دانلود اینستاگرام و استخراج صدا با موفقیت انجام شد!")
                 return True
@@ -787,7 +898,7 @@ class VideoDubbingApp:
                             post_info['downloaded_file'] = str(video_files[0])
                         else:
                             # اگر در instagram نبود، از work_dir استفاده کن
-                            video_path = self.work_dir / 'input_video.mp4'
+                            video_path = self.workspace.video_path
                             if video_path.exists():
                                 # انتقال به فولدر instagram با نام جدید
                                 new_filename = self._get_instagram_filename(url, 'video', 'mp4')
@@ -796,7 +907,7 @@ class VideoDubbingApp:
                                 shutil.move(str(video_path), str(new_path))
                                 post_info['downloaded_file'] = str(new_path)
                             else:
-                                post_info['downloaded_file'] = str(self.work_dir / 'input_video.mp4')
+                                post_info['downloaded_file'] = str(self.workspace.video_path)
                         post_info['downloaded'] = True
                         print("✅ ویدیو با موفقیت دانلود شد")
                     else:
@@ -1266,7 +1377,7 @@ class VideoDubbingApp:
             print("🔄 تلاش با تنظیمات جایگزین (بدون کوکی)...")
             
             format_option = 'worst[height<=480]/worst'
-            temp_filename = str(self.work_dir / 'temp_video.%(ext)s')
+            temp_filename = self.workspace.temp_video_template()
             
             # تنظیمات بدون کوکی و با User-Agent های مختلف
             fallback_configs = [
@@ -1316,23 +1427,19 @@ class VideoDubbingApp:
                     
                     if os.path.exists(downloaded_file):
                         _, file_extension = os.path.splitext(downloaded_file)
-                        final_filename = self.work_dir / f'input_video{file_extension}'
+                        final_filename = self.workspace.input_video_with_ext(file_extension)
                         os.rename(downloaded_file, str(final_filename))
                         
                         if file_extension.lower() != '.mp4':
-                            mp4_path = self.work_dir / 'input_video.mp4'
+                            mp4_path = self.workspace.video_path
                             subprocess.run([
                                 'ffmpeg', '-i', str(final_filename), 
                                 '-c', 'copy', str(mp4_path), '-y'
                             ], check=True, capture_output=True)
                             final_filename.unlink()
                         
-                        # Extract audio
-                        audio_path = self.work_dir / 'audio.wav'
-                        subprocess.run([
-                            'ffmpeg', '-i', str(self.work_dir / 'input_video.mp4'), 
-                            '-vn', str(audio_path), '-y'
-                        ], check=True, capture_output=True)
+                        # Extract transcription-ready audio
+                        self.extract_transcription_audio()
                         
                         print(f"✅ دانلود با {config['name']} موفق بود")
                         return True
@@ -1577,7 +1684,7 @@ class VideoDubbingApp:
                 result = subprocess.run([
                     'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
                     '-of', 'default=noprint_wrappers=1:nokey=1',
-                    str(self.work_dir / 'input_video.mp4')
+                    str(self.workspace.video_path)
                 ], capture_output=True, text=True)
                 
                 video_duration = float(result.stdout.strip())
@@ -1658,16 +1765,27 @@ class VideoDubbingApp:
     def extract_audio_with_whisper(self) -> bool:
         """استخراج متن از صدا با Whisper"""
         try:
-            audio_path = self.work_dir / 'audio.wav'
+            audio_path = self.workspace.audio_path
             if not audio_path.exists():
                 print("❌ فایل صوتی یافت نشد")
                 return False
-            
-            print("🔄 در حال بارگذاری مدل Whisper...")
-            model = whisper.load_model("base")
+
+            model_name = configured_model_name()
+            whisper_params = {'model': model_name, 'language': 'en'}
+            if self.session_id and self._cache_fetch('transcript', whisper_params,
+                                                     {'audio.srt': self._srt_en_path()}):
+                return True
             
             print("🔄 در حال تشخیص گفتار...")
-            result = model.transcribe(str(audio_path), language="en")
+            if should_chunk(audio_path, model_name):
+                # Long audio: split at silences and transcribe on a process pool
+                result = get_chunked_transcriber(model_name).transcribe(audio_path, language="en")
+            else:
+                # Shared, already-warm model; inference on one instance is serialized
+                registry = get_registry()
+                model = registry.get(model_name)
+                with registry.lock(model_name):
+                    result = model.transcribe(str(audio_path), language="en")
             
             # بررسی کیفیت تشخیص
             if not result or not result.get("segments"):
@@ -1723,7 +1841,7 @@ class VideoDubbingApp:
             if not self.session_id:
                 try:
                     # Derive from existing input_video if possible
-                    possible_input = self.work_dir / 'input_video.mp4'
+                    possible_input = self.workspace.video_path
                     if possible_input.exists():
                         self.set_session_id_from_local_path(str(possible_input))
                     else:
@@ -1743,7 +1861,8 @@ class VideoDubbingApp:
             else:
                 print(f"⚠️ خطا: فایل SRT ایجاد نشد در: {srt_path}")
                 return False
-            
+
+            self._cache_store('transcript', whisper_params, {'audio.srt': srt_path})
             return True
             
         except Exception as e:
@@ -1891,12 +2010,14 @@ class VideoDubbingApp:
                 'model': self.azure_model
             }
     
-    def translate_with_azure_openai(self, text: str, target_language: str = "Persian (FA)") -> Optional[str]:
+    def translate_with_azure_openai(self, text: str, target_language: str = "Persian (FA)",
+                                    raise_errors: bool = False) -> Optional[str]:
         """ترجمه متن با استفاده از Azure OpenAI
         
         Args:
             text: متن برای ترجمه
             target_language: زبان مقصد
+            raise_errors: به جای None خطا داده شود (ProviderHTTPError با status_code برای پاسخ‌های HTTP ناموفق)
             
         Returns:
             متن ترجمه شده یا None در صورت خطا
@@ -1906,16 +2027,6 @@ class VideoDubbingApp:
                 print("❌ Azure endpoint یا API key تنظیم نشده است")
                 return None
             
-            import requests
-            
-            # ساخت URL کامل
-            url = f"{self.azure_endpoint.rstrip('/')}/openai/v1/chat/completions"
-            
-            headers = {
-                'Content-Type': 'application/json',
-                'api-key': self.azure_api_key
-            }
-            
             # ساخت prompt بر اساس زبان مقصد
             if target_language == "Persian (FA)":
                 system_prompt = """شما یک مترجم حرفه‌ای هستید که متخصص ترجمه زیرنویس‌های ویدیو به فارسی هستید.
@@ -1926,17 +2037,19 @@ class VideoDubbingApp:
                 system_prompt = f"You are a professional translator. Translate the following text to {target_language}. Return only the translation without any explanation."
                 user_prompt = text
             
-            data = {
-                'model': self.azure_model,
-                'messages': [
+            # Pooled keep-alive session: no TLS handshake per chunk
+            response = self.azure_client.chat(
+                self.azure_endpoint,
+                self.azure_api_key,
+                self.azure_model,
+                [
                     {'role': 'system', 'content': system_prompt},
                     {'role': 'user', 'content': user_prompt}
                 ],
-                'temperature': 0.3,
-                'max_tokens': 4000
-            }
-            
-            response = requests.post(url, headers=headers, json=data, timeout=60)
+                temperature=0.3,
+                max_tokens=4000,
+                timeout=60
+            )
             
             if response.status_code == 200:
                 result = response.json()
@@ -1945,12 +2058,18 @@ class VideoDubbingApp:
                     return translated_text
                 else:
                     print(f"❌ پاسخ نامعتبر از Azure OpenAI: {result}")
+                    if raise_errors:
+                        raise RuntimeError("پاسخ نامعتبر از Azure OpenAI")
                     return None
             else:
                 print(f"❌ خطای HTTP {response.status_code}: {response.text[:200]}")
+                if raise_errors:
+                    raise ProviderHTTPError(response.status_code, response.text[:200])
                 return None
                 
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"❌ خطا در ترجمه با Azure OpenAI: {str(e)}")
             import traceback
             traceback.print_exc()
@@ -1964,7 +2083,7 @@ class VideoDubbingApp:
             # Ensure session_id is set before looking for the file
             if not self.session_id:
                 try:
-                    possible_input = self.work_dir / 'input_video.mp4'
+                    possible_input = self.workspace.video_path
                     if possible_input.exists():
                         self.set_session_id_from_local_path(str(possible_input))
                     else:
@@ -1984,7 +2103,7 @@ class VideoDubbingApp:
                 if srt_files:
                     print(f"🔍 فایل‌های SRT موجود: {[str(f) for f in srt_files]}")
                     # Try to find audio.srt first (legacy naming)
-                    audio_srt = self.work_dir / 'audio.srt'
+                    audio_srt = self.workspace.srt_en_path()
                     if audio_srt.exists():
                         print(f"⚠️ استفاده از فایل audio.srt به عنوان جایگزین")
                         srt_path = audio_srt
@@ -2019,22 +2138,59 @@ class VideoDubbingApp:
 
             print(f"📝 تعداد زیرنویس‌های انگلیسی: {len(src_entries)}")
 
-            # 2) Chunking helper (limit by count or characters)
-            def chunk_entries(entries, max_items=15, max_chars=4000):
-                chunks, cur, cur_chars = [], [], 0
-                for idx, st, en, tx in entries:
-                    block = f"{idx}\n{st} --> {en}\n{tx.strip()}\n\n"
-                    if cur and (len(cur) >= max_items or cur_chars + len(block) > max_chars):
-                        chunks.append(cur)
-                        cur, cur_chars = [], 0
-                    cur.append((idx, st, en, tx))
-                    cur_chars += len(block)
-                if cur:
-                    chunks.append(cur)
-                return chunks
-
-            chunks = chunk_entries(src_entries)
-            print(f"📦 فایل به {len(chunks)} تکه تقسیم شد")
+            # Keyed on the exact source SRT, so compression/merge settings are covered
+            translation_params = {
+                'srt_sha': hashlib.sha256(srt_content.encode('utf-8')).hexdigest(),
+                'target_language': target_language,
+                'provider': provider,
+                'model_name': model_name or (self.azure_model if provider == "Azure" else None),
+            }
+            self.last_translation_stats = {}
+            if self._cache_fetch('translation', translation_params, {'audio_fa.srt': self._srt_fa_path()}):
+                return True
+
+            translation_config = get_config().get("translation", {})
+            # Backends in preference order; the router sends each chunk to the fastest healthy one
+            gemini_models = [model_name] if model_name and "gemini" in model_name.lower() else ["gemini-2.0-flash", "gemini-2.0-flash-lite", "gemini-flash-lite-latest"]
+            gemini_backends = [("Gemini", m) for m in gemini_models]
+            azure_backends = [("Azure", self.azure_model)] if self.azure_endpoint and self.azure_api_key else []
+            # Opt-in: falling back to another provider changes cost, data routing and style
+            cross_provider = translation_config.get("router", {}).get("cross_provider", False)
+            if provider == "Azure":
+                backends = [("Azure", self.azure_model)] + (gemini_backends if cross_provider else [])
+            else:
+                backends = gemini_backends + (azure_backends if cross_provider else [])
+            router = get_translation_router()
+
+            # Translation memory: cues translated before (intros, outros, re-uploads) skip the LLM.
+            # Entries are keyed by the backend that produced them; only the provider the user
+            # picked is consulted, so a cross-provider fallback is never silently reused.
+            memory = get_translation_memory()
+            remembered: Dict[int, str] = {}
+            if memory:
+                src_texts = [tx.strip() for _, _, _, tx in src_entries]
+                for backend_provider, backend_model in backends:
+                    misses = [i for i in range(len(src_texts)) if i not in remembered]
+                    if backend_provider != provider or not misses:
+                        continue
+                    found = memory.lookup_many([src_texts[i] for i in misses],
+                                               target_language, backend_provider, backend_model)
+                    remembered.update({misses[j]: text for j, text in found.items()})
+            self.last_translation_stats = {
+                'cues': len(src_entries),
+                'memory_hits': len(remembered),
+                'memory_misses': len(src_entries) - len(remembered),
+            }
+            print(f"🧠 حافظه ترجمه: {len(remembered)} یافت شد | {len(src_entries) - len(remembered)} نیاز به ترجمه")
+            pending_entries = [entry for i, entry in enumerate(src_entries) if i not in remembered]
+
+            # 2) Chunking: fill each request up to the provider/model token budget
+            protocol = translation_config.get("protocol", "json")
+            use_json = protocol == "json"
+            planner = get_chunk_planner(provider, translation_params['model_name'] or 'default')
+            # Chunks are cut lazily as workers pick them up, so a budget change applies mid-job
+            estimated_chunks = len(planner.plan(pending_entries, protocol))
+            print(f"📦 حدود {estimated_chunks} تکه (بودجه فعلی هر درخواست: {int(planner.budget)} توکن)")
 
             # 3) Build prompt per chunk and translate
             def build_chunk_srt(chunk):
@@ -2047,66 +2203,41 @@ class VideoDubbingApp:
                     lines.append("")
                 return "\n".join(lines)
 
-            def translate_chunk(chunk_srt):
-                # Check provider and use appropriate translation method
-                if provider == "Azure":
-                    # Azure OpenAI translation
+            def build_chunk_payload(chunk):
+                # JSON protocol: only {id, text}; timings stay local and are re-attached on alignment
+                return build_json_payload(chunk) if use_json else build_chunk_srt(chunk)
+
+            def build_prompt(payload, cue_count):
+                if use_json:
                     if target_language == "Persian (FA)":
-                        prompt = f"""شما یک مترجم حرفه‌ای هستید که متخصص ترجمه زیرنویس‌های ویدیو به فارسی هستید.
+                        return f"""شما یک مترجم حرفه‌ای هستید که متخصص ترجمه زیرنویس‌های ویدیو به فارسی هستید.
 
 ## وظیفه شما:
-فایل زیرنویس SRT انگلیسی رو دریافت می‌کنید و باید اون رو به فارسی روان و طبیعی ترجمه کنید.
+یک آرایه JSON از زیرنویس‌های انگلیسی به شکل [{{"id": عدد, "text": متن}}] دریافت می‌کنید و باید متن هر آیتم را به فارسی روان و طبیعی ترجمه کنید.
 
 ## قوانین بسیار مهم:
-۱. تعداد سگمنت‌ها: فایل خروجی باید دقیقاً {len(chunk)} سگمنت داشته باشد (دقیقاً مشابه ورودی). به هیچ وجه سگمنت‌ها را با هم ترکیب یا حذف نکن.
-۲. حفظ زمان‌بندی: تایم‌کدهای SRT رو دست نزن و دقیقاً همونطور که هست نگه دار.
+۱. تعداد آیتم‌ها: خروجی باید دقیقاً {cue_count} آیتم داشته باشد. به هیچ وجه آیتم‌ها را با هم ترکیب یا حذف نکن.
+۲. شناسه‌ها: مقدار id هر آیتم را دقیقاً همان‌طور که هست نگه دار.
 ۳. کیفیت ترجمه: ترجمه باید خیلی روان و نیتیو باشه، مفهوم و پیام اصلی رو منتقل کن (زبان محاوره و روزمره فارسی).
-۴. فرمت خروجی: فقط و فقط محتوای SRT را برگردان. هیچ توضیح اضافه یا متنی قبل و بعد از آن ننویس.
-۵. شماره‌گذاری: از همان شماره‌های ترتیب ورودی استفاده کن.
+۴. فرمت خروجی: فقط و فقط آرایه JSON با همان ساختار [{{"id": ..., "text": ...}}] را برگردان. هیچ توضیح اضافه‌ای ننویس.
 
-فایل SRT برای ترجمه:
+ورودی JSON:
 
-{chunk_srt}
+{payload}"""
+                    return f"""Translate the "text" of every item in this JSON array to {target_language}.
+Return exactly {cue_count} items with the same "id" values (do NOT merge or split items).
+Output only the JSON array in the form [{{"id": ..., "text": ...}}].
 
-ترجمه فارسی:"""
-                    else:
-                        prompt = f"""Translate this SRT file to {target_language}.
-Maintain exact 1-to-1 mapping (do NOT split segments).
-Keep original timestamps unchanged.
-Output only the SRT content.
+{payload}"""
 
-{chunk_srt}
-
-Translation:"""
-                    
-                    # Use Azure OpenAI for translation
-                    translated = self.translate_with_azure_openai(prompt, target_language)
-                    if translated:
-                        time.sleep(2)
-                        return self._clean_srt_response(translated)
-                    return None
-                else:
-                    # Gemini translation logic
-                    models = [model_name] if model_name and "gemini" in model_name.lower() else ["gemini-2.0-flash", "gemini-2.0-flash-lite", "gemini-flash-lite-latest"]
-                    for m in models:
-                        try:
-                            model = genai.GenerativeModel(
-                                m,
-                                safety_settings={
-                                    genai.types.HarmCategory.HARM_CATEGORY_HARASSMENT: genai.types.HarmBlockThreshold.BLOCK_NONE,
-                                    genai.types.HarmCategory.HARM_CATEGORY_HATE_SPEECH: genai.types.HarmBlockThreshold.BLOCK_NONE,
-                                    genai.types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: genai.types.HarmBlockThreshold.BLOCK_NONE,
-                                    genai.types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: genai.types.HarmBlockThreshold.BLOCK_NONE,
-                                }
-                            )
-                            if target_language == "Persian (FA)":
-                                prompt = f"""شما یک مترجم حرفه‌ای هستید که متخصص ترجمه زیرنویس‌های ویدیو به فارسی هستید.
+                if target_language == "Persian (FA)":
+                    return f"""شما یک مترجم حرفه‌ای هستید که متخصص ترجمه زیرنویس‌های ویدیو به فارسی هستید.
 
 ## وظیفه شما:
 فایل زیرنویس SRT انگلیسی رو دریافت می‌کنید و باید اون رو به فارسی روان و طبیعی ترجمه کنید.
 
 ## قوانین بسیار مهم:
-۱. تعداد سگمنت‌ها: فایل خروجی باید دقیقاً {len(chunk)} سگمنت داشته باشد (دقیقاً مشابه ورودی). به هیچ وجه سگمنت‌ها را با هم ترکیب یا حذف نکن.
+۱. تعداد سگمنت‌ها: فایل خروجی باید دقیقاً {cue_count} سگمنت داشته باشد (دقیقاً مشابه ورودی). به هیچ وجه سگمنت‌ها را با هم ترکیب یا حذف نکن.
 ۲. حفظ زمان‌بندی: تایم‌کدهای SRT رو دست نزن و دقیقاً همونطور که هست نگه دار.
 ۳. کیفیت ترجمه: ترجمه باید خیلی روان و نیتیو باشه، مفهوم و پیام اصلی رو منتقل کن (زبان محاوره و روزمره فارسی).
 ۴. فرمت خروجی: فقط و فقط محتوای SRT را برگردان. هیچ توضیح اضافه یا متنی قبل و بعد از آن ننویس.
@@ -2114,60 +2245,146 @@ Translation:"""
 
 فایل SRT برای ترجمه:
 
-{chunk_srt}
+{payload}
 
 ترجمه فارسی:"""
-                            else:
-                                prompt = f"""Translate this SRT file to {target_language}.
+                return f"""Translate this SRT file to {target_language}.
 Maintain exact 1-to-1 mapping (do NOT split segments).
 Keep original timestamps unchanged.
 Output only the SRT content.
 
-{chunk_srt}
+{payload}
 
 Translation:"""
 
-                            resp = model.generate_content(prompt)
-                            time.sleep(2)
-                            return self._clean_srt_response(resp.text.strip())
-                        except Exception as e:
-                            print(f"⚠️ خطا در مدل {m}: {str(e)}")
-                            time.sleep(3)
-                            continue
-                    return None
+            def call_backend(backend, prompt):
+                backend_provider, backend_model = backend
+                if backend_provider == "Azure":
+                    # Errors propagate with their HTTP status, so a 429 reaches the router and planner
+                    translated = self.translate_with_azure_openai(prompt, target_language, raise_errors=True)
+                    if not translated:
+                        raise RuntimeError("Azure OpenAI پاسخی برنگرداند")
+                    return translated
+                # Models are built once per app and reused for every chunk
+                return self.gemini_client.generate(backend_model, prompt, json_mode=use_json)
 
-            # 4) Parse translated chunk into (text) list by aligning with original times
-            def parse_translated_chunk(translated_srt):
-                if not translated_srt:
+            def translate_chunk(payload, cue_count):
+                """(متن ترجمه، backend پاسخ‌دهنده) یا (None, None)"""
+                prompt = build_prompt(payload, cue_count)
+                candidates = router.rank(backends)
+                if not candidates:
+                    # Every circuit is open: wait for the first cool-down instead of failing the chunk
+                    wait = min(router.wait_time(backends), translation_config.get("router", {}).get("max_wait_seconds", 60))
+                    print(f"⏳ همه سرویس‌های ترجمه موقتاً غیرفعال هستند؛ {wait:.0f} ثانیه صبر...")
+                    time.sleep(wait)
+                    candidates = router.rank(backends)
+                for backend in candidates:
+                    started = time.time()
+                    try:
+                        # Paced by the limiter of this provider and key (the prompt already embeds the payload);
+                        # a spent daily quota raises and the router moves on to the next backend
+                        backend_key = self.azure_api_key if backend[0] == "Azure" else self.api_key
+                        get_rate_limiter(backend[0], backend_key).acquire(estimate_tokens(prompt))
+                        started = time.time()
+                        translated = call_backend(backend, prompt)
+                        latency = time.time() - started
+                        router.record(backend, latency, ok=True)
+                        planner.record(latency, ok=True)
+                        return (translated if use_json else self._clean_srt_response(translated)), backend
+                    except Exception as e:
+                        latency = time.time() - started
+                        throttled = is_throttle_error(e)
+                        router.record(backend, latency, ok=False, throttled=throttled)
+                        planner.record(latency, ok=False, throttled=throttled, timed_out=is_timeout_error(e))
+                        print(f"⚠️ خطا در مدل {backend[1]}: {str(e)}")
+                return None, None
+
+            # 4) Parse translated chunk into (idx, start, end, text) blocks for alignment
+            def parse_translated_chunk(translated):
+                if not translated:
                     return []
-                out = re.findall(pattern, translated_srt, re.DOTALL)
+                if use_json:
+                    return parse_json_reply(translated)
+                out = re.findall(pattern, translated, re.DOTALL)
                 # returns list of tuples (idx, start, end, text)
                 return out
 
             # 5) Rebuild final FA SRT with original indices and timings
             fa_lines = []
-            cursor = 0
             total_translated = 0
-            
-            for i, chunk in enumerate(chunks, 1):
-                print(f"🔄 ترجمه تکه {i}/{len(chunks)} ({len(chunk)} زیرنویس)...")
-                chunk_srt = build_chunk_srt(chunk)
-                tr_srt = translate_chunk(chunk_srt)
-                tr_blocks = parse_translated_chunk(tr_srt)
-
-                # align by order
-                n = min(len(tr_blocks), len(chunk))
-                for j in range(n):
-                    orig_idx, orig_st, orig_en, _ = chunk[j]
-                    _, _, _, tr_text = tr_blocks[j]
-                    fa_lines.append(str(orig_idx))
-                    fa_lines.append(f"{orig_st} --> {orig_en}")
-                    fa_lines.append(tr_text.strip())
-                    fa_lines.append("")
-                    total_translated += 1
-                
-                print(f"   ✅ {n}/{len(chunk)} زیرنویس ترجمه شد")
-                cursor += len(chunk)
+            translated_by_idx = {src_entries[i][0]: text for i, text in remembered.items()}
+            new_pairs: Dict[Any, List] = {}  # backend -> [(source, translation)]
+            
+            # Chunks are translated concurrently (paced by the provider rate limiter)
+            # and then aligned strictly in their original order below.
+            def translate_and_parse(chunk):
+                translated, backend = translate_chunk(build_chunk_payload(chunk), len(chunk))
+                return parse_translated_chunk(translated), backend
+
+            def drain(stream):
+                # Each worker pulls the next chunk, cut with the planner's budget at that moment
+                done = []
+                while True:
+                    item = stream.next()
+                    if item is None:
+                        return done
+                    number, chunk = item
+                    print(f"🔄 ترجمه تکه {number} ({len(chunk)} زیرنویس)...")
+                    done.append((number, chunk, translate_and_parse(chunk)))
+
+            def absorb_translations(sent_chunks, results):
+                # align by local cue number; dropped or malformed cues are returned for a retry
+                missing_cues = []
+                for chunk, (tr_blocks, backend) in zip(sent_chunks, results):
+                    chunk_translated, chunk_missing = align_chunk(chunk, tr_blocks)
+                    translated_by_idx.update(chunk_translated)
+                    if chunk_translated:
+                        new_pairs.setdefault(backend, []).extend(
+                            (orig_text.strip(), chunk_translated[orig_idx])
+                            for orig_idx, _, _, orig_text in chunk if orig_idx in chunk_translated
+                        )
+                    missing_cues.extend(chunk_missing)
+                    print(f"   ✅ {len(chunk_translated)}/{len(chunk)} زیرنویس ترجمه شد")
+                return missing_cues
+
+            workers = max(1, min(translation_config.get("max_concurrent_chunks", 4), estimated_chunks))
+
+            def translate_stream(executor, stream):
+                futures = [executor.submit(drain, stream) for _ in range(workers)]
+                done = sorted((item for future in futures for item in future.result()), key=lambda item: item[0])
+                return absorb_translations([chunk for _, chunk, _ in done], [result for _, _, result in done])
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                missing = translate_stream(executor, planner.stream(pending_entries, protocol))
+
+                # Re-request only the missing cues in small follow-up batches
+                retried = 0
+                for round_no in range(1, translation_config.get("missing_cue_retries", 2) + 1):
+                    if not missing:
+                        break
+                    print(f"🔁 ترجمه مجدد {len(missing)} زیرنویس جاافتاده (دور {round_no})...")
+                    retried += len(missing)
+                    missing = translate_stream(executor, planner.stream(
+                        missing, protocol, max_items=translation_config.get("retry_batch_size", 8)))
+
+            self.last_translation_stats['backends'] = router.stats(backends)
+            self.last_translation_stats['retried_cues'] = retried
+            self.last_translation_stats['missing_cues'] = len(missing)
+            if missing:
+                print(f"⚠️ {len(missing)} زیرنویس پس از تلاش مجدد ترجمه نشد: {', '.join(cue[0] for cue in missing)}")
+
+            for orig_idx, orig_st, orig_en, _ in src_entries:
+                if orig_idx not in translated_by_idx:
+                    continue
+                fa_lines.append(str(orig_idx))
+                fa_lines.append(f"{orig_st} --> {orig_en}")
+                fa_lines.append(translated_by_idx[orig_idx])
+                fa_lines.append("")
+                total_translated += 1
+
+            if memory:
+                for (backend_provider, backend_model), pairs in new_pairs.items():
+                    memory.store_many(pairs, target_language, backend_provider, backend_model)
 
             translated_path = self._srt_fa_path()
             print(f"🔍 در حال ذخیره فایل SRT فارسی در: {translated_path}")
@@ -2192,6 +2409,10 @@ Translation:"""
                 print("❌ هیچ زیرنویسی ترجمه نشد!")
                 return False
 
+            # Only complete translations are worth reusing
+            if fa_count == src_count:
+                self._cache_store('translation', translation_params, {'audio_fa.srt': translated_path})
+
             print("✅ ترجمه تکه‌ای SRT با موفقیت به پایان رسید")
             return True
             
@@ -2216,27 +2437,32 @@ Translation:"""
     def convert_to_wav(self, audio_data: bytes, mime_type: str) -> bytes:
         """Convert audio data to WAV format"""
         parameters = self.parse_audio_mime_type(mime_type)
-        bits_per_sample = parameters["bits_per_sample"]
-        sample_rate = parameters["rate"]
-        num_channels = 1
-        data_size = len(audio_data)
-        bytes_per_sample = bits_per_sample // 8
-        block_align = num_channels * bytes_per_sample
-        byte_rate = sample_rate * block_align
-        chunk_size = 36 + data_size
-        header = struct.pack(
-            "<4sI4s4sIHHIIHH4sI",
-            b"RIFF", chunk_size, b"WAVE", b"fmt ", 16, 1,
-            num_channels, sample_rate, byte_rate, block_align,
-            bits_per_sample, b"data", data_size
-        )
+        header = wav_header(parameters["rate"], parameters["bits_per_sample"], 1, len(audio_data))
         return header + audio_data
     
     def generate_tts_segment(self, text: str, voice: str, model: str, output_path: str, 
-                           speech_prompt: str = "", max_retries: int = 3) -> Optional[str]:
-        """تولید سگمنت صوتی با Gemini TTS"""
+                           speech_prompt: str = "", max_retries: int = 3,
+                           on_cache_lookup: Optional[Callable[[bool], None]] = None) -> Optional[str]:
+        """تولید سگمنت صوتی با Gemini TTS
+
+        Args:
+            on_cache_lookup: با True/False (یافت شد/نشد) پس از جستجوی کش TTS فراخوانی می‌شود
+        """
+        # Identical lines (re-runs, render-only changes) are served from disk without any API call
+        tts_cache_id = hash_params({'text': text, 'voice': voice, 'model': model,
+                                    'speech_prompt': (speech_prompt or '').strip()})
+        if self.tts_cache:
+            hit = self.tts_cache.fetch('tts', tts_cache_id, None, {'segment.wav': output_path})
+            if on_cache_lookup:
+                on_cache_lookup(hit)
+            if hit:
+                return output_path
+
+        scheduler = get_quota_scheduler("tts", self.api_key)
         for attempt in range(1, max_retries + 1):
             try:
+                # Waits only when the per-minute/per-day budget of this key is spent
+                scheduler.acquire()
                 if speech_prompt and speech_prompt.strip():
                     final_text = f"{speech_prompt.strip()}: \"{text}\""
                 else:
@@ -2256,25 +2482,48 @@ Translation:"""
                     model=model, contents=contents, config=generate_content_config,
                 )
                 
-                audio_data_buffer = b""
-                mime_type = ""
-                for chunk in stream:
-                    if chunk.candidates and chunk.candidates[0].content and chunk.candidates[0].content.parts:
-                        part = chunk.candidates[0].content.parts[0]
-                        if part.inline_data:
-                            audio_data_buffer += part.inline_data.data
-                            mime_type = part.inline_data.mime_type
-                
-                if audio_data_buffer and mime_type:
-                    final_wav_data = self.convert_to_wav(audio_data_buffer, mime_type)
-                    with open(output_path, 'wb') as f:
-                        f.write(final_wav_data)
+                # PCM chunks go straight to disk; the RIFF sizes are patched when the stream ends
+                writer = None
+                try:
+                    for chunk in stream:
+                        if chunk.candidates and chunk.candidates[0].content and chunk.candidates[0].content.parts:
+                            part = chunk.candidates[0].content.parts[0]
+                            if part.inline_data and part.inline_data.data:
+                                if writer is None:
+                                    audio_format = self.parse_audio_mime_type(part.inline_data.mime_type)
+                                    writer = StreamingWavWriter(output_path, audio_format['rate'],
+                                                                audio_format['bits_per_sample'])
+                                writer.write(part.inline_data.data)
+                except BaseException:
+                    if writer:
+                        writer.abort()
+                    raise
+                
+                if writer and writer.data_size:
+                    # Replaced atomically, so a hard link into the cache is never written through
+                    writer.close()
+                    scheduler.report_success()
+                    if self.tts_cache:
+                        self.tts_cache.store('tts', tts_cache_id, None, {'segment.wav': output_path})
                     return output_path
                 else:
+                    if writer:
+                        writer.abort()
                     raise Exception("هیچ داده صوتی از API دریافت نشد.")
                     
+            except QuotaExceededError as e:
+                print(f"⛔ سهمیه TTS تمام شده است: {e}")
+                return None
             except Exception as e:
                 print(f"خطا در تولید صدای Gemini (تلاش {attempt}/{max_retries}): {str(e)}")
+                if is_throttle_error(e):
+                    # Back off only on a real 429; the scheduler pauses every TTS call on this key
+                    backoff = scheduler.report_throttled(parse_retry_delay(e))
+                    print(f"⏳ محدودیت نرخ TTS؛ توقف {backoff:.0f} ثانیه‌ای درخواست‌ها")
+                    if attempt == max_retries:
+                        print(f"تولید صدا برای قطعه '{text[:50]}...' ناموفق بود.")
+                        return None
+                    continue
                 if attempt < max_retries:
                     wait_time = 9 * attempt
                     print(f"انتظار برای {wait_time} ثانیه...")
@@ -2284,9 +2533,77 @@ Translation:"""
                     return None
         return None
     
+    def _finalize_tts_segment(self, segment_index: int, sub, generated_path: Optional[str]) -> str:
+        """هم‌زمان‌سازی طول سگمنت TTS با زیرنویس (یا ساخت سکوت اگر تولید ناموفق بود)
+
+        وضعیت نتیجه برای مانیفست TTS برگردانده می‌شود (ok / silence / unstretched).
+        """
+        final_segment_path = self.workspace.segment_path(segment_index)
+        # A previous run may have left a hard link into the TTS cache here; ffmpeg -y would truncate it
+        if final_segment_path.exists():
+            final_segment_path.unlink()
+        
+        # مدیریت فایل‌های خالی
+        if not generated_path or not os.path.exists(generated_path):
+            print(f"⚠️ تولید صدای Gemini برای سگمنت {segment_index} ناموفق بود. فایل سکوت ایجاد می‌شود.")
+            start_ms = sub.start.hours * 3600000 + sub.start.minutes * 60000 + sub.start.seconds * 1000 + sub.start.milliseconds
+            end_ms = sub.end.hours * 3600000 + sub.end.minutes * 60000 + sub.end.seconds * 1000 + sub.end.milliseconds
+            target_duration_ms = max(end_ms - start_ms, 100)  # حداقل 100ms
+            
+            # ایجاد فایل سکوت (هم‌فرمت خروجی TTS؛ میکسر آن را به نرخ خط زمانی می‌برد)
+            try:
+                write_silence_wav(final_segment_path, target_duration_ms / 1000.0)
+                print(f"   ✅ فایل سکوت برای سگمنت {segment_index} ایجاد شد.")
+            except Exception as e:
+                print(f"   ❌ خطا در ایجاد فایل سکوت: {e}")
+            return STATUS_SILENCE
+        
+        try:
+            # تنظیم زمان‌بندی
+            start_ms = sub.start.hours * 3600000 + sub.start.minutes * 60000 + sub.start.seconds * 1000 + sub.start.milliseconds
+            end_ms = sub.end.hours * 3600000 + sub.end.minutes * 60000 + sub.end.seconds * 1000 + sub.end.milliseconds
+            target_duration = (end_ms - start_ms) / 1000.0
+            if target_duration <= 0:
+                target_duration = 0.5
+            
+            # Length from the WAV header; no full decode just to measure the segment
+            original_duration = wav_duration(generated_path)
+            
+            if original_duration == 0:
+                raise ValueError("فایل صوتی تولید شده خالی است.")
+            
+            speed_factor = tempo_for(original_duration, target_duration)
+            
+            print(f"   - زمان هدف: {target_duration:.2f}s | زمان اصلی: {original_duration:.2f}s | ضریب سرعت: {speed_factor:.2f}")
+            
+            if get_config().get("tts", {}).get("stretch_engine", "wsola") == "wsola":
+                # In-process WSOLA on the PCM: no ffmpeg spawn or extra WAV round-trip per segment
+                stretch_wav(generated_path, final_segment_path, speed_factor)
+            else:
+                subprocess.run([
+                    'ffmpeg', '-i', generated_path,
+                    '-filter:a', f'rubberband=tempo={speed_factor}',
+                    '-y', str(final_segment_path)
+                ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            
+            print(f"   ✅ سگمنت {segment_index} با موفقیت ساخته و زمان‌بندی شد.")
+            return STATUS_OK
+            
+        except Exception as e:
+            print(f"   ❌ خطا در زمان‌بندی سگمنت {segment_index}: {e}")
+            if os.path.exists(generated_path):
+                os.rename(generated_path, str(final_segment_path))
+            return STATUS_UNSTRETCHED
+    
     def create_audio_segments(self, voice: str = "Fenrir", model: str = "gemini-2.5-flash-preview-tts",
                             speech_prompt: str = "", sleep_between_requests: int = 30) -> bool:
-        """ایجاد سگمنت‌های صوتی با مدیریت هوشمند محدودیت‌ها"""
+        """ایجاد سگمنت‌های صوتی با مدیریت هوشمند محدودیت‌ها
+
+        درخواست‌ها با زمان‌بند سهمیه (tts.quota_limit_per_minute/day) تنظیم می‌شوند؛
+        ``sleep_between_requests`` فقط برای سازگاری با فراخوانی‌های قبلی باقی مانده است.
+        سگمنت‌هایی که طبق مانیفست TTS برای همین متن، صدا و مدل ساخته شده‌اند
+        دوباره تولید نمی‌شوند (tts.resume).
+        """
         try:
             srt_path = self._srt_fa_path()
             if not srt_path.exists():
@@ -2305,88 +2622,81 @@ Translation:"""
                 total_segments = len(subs)
                 print(f"✅ تعداد سگمنت‌ها به {total_segments} کاهش یافت.")
             
-            # مدیریت batch ها
-            batch_size = 3
-            batch_delay = 60
-            
-            for batch_start in range(0, total_segments, batch_size):
-                batch_end = min(batch_start + batch_size, total_segments)
-                batch_segments = subs[batch_start:batch_end]
-                
-                print(f"📦 پردازش batch {batch_start//batch_size + 1}: سگمنت‌های {batch_start+1}-{batch_end}")
-                
-                for i, sub in enumerate(batch_segments):
-                    segment_index = batch_start + i + 1
-                    print(f"🎧 پردازش سگمنت {segment_index}/{total_segments}...")
-                    
-                    temp_audio_path = self.segments_dir / f"temp_{segment_index}.wav"
-                    final_segment_path = self.segments_dir / f"dub_{segment_index}.wav"
-                    
-                    # تولید صدا با مدیریت خطا
-                    generated_path = self.generate_tts_segment(
-                        sub.text, voice, model, str(temp_audio_path), speech_prompt
-                    )
-                    
-                    # انتظار بین سگمنت‌ها
-                    if i < len(batch_segments) - 1:
-                        print(f"⏱️ استراحت برای {sleep_between_requests} ثانیه...")
-                        time.sleep(sleep_between_requests)
-                    
-                    # مدیریت فایل‌های خالی
-                    if not generated_path or not os.path.exists(generated_path):
-                        print(f"⚠️ تولید صدای Gemini برای سگمنت {segment_index} ناموفق بود. فایل سکوت ایجاد می‌شود.")
-                        start_ms = sub.start.hours * 3600000 + sub.start.minutes * 60000 + sub.start.seconds * 1000 + sub.start.milliseconds
-                        end_ms = sub.end.hours * 3600000 + sub.end.minutes * 60000 + sub.end.seconds * 1000 + sub.end.milliseconds
-                        target_duration_ms = max(end_ms - start_ms, 100)  # حداقل 100ms
-                        
-                        # ایجاد فایل سکوت با FFmpeg
-                        try:
-                            subprocess.run([
-                                'ffmpeg', '-f', 'lavfi', '-i', f'anullsrc=duration={target_duration_ms/1000.0}',
-                                '-ac', '2', '-ar', '44100', '-y', str(final_segment_path)
-                            ], check=True, capture_output=True)
-                            print(f"   ✅ فایل سکوت برای سگمنت {segment_index} ایجاد شد.")
-                        except Exception as e:
-                            print(f"   ❌ خطا در ایجاد فایل سکوت: {e}")
-                        continue
-                    
+            # K synthesis requests stay in flight under the shared quota scheduler; each
+            # finished segment is time-stretched on a separate pool while others download.
+            tts_config = get_config().get("tts", {})
+            in_flight = max(1, tts_config.get("max_concurrent_requests", 3))
+            stretch_workers = tts_config.get("stretch_workers") or max(1, (os.cpu_count() or 2) // 2)
+            # The TTS cache is shared by concurrent jobs, so this job counts its own lookups
+            cache_lookups = {"hits": 0, "misses": 0}
+            cache_lookups_lock = threading.Lock()
+
+            def count_cache_lookup(hit):
+                with cache_lookups_lock:
+                    cache_lookups["hits" if hit else "misses"] += 1
+
+            # Resumable stage: only changed, failed or missing segments spend quota
+            manifest = TtsManifest(self.workspace.tts_manifest_path())
+            fingerprints = {
+                segment_index: segment_fingerprint(sub.text, voice, model, speech_prompt,
+                                                   sub.end.ordinal - sub.start.ordinal)
+                for segment_index, sub in enumerate(subs, start=1)
+            }
+            todo = []
+            for segment_index, sub in enumerate(subs, start=1):
+                segment_path = self.workspace.segment_path(segment_index)
+                if tts_config.get("resume", True) and manifest.is_current(segment_index, segment_path,
+                                                                          fingerprints[segment_index]):
+                    continue
+                todo.append((segment_index, sub))
+            if len(todo) < total_segments:
+                print(f"♻️ {total_segments - len(todo)} سگمنت از اجرای قبلی معتبر است؛ {len(todo)} سگمنت تولید می‌شود.")
+
+            def synthesize(segment_index, sub):
+                print(f"🎧 پردازش سگمنت {segment_index}/{total_segments}...")
+                temp_audio_path = self.workspace.temp_segment_path(segment_index)
+                return self.generate_tts_segment(sub.text, voice, model, str(temp_audio_path), speech_prompt,
+                                                 on_cache_lookup=count_cache_lookup)
+
+            def finalize(segment_index, sub, generated_path):
+                status = self._finalize_tts_segment(segment_index, sub, generated_path)
+                segment_path = self.workspace.segment_path(segment_index)
+                try:
+                    duration = wav_duration(segment_path)
+                except Exception:
+                    duration = 0.0
+                manifest.record(segment_index, segment_path, fingerprints[segment_index], status, duration)
+
+            with ThreadPoolExecutor(max_workers=in_flight, thread_name_prefix="tts") as tts_pool, \
+                    ThreadPoolExecutor(max_workers=stretch_workers, thread_name_prefix="tts-stretch") as stretch_pool:
+                pending = {
+                    tts_pool.submit(synthesize, segment_index, sub): (segment_index, sub)
+                    for segment_index, sub in todo
+                }
+                stretch_futures = []
+                for future in as_completed(pending):
+                    segment_index, sub = pending[future]
                     try:
-                        # تنظیم زمان‌بندی
-                        start_ms = sub.start.hours * 3600000 + sub.start.minutes * 60000 + sub.start.seconds * 1000 + sub.start.milliseconds
-                        end_ms = sub.end.hours * 3600000 + sub.end.minutes * 60000 + sub.end.seconds * 1000 + sub.end.milliseconds
-                        target_duration = (end_ms - start_ms) / 1000.0
-                        if target_duration <= 0:
-                            target_duration = 0.5
-                        
-                        sound = AudioSegment.from_file(generated_path)
-                        original_duration = len(sound) / 1000.0
-                        
-                        if original_duration == 0:
-                            raise ValueError("فایل صوتی تولید شده خالی است.")
-                        
-                        speed_factor = original_duration / target_duration
-                        speed_factor = max(0.5, min(speed_factor, 2.5))
-                        
-                        print(f"   - زمان هدف: {target_duration:.2f}s | زمان اصلی: {original_duration:.2f}s | ضریب سرعت: {speed_factor:.2f}")
-                        
-                        subprocess.run([
-                            'ffmpeg', '-i', generated_path,
-                            '-filter:a', f'rubberband=tempo={speed_factor}',
-                            '-y', str(final_segment_path)
-                        ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                        
-                        print(f"   ✅ سگمنت {segment_index} با موفقیت ساخته و زمان‌بندی شد.")
-                        
+                        generated_path = future.result()
                     except Exception as e:
-                        print(f"   ❌ خطا در زمان‌بندی سگمنت {segment_index}: {e}")
-                        if os.path.exists(generated_path):
-                            os.rename(generated_path, str(final_segment_path))
-                
-                # انتظار بین batch ها
-                if batch_end < total_segments:
-                    print(f"⏳ انتظار {batch_delay} ثانیه قبل از batch بعدی...")
-                    time.sleep(batch_delay)
-            
+                        print(f"   ❌ خطا در تولید صدای سگمنت {segment_index}: {e}")
+                        generated_path = None
+                    stretch_futures.append(
+                        stretch_pool.submit(finalize, segment_index, sub, generated_path)
+                    )
+                for future in stretch_futures:
+                    future.result()
+            
+            lookups = cache_lookups["hits"] + cache_lookups["misses"]
+            if self.tts_cache and lookups:
+                hit_rate = cache_lookups["hits"] / lookups
+                print(f"♻️ کش TTS: {cache_lookups['hits']} یافت شد | {cache_lookups['misses']} ناموفق | نرخ {hit_rate:.0%}")
+            incomplete = sum(
+                not manifest.is_current(index, self.workspace.segment_path(index), fingerprint)
+                for index, fingerprint in fingerprints.items()
+            )
+            if incomplete:
+                print(f"⚠️ {incomplete} سگمنت کامل نشد؛ اجرای دوباره فقط همین‌ها را تولید می‌کند.")
             print("="*50)
             print("🎉 تمام سگمنت‌های صوتی با مدیریت هوشمند محدودیت‌ها ساخته شدند!")
             return True
@@ -2402,7 +2712,7 @@ Translation:"""
             # Ensure session_id is set before looking for files
             if not self.session_id:
                 try:
-                    possible_input = self.work_dir / 'input_video.mp4'
+                    possible_input = self.workspace.video_path
                     if possible_input.exists():
                         self.set_session_id_from_local_path(str(possible_input))
                     else:
@@ -2410,7 +2720,7 @@ Translation:"""
                 except Exception:
                     self._ensure_session_id()
             
-            video_path = self.work_dir / 'input_video.mp4'
+            video_path = self.workspace.video_path
             srt_path = self._srt_fa_path()
             
             print(f"🔍 در حال جستجوی فایل ویدیو: {video_path}")
@@ -2434,7 +2744,7 @@ Translation:"""
                         srt_path = fa_srt_files[0]
                     else:
                         # Try to find audio_fa.srt (legacy naming)
-                        audio_fa_srt = self.work_dir / 'audio_fa.srt'
+                        audio_fa_srt = self.workspace.srt_fa_path()
                         if audio_fa_srt.exists():
                             print(f"⚠️ استفاده از فایل audio_fa.srt به عنوان جایگزین")
                             srt_path = audio_fa_srt
@@ -2443,7 +2753,7 @@ Translation:"""
                             return None
                 else:
                     # Try legacy naming
-                    audio_fa_srt = self.work_dir / 'audio_fa.srt'
+                    audio_fa_srt = self.workspace.srt_fa_path()
                     if audio_fa_srt.exists():
                         print(f"⚠️ استفاده از فایل audio_fa.srt به عنوان جایگزین")
                         srt_path = audio_fa_srt
@@ -2460,7 +2770,7 @@ Translation:"""
             # بررسی فایل‌های صوتی موجود
             available_segments = []
             for i in range(1, len(subs) + 1):
-                segment_path = self.segments_dir / f"dub_{i}.wav"
+                segment_path = self.workspace.segment_path(i)
                 if segment_path.exists():
                     available_segments.append((i, segment_path))
             
@@ -2470,149 +2780,41 @@ Translation:"""
                 print("❌ هیچ فایل صوتی یافت نشد")
                 return None
             
-            # Create temporary directory
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_dir = Path(temp_dir)
-                
-                # Extract original audio
-                print("🎵 استخراج صدای اصلی...")
-                original_audio_path = temp_dir / "original_audio.wav"
-                subprocess.run([
-                    'ffmpeg', '-i', str(video_path), '-vn',
-                    '-acodec', 'pcm_s16le', '-ar', '44100', '-ac', '2',
-                    '-y', str(original_audio_path)
-                ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                
-                # Get video duration
-                result = subprocess.run([
-                    'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
-                    '-of', 'default=noprint_wrappers=1:nokey=1',
-                    str(video_path)
-                ], capture_output=True, text=True)
-                video_duration = float(result.stdout.strip())
-                print(f"⏱️ مدت ویدیو: {video_duration:.2f} ثانیه")
-                
-                # Create base audio (silent or original)
-                if keep_original_audio:
-                    print("🔊 حفظ صدای اصلی...")
-                    base_audio = AudioSegment.from_file(str(original_audio_path))
-                    volume_reduction = - (60 * (1 - original_audio_volume))
-                    base_audio = base_audio + volume_reduction
-                else:
-                    print("🔇 ایجاد صدای سکوت...")
-                    base_audio = AudioSegment.silent(duration=int(video_duration * 1000))
-                
-                # Overlay dubbing segments
-                print("🎤 اضافه کردن سگمنت‌های دوبله...")
-                final_audio = base_audio
-                
-                for i, (segment_num, segment_path) in enumerate(available_segments):
-                    try:
-                        print(f"   📁 پردازش سگمنت {segment_num}...")
-                        segment_audio = AudioSegment.from_file(str(segment_path))
-                        
-                        # محاسبه زمان شروع
-                        sub = subs[segment_num - 1]
-                        start_time_ms = (sub.start.hours * 3600 + sub.start.minutes * 60 + sub.start.seconds) * 1000 + sub.start.milliseconds
-                        
-                        if start_time_ms < 0:
-                            start_time_ms = 0
-                        
-                        print(f"      ⏰ زمان شروع: {start_time_ms/1000:.2f}s")
-                        print(f"      🎵 مدت صدا: {len(segment_audio)/1000:.2f}s")
-                        
-                        # اضافه کردن به صدا
-                        final_audio = final_audio.overlay(segment_audio, position=start_time_ms)
-                        print(f"      ✅ سگمنت {segment_num} اضافه شد")
-                        
-                    except Exception as e:
-                        print(f"      ❌ خطا در سگمنت {segment_num}: {str(e)}")
-                        continue
-                
-                # Export final audio
-                print("💾 ذخیره صدای نهایی...")
-                merged_audio_path = temp_dir / "merged_audio.wav"
-                final_audio.export(str(merged_audio_path), format="wav")
-                
-                # Create final video using the working method
-                print("🎬 ایجاد ویدیو نهایی...")
-                output_path = self._output_video_path()
-                
-                # روش کارآمد: استفاده از concat برای ترکیب فایل‌های صوتی
-                # ابتدا فایل لیست صوتی ایجاد می‌کنیم
-                audio_list_file = temp_dir / "audio_list.txt"
-                with open(audio_list_file, 'w') as f:
-                    for i, (segment_num, segment_path) in enumerate(available_segments):
-                        f.write(f"file '{segment_path.absolute()}'\n")
-                
-                # ترکیب فایل‌های صوتی
-                combined_audio = temp_dir / "combined_audio.wav"
-                subprocess.run([
-                    'ffmpeg', '-f', 'concat', '-safe', '0', '-i', str(audio_list_file),
-                    '-c', 'copy', '-y', str(combined_audio)
-                ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                
-                # بررسی و تنظیم زمان‌بندی صدا
-                print("⏱️ بررسی زمان‌بندی صدا...")
-                
-                # دریافت مدت زمان ویدیو
-                result = subprocess.run([
-                    'ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format',
-                    str(video_path)
-                ], capture_output=True, text=True)
-                
-                import json
-                video_info = json.loads(result.stdout)
-                video_duration = float(video_info['format']['duration'])
-                
-                # دریافت مدت زمان صدا
-                result = subprocess.run([
-                    'ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format',
-                    str(combined_audio)
-                ], capture_output=True, text=True)
-                
-                audio_info = json.loads(result.stdout)
-                audio_duration = float(audio_info['format']['duration'])
-                
-                print(f"   📹 مدت ویدیو: {video_duration:.2f} ثانیه")
-                print(f"   🎵 مدت صدا: {audio_duration:.2f} ثانیه")
-                
-                # تنظیم سرعت صدا اگر لازم باشد
-                if audio_duration > video_duration:
-                    speed_factor = audio_duration / video_duration
-                    print(f"   ⚡ تنظیم سرعت صدا: {speed_factor:.2f}x")
-                    
-                    adjusted_audio = temp_dir / "adjusted_audio.wav"
-                    subprocess.run([
-                        'ffmpeg', '-i', str(combined_audio),
-                        '-filter:a', f'rubberband=tempo={speed_factor}',
-                        '-y', str(adjusted_audio)
-                    ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                    
-                    # بررسی مدت زمان بعد از تنظیم
-                    result = subprocess.run([
-                        'ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format',
-                        str(adjusted_audio)
-                    ], capture_output=True, text=True)
-                    
-                    adjusted_info = json.loads(result.stdout)
-                    adjusted_duration = float(adjusted_info['format']['duration'])
-                    print(f"   🎵 مدت صدا بعد از تنظیم: {adjusted_duration:.2f} ثانیه")
-                    
-                    final_audio = adjusted_audio
-                else:
-                    print("   ✅ زمان‌بندی صدا مناسب است")
-                    final_audio = combined_audio
-                
-                # ایجاد ویدیو نهایی
-                subprocess.run([
-                    'ffmpeg', '-i', str(video_path), '-i', str(final_audio),
-                    '-c:v', 'copy', '-c:a', 'aac', '-map', '0:v', '-map', '1:a',
-                    '-shortest', '-y', str(output_path)
-                ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                
-                print(f"✅ ویدیو نهایی ایجاد شد: {output_path}")
-                return str(output_path)
+            # Get video duration
+            result = subprocess.run([
+                'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+                '-of', 'default=noprint_wrappers=1:nokey=1',
+                str(video_path)
+            ], capture_output=True, text=True)
+            video_duration = float(result.stdout.strip())
+            print(f"⏱️ مدت ویدیو: {video_duration:.2f} ثانیه")
+            
+            # One preallocated timeline: original track (optional) + every segment at its cue offset
+            mixer = TimelineMixer(video_duration)
+            if keep_original_audio:
+                # Original PCM is read straight from ffmpeg's stdout, no intermediate WAV
+                print("🔊 حفظ صدای اصلی...")
+                mixer.extract_base_track(video_path, volume_to_gain(original_audio_volume))
+            
+            # Overlay dubbing segments
+            print("🎤 اضافه کردن سگمنت‌های دوبله...")
+            for segment_num, segment_path in available_segments:
+                try:
+                    sub = subs[segment_num - 1]
+                    start_time_ms = (sub.start.hours * 3600 + sub.start.minutes * 60 + sub.start.seconds) * 1000 + sub.start.milliseconds
+                    segment_duration = mixer.add_segment(segment_path, max(0, start_time_ms) / 1000.0)
+                    print(f"   ✅ سگمنت {segment_num}: شروع {start_time_ms/1000:.2f}s | مدت {segment_duration:.2f}s")
+                except Exception as e:
+                    print(f"      ❌ خطا در سگمنت {segment_num}: {str(e)}")
+                    continue
+            
+            # Mixed PCM goes to ffmpeg over stdin while the video stream is copied
+            print("🎬 ایجاد ویدیو نهایی...")
+            output_path = self._output_video_path()
+            mixer.mux_into(video_path, output_path)
+            
+            print(f"✅ ویدیو نهایی ایجاد شد: {output_path}")
+            return str(output_path)
                 
         except Exception as e:
             print(f"❌ خطا در ایجاد ویدیو نهایی: {str(e)}")
@@ -2675,18 +2877,18 @@ Translation:"""
     def _backup_srt_files(self) -> bool:
         """پشتیبان‌گیری از فایل‌های SRT معتبر"""
         try:
-            srt_en_path = self.work_dir / 'audio.srt'
-            srt_fa_path = self.work_dir / 'audio_fa.srt'
+            srt_en_path = self.workspace.srt_en_path()
+            srt_fa_path = self.workspace.srt_fa_path()
             
             # پشتیبان‌گیری از فایل انگلیسی
             if srt_en_path.exists() and self._validate_srt_file(srt_en_path):
-                backup_en = self.work_dir / 'audio_backup.srt'
+                backup_en = self.workspace.path('audio_backup.srt')
                 backup_en.write_text(srt_en_path.read_text(encoding='utf-8'), encoding='utf-8')
                 print("✅ فایل SRT انگلیسی پشتیبان‌گیری شد")
             
             # پشتیبان‌گیری از فایل فارسی
             if srt_fa_path.exists() and self._validate_srt_file(srt_fa_path):
-                backup_fa = self.work_dir / 'audio_fa_backup.srt'
+                backup_fa = self.workspace.path('audio_fa_backup.srt')
                 backup_fa.write_text(srt_fa_path.read_text(encoding='utf-8'), encoding='utf-8')
                 print("✅ فایل SRT فارسی پشتیبان‌گیری شد")
             
@@ -2699,10 +2901,10 @@ Translation:"""
     def _restore_srt_files(self) -> bool:
         """بازیابی فایل‌های SRT از پشتیبان"""
         try:
-            backup_en = self.work_dir / 'audio_backup.srt'
-            backup_fa = self.work_dir / 'audio_fa_backup.srt'
-            srt_en_path = self.work_dir / 'audio.srt'
-            srt_fa_path = self.work_dir / 'audio_fa.srt'
+            backup_en = self.workspace.path('audio_backup.srt')
+            backup_fa = self.workspace.path('audio_fa_backup.srt')
+            srt_en_path = self.workspace.srt_en_path()
+            srt_fa_path = self.workspace.srt_fa_path()
             
             restored = False
             
@@ -2846,7 +3048,7 @@ Translation:"""
             cleaned_count = 0
             
             # پاکسازی فایل انگلیسی
-            srt_en_path = self.work_dir / 'audio.srt'
+            srt_en_path = self.workspace.srt_en_path()
             if srt_en_path.exists():
                 with open(srt_en_path, 'r', encoding='utf-8') as f:
                     content = f.read()
@@ -2859,7 +3061,7 @@ Translation:"""
                     cleaned_count += 1
             
             # پاکسازی فایل فارسی
-            srt_fa_path = self.work_dir / 'audio_fa.srt'
+            srt_fa_path = self.workspace.srt_fa_path()
             if srt_fa_path.exists():
                 with open(srt_fa_path, 'r', encoding='utf-8') as f:
                     content = f.read()
@@ -2888,7 +3090,7 @@ Translation:"""
             # Ensure session_id is set before looking for files
             if not self.session_id:
                 try:
-                    possible_input = self.work_dir / 'input_video.mp4'
+                    possible_input = self.workspace.video_path
                     if possible_input.exists():
                         self.set_session_id_from_local_path(str(possible_input))
                     else:
@@ -2896,7 +3098,7 @@ Translation:"""
                 except Exception:
                     self._ensure_session_id()
             
-            video_path = self.work_dir / 'input_video.mp4'
+            video_path = self.workspace.video_path
             srt_path = self._srt_fa_path()
             
             print(f"🔍 در حال جستجوی فایل ویدیو: {video_path}")
@@ -2920,7 +3122,7 @@ Translation:"""
                         srt_path = fa_srt_files[0]
                     else:
                         # Try to find audio_fa.srt (legacy naming)
-                        audio_fa_srt = self.work_dir / 'audio_fa.srt'
+                        audio_fa_srt = self.workspace.srt_fa_path()
                         if audio_fa_srt.exists():
                             print(f"⚠️ استفاده از فایل audio_fa.srt به عنوان جایگزین")
                             srt_path = audio_fa_srt
@@ -2929,7 +3131,7 @@ Translation:"""
                             return None
                 else:
                     # Try legacy naming
-                    audio_fa_srt = self.work_dir / 'audio_fa.srt'
+                    audio_fa_srt = self.workspace.srt_fa_path()
                     if audio_fa_srt.exists():
                         print(f"⚠️ استفاده از فایل audio_fa.srt به عنوان جایگزین")
                         srt_path = audio_fa_srt
@@ -3021,6 +3223,16 @@ Translation:"""
                 
                 # ایجاد ویدیو با زیرنویس
                 output_path = self._output_video_path()
+                render_params = {
+                    'srt_sha': hash_file(srt_path),
+                    'subtitle_config': sub_config,
+                    'fixed_text_config': fixed_config,
+                }
+                if self._cache_fetch('render', render_params, {'output.mp4': output_path}):
+                    return str(output_path)
+                # The previous output may be a hard link into the cache; ffmpeg -y would rewrite it in place
+                if output_path.exists():
+                    output_path.unlink()
                 print("🎬 ایجاد ویدیو با زیرنویس...")
                 
                 # ساخت فیلتر زیرنویس با فایل ASS سفارشی
@@ -3083,6 +3295,7 @@ Translation:"""
                     ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
                 
                 print(f"✅ ویدیو با زیرنویس ایجاد شد: {output_path}")
+                self._cache_store('render', render_params, {'output.mp4': output_path})
                 return str(output_path)
                 
         except Exception as e:
@@ -0,0 +1,225 @@
+"""
+ذخیره‌سازی پایدار وضعیت کارها در SQLite
+Durable SQLite-backed job store for the dubbing APIs
+
+Replaces the in-memory ``processing_jobs`` / ``processing_tasks`` dicts so
+job state survives restarts, ``/jobs`` can be paginated and filtered without
+serializing every job ever created, finished jobs expire after a TTL, and
+jobs interrupted by a crash can be found and resumed.
+
+Secrets (API keys) are never written to the ``request`` column; jobs that
+need a caller's key cannot be resumed after a restart and are failed instead.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import get_config
+from sqlite_store import open_sqlite
+
+
+ACTIVE_STATUSES = ("pending", "processing")
+FINISHED_STATUSES = ("completed", "failed")
+
+_UPDATABLE_FIELDS = ("status", "progress", "current_step", "message", "error", "result")
+
+# Request fields that are never persisted
+SECRET_REQUEST_FIELDS = ("api_key", "youtube_api_key", "azure_api_key")
+
+
+def public_request(request: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """حذف کلیدهای API از داده‌های درخواست پیش از ذخیره"""
+    if request is None:
+        return None
+    return {k: v for k, v in request.items() if k not in SECRET_REQUEST_FIELDS}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    current_step TEXT NOT NULL DEFAULT '',
+    message TEXT NOT NULL DEFAULT '',
+    error TEXT,
+    result TEXT,
+    request TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
+CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at);
+"""
+
+
+class JobStore:
+    def __init__(self, db_path: str = "dubbing_work/jobs.db"):
+        """
+        Args:
+            db_path: مسیر فایل پایگاه داده SQLite
+        """
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.db_path, _SCHEMA)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            # Scrubbed secrets must not survive in freed pages
+            self._conn.execute("PRAGMA secure_delete=ON")
+            self._scrub_secrets()
+            self._conn.commit()
+
+    def _scrub_secrets(self) -> None:
+        """حذف کلیدهای API از رکوردهایی که نسخه‌های قبلی ذخیره کرده‌اند"""
+        rows = self._conn.execute("SELECT job_id, request FROM jobs WHERE request IS NOT NULL").fetchall()
+        for row in rows:
+            try:
+                request = json.loads(row["request"])
+            except (json.JSONDecodeError, TypeError):
+                continue
+            if isinstance(request, dict) and any(k in request for k in SECRET_REQUEST_FIELDS):
+                self._conn.execute(
+                    "UPDATE jobs SET request = ? WHERE job_id = ?",
+                    (json.dumps(public_request(request), ensure_ascii=False), row["job_id"])
+                )
+
+    @classmethod
+    def from_config(cls, db_path: Optional[str] = None, key: str = "db_path") -> "JobStore":
+        """
+        ساخت store از بخش jobs در config.py
+
+        Args:
+            key: کلید مسیر پایگاه داده در بخش jobs (هر API پایگاه داده خودش را دارد)
+        """
+        jobs_config = get_config().get("jobs", {})
+        return cls(db_path or jobs_config.get(key) or jobs_config.get("db_path", "dubbing_work/jobs.db"))
+
+    # ===== Write =====
+    def create(self, job_id: str, status: str, current_step: str = "", message: str = "",
+               kind: str = "", request: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """ایجاد رکورد کار جدید"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, kind, status, progress, current_step, message, request, created_at, updated_at) "
+                "VALUES (?, ?, ?, 0, ?, ?, ?, ?, ?)",
+                (job_id, kind, status, current_step, message,
+                 json.dumps(public_request(request), ensure_ascii=False) if request is not None else None,
+                 now, now)
+            )
+            self._conn.commit()
+        return self.get(job_id)
+
+    def update(self, job_id: str, **fields) -> bool:
+        """به‌روزرسانی فیلدهای یک کار؛ فیلدهای None نادیده گرفته می‌شوند"""
+        values = {k: v for k, v in fields.items() if k in _UPDATABLE_FIELDS and v is not None}
+        if not values:
+            return False
+        if "result" in values:
+            values["result"] = json.dumps(values["result"], ensure_ascii=False)
+        values["updated_at"] = time.time()
+        assignments = ", ".join(f"{k} = ?" for k in values)
+        with self._lock:
+            cur = self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                (*values.values(), job_id)
+            )
+            self._conn.commit()
+            return cur.rowcount > 0
+
+    def mark_attempt(self, job_id: str) -> None:
+        """ثبت یک تلاش جدید برای اجرای کار (برای محدود کردن resume های پیاپی)"""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET attempts = attempts + 1 WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+
+    def delete(self, job_id: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+            return cur.rowcount > 0
+
+    # ===== Read =====
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def __contains__(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return row is not None
+
+    def list(self, status: Optional[str] = None, kind: Optional[str] = None,
+             limit: int = 50, offset: int = 0, newest_first: bool = True) -> Tuple[List[Dict[str, Any]], int]:
+        """لیست صفحه‌بندی‌شده کارها به همراه تعداد کل (با فیلتر اختیاری)"""
+        where, params = [], []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if kind:
+            where.append("kind = ?")
+            params.append(kind)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        order = "DESC" if newest_first else "ASC"
+        limit = max(1, min(int(limit), 500))
+        offset = max(0, int(offset))
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM jobs {clause}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT job_id, kind, status, progress, current_step, message, error, result, created_at, updated_at "
+                f"FROM jobs {clause} ORDER BY created_at {order} LIMIT ? OFFSET ?",
+                (*params, limit, offset)
+            ).fetchall()
+        return [self._row_to_dict(r) for r in rows], total
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {r[0]: r[1] for r in rows}
+
+    def interrupted_jobs(self) -> List[Dict[str, Any]]:
+        """کارهایی که هنگام توقف سرویس نیمه‌کاره مانده‌اند"""
+        placeholders = ", ".join("?" for _ in ACTIVE_STATUSES)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE status IN ({placeholders}) ORDER BY created_at ASC",
+                ACTIVE_STATUSES
+            ).fetchall()
+        return [self._row_to_dict(r) for r in rows]
+
+    # ===== Eviction =====
+    def evict_finished(self, ttl_seconds: float) -> List[str]:
+        """حذف کارهای تمام‌شده قدیمی‌تر از TTL؛ شناسه‌های حذف‌شده برگردانده می‌شوند"""
+        cutoff = time.time() - ttl_seconds
+        placeholders = ", ".join("?" for _ in FINISHED_STATUSES)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT job_id FROM jobs WHERE status IN ({placeholders}) AND updated_at < ?",
+                (*FINISHED_STATUSES, cutoff)
+            ).fetchall()
+            job_ids = [r[0] for r in rows]
+            if job_ids:
+                self._conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(j,) for j in job_ids])
+                self._conn.commit()
+        return job_ids
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        data = dict(row)
+        for key in ("result", "request"):
+            if key in data:
+                data[key] = json.loads(data[key]) if data[key] else None
+        for key in ("created_at", "updated_at"):
+            if key in data:
+                data[key] = datetime.fromtimestamp(data[key]).isoformat()
+        return data
@@ -0,0 +1,148 @@
+"""
+فضای کاری مستقل برای هر کار دوبله
+Job-scoped workspace that owns every artifact path of a dubbing job
+"""
+
+import re
+import shutil
+import uuid
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+
+DEFAULT_BASE_DIR = "dubbing_work"
+JOBS_SUBDIR = "jobs"
+
+
+class JobWorkspace:
+    """
+    Owns all artifact paths (video, audio, SRTs, segments, outputs) of one job.
+
+    The legacy layout (``dubbing_work/input_video.mp4`` ...) is simply the
+    shared workspace rooted at ``dubbing_work``; isolated workspaces live under
+    ``dubbing_work/jobs/<job_id>/`` and use the very same file names, so
+    helpers that only receive a ``work_dir`` keep working unchanged.
+    """
+
+    def __init__(self, root: Union[str, Path], job_id: Optional[str] = None):
+        self.root = Path(root)
+        self.job_id = job_id
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segments_dir.mkdir(exist_ok=True)
+        self.instagram_dir.mkdir(exist_ok=True)
+
+    @classmethod
+    def shared(cls, base_dir: Union[str, Path] = DEFAULT_BASE_DIR) -> "JobWorkspace":
+        """فضای کاری مشترک قدیمی (برای رابط‌های Streamlit تک‌کاربره)"""
+        return cls(base_dir)
+
+    @classmethod
+    def for_job(cls, job_id: Optional[str] = None,
+                base_dir: Union[str, Path] = DEFAULT_BASE_DIR) -> "JobWorkspace":
+        """ایجاد فضای کاری ایزوله برای یک کار (job)"""
+        job_id = job_id or uuid.uuid4().hex
+        safe = re.sub(r"[^a-zA-Z0-9_-]", "", job_id) or uuid.uuid4().hex
+        return cls(Path(base_dir) / JOBS_SUBDIR / safe, job_id=safe)
+
+    # ===== Directories =====
+    @property
+    def segments_dir(self) -> Path:
+        return self.root / "dubbed_segments"
+
+    @property
+    def instagram_dir(self) -> Path:
+        return self.root / "instagram"
+
+    # ===== Media inputs =====
+    @property
+    def video_path(self) -> Path:
+        return self.root / "input_video.mp4"
+
+    @property
+    def audio_path(self) -> Path:
+        return self.root / "audio.wav"
+
+    def temp_video_template(self) -> str:
+        """الگوی خروجی yt-dlp برای فایل موقت دانلود"""
+        return str(self.root / "temp_video.%(ext)s")
+
+    def input_video_with_ext(self, extension: str) -> Path:
+        return self.root / f"input_video{extension}"
+
+    # ===== Subtitles =====
+    def srt_en_path(self, session_id: Optional[str] = None) -> Path:
+        if session_id:
+            return self.root / f"audio_{session_id}.srt"
+        return self.root / "audio.srt"
+
+    def srt_fa_path(self, session_id: Optional[str] = None) -> Path:
+        if session_id:
+            return self.root / f"audio_{session_id}_fa.srt"
+        return self.root / "audio_fa.srt"
+
+    # ===== Segments =====
+    def segment_path(self, index: int) -> Path:
+        return self.segments_dir / f"dub_{index}.wav"
+
+    def temp_segment_path(self, index: int) -> Path:
+        return self.segments_dir / f"temp_{index}.wav"
+
+    def tts_manifest_path(self) -> Path:
+        """مانیفست سگمنت‌های TTS (همراه سگمنت‌ها پاک می‌شود)"""
+        return self.segments_dir / "tts_manifest.jsonl"
+
+    # ===== Outputs =====
+    def output_video_path(self, session_id: Optional[str] = None) -> Path:
+        if session_id:
+            return self.root / f"dubbed_video__{session_id}_fa.mp4"
+        return self.root / "dubbed_video_fa.mp4"
+
+    def path(self, name: str) -> Path:
+        """مسیر دلخواه داخل فضای کاری"""
+        return self.root / name
+
+    # ===== Housekeeping =====
+    def clean(self) -> None:
+        """پاکسازی فایل‌های ورودی و سگمنت‌ها (بدون حذف خود فضای کاری)"""
+        for file_name in ("input_video.mp4", "audio.wav", "final_dubbed_video.mp4"):
+            file_path = self.root / file_name
+            if file_path.exists():
+                file_path.unlink()
+        if self.segments_dir.exists():
+            for file in self.segments_dir.glob("*"):
+                file.unlink()
+
+    def reset_media(self) -> None:
+        """حذف پیوند فایل‌های ورودی پیش از تولید دوباره آن‌ها
+
+        ffmpeg با ``-y`` فایل موجود را در جای خود بازنویسی می‌کند؛ اگر آن فایل
+        hard-link کش آرتیفکت‌ها باشد محتوای کش خراب می‌شود.
+        """
+        for file_path in (self.video_path, self.audio_path):
+            if file_path.exists():
+                file_path.unlink()
+
+    def prune(self, keep: Iterable[Union[str, Path, None]] = ()) -> int:
+        """حذف همه آرتیفکت‌های میانی (ویدیو ورودی، صدا، SRT، سگمنت‌ها) به جز فایل‌های keep
+
+        Returns:
+            تعداد فایل‌های حذف‌شده
+        """
+        kept = {Path(path).resolve() for path in keep if path}
+        removed = 0
+        for path in sorted(self.root.rglob("*"), key=lambda p: len(p.parts), reverse=True):
+            if path.is_dir():
+                if not any(path.iterdir()):
+                    path.rmdir()
+            elif path.resolve() not in kept:
+                path.unlink()
+                removed += 1
+        return removed
+
+    def remove(self) -> None:
+        """حذف کامل فضای کاری ایزوله یک کار"""
+        if self.job_id:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def __repr__(self) -> str:
+        return f"JobWorkspace(root={str(self.root)!r}, job_id={self.job_id!r})"
@@ -0,0 +1,66 @@
+"""
+پایه مانیفست‌های JSONL فقط‌افزودنی
+Shared base for append-only, crash-safe JSONL manifests
+
+Each record is appended as one JSON line, flushed and fsync'ed before the
+in-memory state is updated. Replaying the file applies the records in order;
+a torn last line from a crash is ignored and terminated so later appends
+start on a fresh line. Artifacts are identified by ``file_stamp`` (size and
+mtime), so a file replaced or deleted since it was recorded does not match.
+Used by ``batch_manifest`` and ``tts_manifest``.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+
+def file_stamp(path: Union[str, Path]) -> Optional[List[int]]:
+    """اندازه و زمان تغییر فایل ([size, mtime_ns]) یا None اگر وجود نداشته باشد"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class JsonlManifest:
+    """زیرکلاس‌ها ``_apply`` را برای به‌روزرسانی وضعیت از هر رکورد پیاده می‌کنند"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        data = self.path.read_text(encoding="utf-8")
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply(json.loads(line))
+            except (KeyError, TypeError, ValueError):
+                # Torn write from a crash; everything before it is still valid
+                continue
+        if data and not data.endswith("\n"):
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n")
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        record["ts"] = time.time()
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(record)
@@ -0,0 +1,136 @@
+"""
+کلاینت‌های ماندگار سرویس‌های ترجمه
+Long-lived Gemini and Azure OpenAI clients for the translation hot loop
+
+``GeminiTextClient`` builds each model handle (and the safety settings) once
+and reuses it for every chunk. It generates through the ``google.genai.Client``
+of its own job, never the process-wide ``genai.configure``, so concurrent jobs
+with different API keys stay on their own key. ``AzureChatClient`` keeps one
+``requests.Session`` with a keep-alive connection pool, so concurrent chunk
+requests reuse TLS connections instead of opening one per call. Endpoint and
+key are passed per call because the Streamlit apps change them on a live
+``VideoDubbingApp``.
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+
+class ProviderHTTPError(Exception):
+    """پاسخ HTTP ناموفق سرویس؛ status_code برای تشخیص 429/timeout نگه داشته می‌شود"""
+
+    def __init__(self, status_code: int, detail: str = ""):
+        super().__init__(f"HTTP {status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _build_safety_settings() -> List[Any]:
+    from google.genai import types
+    categories = (
+        types.HarmCategory.HARM_CATEGORY_HARASSMENT,
+        types.HarmCategory.HARM_CATEGORY_HATE_SPEECH,
+        types.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
+        types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
+    )
+    return [types.SafetySetting(category=category, threshold=types.HarmBlockThreshold.BLOCK_NONE)
+            for category in categories]
+
+
+class _ScopedGeminiModel:
+    """مدل متنی روی یک google.genai.Client (کلید API همان instance، نه تنظیم سراسری)"""
+
+    def __init__(self, client: Any, name: str):
+        self._client = client
+        self.name = name
+        self._safety_settings: Optional[List[Any]] = None
+
+    def generate_content(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> Any:
+        from google.genai import types
+        if self._safety_settings is None:
+            self._safety_settings = _build_safety_settings()
+        config = types.GenerateContentConfig(safety_settings=self._safety_settings, **(generation_config or {}))
+        return self._client.models.generate_content(model=self.name, contents=prompt, config=config)
+
+
+class GeminiTextClient:
+    def __init__(self, client: Any = None, model_factory: Optional[Callable[[str], Any]] = None):
+        """
+        Args:
+            client: google.genai.Client ساخته‌شده با کلید API همین کار؛ genai.configure سراسری
+                استفاده نمی‌شود تا کارهای هم‌زمان با کلیدهای متفاوت کلید یکدیگر را نگیرند
+            model_factory: سازنده مدل (برای تست)
+        """
+        if model_factory is None:
+            if client is None:
+                raise ValueError("GeminiTextClient needs a google.genai.Client or a model_factory")
+
+            def model_factory(name: str) -> Any:
+                return _ScopedGeminiModel(client, name)
+        self._model_factory = model_factory
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def model(self, name: str) -> Any:
+        """مدل ساخته‌شده قبلی را برمی‌گرداند؛ فقط در اولین استفاده ساخته می‌شود"""
+        with self._lock:
+            model = self._models.get(name)
+            if model is None:
+                model = self._model_factory(name)
+                self._models[name] = model
+            return model
+
+    def generate(self, name: str, prompt: str, json_mode: bool = False) -> str:
+        if json_mode:
+            response = self.model(name).generate_content(
+                prompt, generation_config={"response_mime_type": "application/json"}
+            )
+        else:
+            response = self.model(name).generate_content(prompt)
+        return response.text.strip()
+
+
+def _build_session(pool_size: int) -> Any:
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class AzureChatClient:
+    def __init__(self, pool_size: int = 8, session_factory: Callable[[int], Any] = _build_session):
+        self._pool_size = pool_size
+        self._session_factory = session_factory
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> Any:
+        with self._lock:
+            if self._session is None:
+                self._session = self._session_factory(self._pool_size)
+            return self._session
+
+    def chat(self, endpoint: str, api_key: str, model: str, messages: List[Dict[str, str]],
+             temperature: float = 0.3, max_tokens: Optional[int] = 4000, timeout: float = 60) -> Any:
+        """درخواست chat/completions روی اتصال‌های ماندگار؛ پاسخ HTTP خام برگردانده می‌شود"""
+        url = f"{endpoint.rstrip('/')}/openai/v1/chat/completions"
+        data: Dict[str, Any] = {"model": model, "messages": messages, "temperature": temperature}
+        if max_tokens:
+            data["max_tokens"] = max_tokens
+        return self.session.post(
+            url,
+            headers={"Content-Type": "application/json", "api-key": api_key},
+            json=data,
+            timeout=timeout,
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
@@ -0,0 +1,292 @@
+"""
+زمان‌بند سهمیه درخواست‌ها با سطل توکن
+Token-bucket quota scheduler for per-key API limits
+
+Each scheduler enforces a per-minute budget as a token bucket and a per-day
+budget as a counter persisted in SQLite, keyed by service, API-key hash and
+UTC date, so the daily quota survives restarts and is shared by every process
+using the same key. Requests go out immediately while there is headroom; a call
+only waits when a budget is empty. Backoff happens only after the service
+actually answers 429: the server's retry delay is honoured when present,
+otherwise the pause doubles per consecutive 429 up to ``max_backoff_seconds``.
+Schedulers are shared process-wide per service and API key.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from config import get_config
+from sqlite_store import open_sqlite
+
+
+class QuotaExceededError(Exception):
+    """سهمیه روزانه تمام شده و انتظار بیش از حد مجاز طول می‌کشد"""
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float, now: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = refill_per_second
+        self.tokens = float(capacity)
+        self._updated = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def wait_time(self, cost: float) -> float:
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.refill_per_second
+
+
+def utc_day(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+def seconds_until_utc_midnight(timestamp: float) -> float:
+    return 86400.0 - (timestamp % 86400.0)
+
+
+_DAILY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_usage (
+    service TEXT NOT NULL,
+    key_hash TEXT NOT NULL,
+    day TEXT NOT NULL,
+    count REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (service, key_hash, day)
+);
+"""
+
+
+class DailyQuotaStore:
+    """شمارنده پایدار درخواست‌های روزانه هر کلید (SQLite، بر اساس تاریخ UTC)"""
+
+    def __init__(self, db_path: str = "dubbing_work/quota.db"):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        # Autocommit: try_consume manages its own BEGIN IMMEDIATE transaction
+        self._conn = open_sqlite(self.db_path, _DAILY_SCHEMA, isolation_level=None, timeout=5)
+
+    def used(self, service: str, key_hash: str, day: str) -> float:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT count FROM daily_usage WHERE service = ? AND key_hash = ? AND day = ?",
+                (service, key_hash, day)
+            ).fetchone()
+        return row[0] if row else 0.0
+
+    def try_consume(self, service: str, key_hash: str, day: str, limit: float, cost: float = 1) -> bool:
+        """ثبت مصرف اگر از سقف روزانه بیشتر نشود (اتمیک بین فرآیندها)"""
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock before reading, so two processes cannot both pass the check
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT count FROM daily_usage WHERE service = ? AND key_hash = ? AND day = ?",
+                    (service, key_hash, day)
+                ).fetchone()
+                used = row[0] if row else 0.0
+                if used + cost > limit:
+                    self._conn.execute("ROLLBACK")
+                    return False
+                self._conn.execute(
+                    "INSERT INTO daily_usage (service, key_hash, day, count) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(service, key_hash, day) DO UPDATE SET count = count + excluded.count",
+                    (service, key_hash, day, cost)
+                )
+                self._conn.execute("COMMIT")
+                return True
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class MemoryDailyStore:
+    """شمارنده روزانه درون حافظه (برای زمان‌بندهای بدون daily_store)"""
+
+    def __init__(self):
+        self._counts: Dict[Tuple[str, str, str], float] = {}
+
+    def used(self, service: str, key_hash: str, day: str) -> float:
+        return self._counts.get((service, key_hash, day), 0.0)
+
+    def try_consume(self, service: str, key_hash: str, day: str, limit: float, cost: float = 1) -> bool:
+        used = self.used(service, key_hash, day)
+        if used + cost > limit:
+            return False
+        self._counts[(service, key_hash, day)] = used + cost
+        return True
+
+
+_RETRY_DELAY = re.compile(r"retry[ _-]?(?:delay|after)['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)\s*s", re.IGNORECASE)
+
+
+def parse_retry_delay(error: object) -> Optional[float]:
+    """استخراج زمان retryDelay از متن خطای 429 (None اگر نباشد)"""
+    match = _RETRY_DELAY.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+class QuotaScheduler:
+    def __init__(self, per_minute: Optional[int] = None, per_day: Optional[int] = None,
+                 base_backoff_seconds: float = 10, max_backoff_seconds: float = 120,
+                 max_wait_seconds: float = 900,
+                 daily_store: Optional[DailyQuotaStore] = None, service: str = "", key_hash: str = "",
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 wall_clock: Callable[[], float] = time.time):
+        """
+        Args:
+            per_minute: حداکثر درخواست در دقیقه (None = بدون محدودیت)
+            per_day: حداکثر درخواست در روز تقویمی UTC (None = بدون محدودیت)
+            max_wait_seconds: اگر انتظار برای سهمیه بیشتر شود QuotaExceededError داده می‌شود
+            daily_store: شمارنده پایدار روزانه؛ بدون آن سهمیه روزانه فقط در حافظه این فرآیند شمرده می‌شود
+            service, key_hash: کلید شمارنده روزانه در daily_store
+        """
+        self._clock = clock
+        self._sleep = sleep
+        now = clock()
+        self._buckets = []
+        if per_minute:
+            self._buckets.append(TokenBucket(per_minute, per_minute / 60.0, now))
+        self.per_day = per_day
+        self._daily_store = daily_store or (MemoryDailyStore() if per_day else None)
+        self._service = service
+        self._key_hash = key_hash
+        self._wall_clock = wall_clock
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self._blocked_until = now
+        self._consecutive_throttles = 0
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.waited_seconds = 0.0
+
+    def _wait_time(self, now: float, cost: float) -> float:
+        wait = max(0.0, self._blocked_until - now)
+        for bucket in self._buckets:
+            bucket.refill(now)
+            wait = max(wait, bucket.wait_time(cost))
+        return wait
+
+    def acquire(self, cost: float = 1) -> float:
+        """انتظار تا وجود سهمیه؛ مدت انتظار برگردانده می‌شود"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                wait = self._wait_time(now, cost)
+                if wait <= 0:
+                    wait = self._consume_daily(cost)
+                if wait <= 0:
+                    for bucket in self._buckets:
+                        bucket.tokens -= cost
+                    self.requests += 1
+                    self.waited_seconds += waited
+                    return waited
+                if waited + wait > self.max_wait_seconds:
+                    raise QuotaExceededError(f"سهمیه تا {wait:.0f} ثانیه دیگر آزاد نمی‌شود")
+            wait = max(wait, 0.01)
+            self._sleep(wait)
+            waited += wait
+
+    def _consume_daily(self, cost: float) -> float:
+        """ثبت درخواست در شمارنده روزانه؛ اگر سهمیه امروز تمام شده، زمان تا نیمه‌شب UTC"""
+        if not self.per_day:
+            return 0.0
+        wall = self._wall_clock()
+        if self._daily_store.try_consume(self._service, self._key_hash, utc_day(wall), self.per_day, cost):
+            return 0.0
+        return seconds_until_utc_midnight(wall)
+
+    def daily_used(self) -> float:
+        if not self.per_day:
+            return 0.0
+        return self._daily_store.used(self._service, self._key_hash, utc_day(self._wall_clock()))
+
+    def report_throttled(self, retry_after: Optional[float] = None) -> float:
+        """ثبت پاسخ 429: همه درخواست‌های بعدی تا پایان زمان عقب‌نشینی متوقف می‌شوند"""
+        with self._lock:
+            self.throttled += 1
+            self._consecutive_throttles += 1
+            if retry_after is None:
+                retry_after = self.base_backoff_seconds * 2 ** (self._consecutive_throttles - 1)
+            backoff = min(self.max_backoff_seconds, retry_after)
+            now = self._clock()
+            self._blocked_until = max(self._blocked_until, now + backoff)
+            # The service disagrees with our count: treat the minute budget as spent
+            if self._buckets:
+                self._buckets[0].refill(now)
+                self._buckets[0].tokens = min(self._buckets[0].tokens, 0.0)
+            return backoff
+
+    def report_success(self) -> None:
+        with self._lock:
+            self._consecutive_throttles = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "waited_seconds": round(self.waited_seconds, 1),
+            }
+
+
+_schedulers: Dict[Tuple[str, str], QuotaScheduler] = {}
+_daily_stores: Dict[str, DailyQuotaStore] = {}
+_schedulers_lock = threading.Lock()
+_daily_stores_lock = threading.Lock()
+
+
+def api_key_id(api_key: str) -> str:
+    """شناسه کوتاه کلید API برای شمارنده‌ها (خود کلید ذخیره نمی‌شود)"""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+
+
+def get_daily_store(db_path: str = "dubbing_work/quota.db") -> DailyQuotaStore:
+    """شمارنده روزانه مشترک هر فایل پایگاه داده (برای TTS و ترجمه)"""
+    with _daily_stores_lock:
+        store = _daily_stores.get(db_path)
+        if store is None:
+            store = _daily_stores[db_path] = DailyQuotaStore(db_path)
+        return store
+
+
+def get_quota_scheduler(service: str, api_key: str = "") -> QuotaScheduler:
+    """
+    زمان‌بند مشترک هر سرویس و کلید API
+
+    محدودیت‌ها از بخش هم‌نام در config.py خوانده می‌شوند
+    (quota_limit_per_minute و quota_limit_per_day). مصرف روزانه در
+    quota_db_path همان بخش ذخیره می‌شود تا با راه‌اندازی دوباره صفر نشود.
+    """
+    key_id = api_key_id(api_key)
+    with _schedulers_lock:
+        scheduler = _schedulers.get((service, key_id))
+        if scheduler is None:
+            settings = get_config().get(service, {})
+            daily_store = None
+            if settings.get("quota_limit_per_day"):
+                daily_store = get_daily_store(settings.get("quota_db_path", "dubbing_work/quota.db"))
+            scheduler = QuotaScheduler(
+                per_minute=settings.get("quota_limit_per_minute"),
+                per_day=settings.get("quota_limit_per_day"),
+                max_backoff_seconds=settings.get("max_backoff_seconds", 120),
+                max_wait_seconds=settings.get("max_quota_wait_seconds", 900),
+                daily_store=daily_store,
+                service=service,
+                key_hash=key_id,
+            )
+            _schedulers[(service, key_id)] = scheduler
+        return scheduler
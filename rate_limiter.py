@@ -0,0 +1,123 @@
+"""
+محدودکننده نرخ درخواست‌ها برای سرویس‌های هوش مصنوعی
+Sliding-window requests/tokens-per-minute limiter per provider and API key
+
+Concurrent workers call ``acquire(tokens)`` before each API request; the call
+blocks until the request fits in both the requests-per-minute and the
+tokens-per-minute budget of the last 60 seconds. Quotas belong to API keys, so
+one limiter instance is shared process-wide per (provider, key): parallel jobs
+on the same key share its budget and jobs on different keys do not throttle
+each other. An optional requests-per-day cap is counted in the persistent
+SQLite ``DailyQuotaStore`` (keyed by key hash and UTC date) and raises
+``QuotaExceededError`` once today's budget is spent.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from config import get_config
+from quota_scheduler import MemoryDailyStore, QuotaExceededError, api_key_id, get_daily_store, utc_day
+
+
+WINDOW_SECONDS = 60.0
+
+
+def estimate_tokens(text: str) -> int:
+    """تخمین تقریبی تعداد توکن (حدود ۳ کاراکتر برای هر توکن در متن فارسی/انگلیسی)"""
+    return max(1, len(text or "") // 3)
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None,
+                 requests_per_day: Optional[int] = None, daily_store=None, service: str = "", key_hash: str = "",
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 wall_clock: Callable[[], float] = time.time):
+        """
+        Args:
+            requests_per_minute: حداکثر درخواست در هر ۶۰ ثانیه (None = بدون محدودیت)
+            tokens_per_minute: حداکثر توکن در هر ۶۰ ثانیه (None = بدون محدودیت)
+            requests_per_day: حداکثر درخواست در روز تقویمی UTC (None = بدون محدودیت)
+            daily_store: شمارنده پایدار روزانه (DailyQuotaStore)؛ بدون آن فقط در حافظه شمرده می‌شود
+            service, key_hash: کلید شمارنده روزانه در daily_store
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_day = requests_per_day
+        self._daily_store = daily_store or (MemoryDailyStore() if requests_per_day else None)
+        self._service = service
+        self._key_hash = key_hash
+        self._wall_clock = wall_clock
+        self._clock = clock
+        self._sleep = sleep
+        self._events: Deque[Tuple[float, int]] = deque()
+        self._tokens_in_window = 0
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def _prune(self, now: float) -> None:
+        while self._events and now - self._events[0][0] >= WINDOW_SECONDS:
+            _, tokens = self._events.popleft()
+            self._tokens_in_window -= tokens
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        """زمان انتظار لازم تا جا شدن درخواست در پنجره (0 یعنی همین حالا)"""
+        if not self._events:
+            return 0.0
+        if self.requests_per_minute and len(self._events) >= self.requests_per_minute:
+            return self._events[0][0] + WINDOW_SECONDS - now
+        if self.tokens_per_minute and self._tokens_in_window + tokens > self.tokens_per_minute:
+            # Wait until enough of the oldest events leave the window
+            freed = self._tokens_in_window
+            for timestamp, event_tokens in self._events:
+                freed -= event_tokens
+                if freed + tokens <= self.tokens_per_minute:
+                    return timestamp + WINDOW_SECONDS - now
+        return 0.0
+
+    def acquire(self, tokens: int = 1) -> float:
+        """انتظار تا مجاز شدن درخواست؛ مدت انتظار برگردانده می‌شود"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._prune(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    if self.requests_per_day and not self._daily_store.try_consume(
+                            self._service, self._key_hash, utc_day(self._wall_clock()), self.requests_per_day):
+                        raise QuotaExceededError(f"سهمیه روزانه {self._service} برای این کلید تمام شده است")
+                    self._events.append((now, tokens))
+                    self._tokens_in_window += tokens
+                    self.waited_seconds += waited
+                    return waited
+            wait = max(wait, 0.01)
+            self._sleep(wait)
+            waited += wait
+
+
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, api_key: str = "") -> RateLimiter:
+    """محدودکننده مشترک هر سرویس و کلید API بر اساس translation.rate_limits در config.py
+
+    requests_per_day هر سرویس در translation.quota_db_path شمرده می‌شود.
+    """
+    key_id = api_key_id(api_key)
+    with _limiters_lock:
+        limiter = _limiters.get((provider, key_id))
+        if limiter is None:
+            translation_config = get_config().get("translation", {})
+            limits = translation_config.get("rate_limits", {}).get(provider, {})
+            per_day = limits.get("requests_per_day")
+            daily_store = None
+            if per_day:
+                daily_store = get_daily_store(translation_config.get("quota_db_path", "dubbing_work/quota.db"))
+            limiter = RateLimiter(limits.get("requests_per_minute"), limits.get("tokens_per_minute"),
+                                  requests_per_day=per_day, daily_store=daily_store,
+                                  service=f"translation:{provider}", key_hash=key_id)
+            _limiters[(provider, key_id)] = limiter
+        return limiter
@@ -12,6 +12,8 @@ import subprocess
 import random
 import string
 from pathlib import Path
+from whisper_models import preload_whisper_model
+from batch_manifest import BatchManifest
 
 # تنظیمات صفحه
 st.set_page_config(
@@ -183,6 +185,9 @@ if dubbing_app is None:
 else:
     st.success("✅ اتصال به Google AI برقرار شد")
 
+# بارگذاری مدل Whisper در پس‌زمینه (یک بار برای هر پردازه)
+preload_whisper_model()
+
 # فرم ورودی
 st.markdown('<div class="input-container">', unsafe_allow_html=True)
 st.markdown("### 🔗 لینک ویدیو یوتیوب، اینستاگرام یا فایل CSV فهرست لینک‌ها")
@@ -195,6 +200,7 @@ youtube_url = st.text_input(
 
 # ورودی جایگزین: آپلود CSV حاوی لیست لینک‌ها
 csv_file = st.file_uploader("یا فایل CSV شامل لیست لینک‌های یوتیوب/اینستاگرام را آپلود کنید", type=["csv"])
+resume_batch = st.checkbox("♻️ ادامه پردازش قبلی همین فهرست (رد کردن لینک‌های تمام‌شده)", value=False)
 
 
 # تنظیمات قابل تغییر
@@ -526,6 +532,9 @@ st.markdown('</div>', unsafe_allow_html=True)
 """
 پردازش: از یک URL یا CSV چند URL
 """
+# مراحل ثبت‌شده در مانیفست batch
+BATCH_STAGES = ("download", "transcript", "translate", "render")
+
 # دکمه شروع پردازش
 if st.button("🚀 شروع پردازش", type="primary", use_container_width=True):
     urls = []
@@ -567,34 +576,59 @@ if st.button("🚀 شروع پردازش", type="primary", use_container_width=T
     total = len(urls)
     progress = st.progress(0)
 
+    # Only multi-link batches are resumable; a single link needs no manifest on disk
+    manifest = BatchManifest.for_urls(urls, fresh=not resume_batch) if len(urls) > 1 else None
+
     for idx, url in enumerate(urls, start=1):
         st.write(f"[{idx}/{total}] پردازش: {url}")
         progress.progress(min(int(idx / total * 100), 100))
 
+        # ادامه از مانیفست: رد کردن لینک‌های تمام‌شده و شروع از اولین مرحله ناتمام
+        start_stage = 0
+        if manifest is not None:
+            start_stage = manifest.resume_point(url, BATCH_STAGES)
+            if manifest.is_finished(url) or start_stage >= len(BATCH_STAGES):
+                st.info(f"⏭️ قبلاً انجام شده: {manifest.detail(url)}")
+                results.append((url, manifest.detail(url) or "ok:resumed"))
+                continue
+            if start_stage > 0:
+                if manifest.session_id(url):
+                    dubbing_app.set_session_id(manifest.session_id(url))
+                st.info(f"♻️ ادامه از مرحله: {BATCH_STAGES[start_stage]}")
+
         # 1) دانلود - تشخیص نوع URL
-        if 'instagram.com' in url:
-            with st.spinner("📥 دانلود ویدیو از اینستاگرام..."):
-                if not dubbing_app.download_instagram_video(url):
-                    results.append((url, "download_failed"))
-                    continue
-                # استخراج ID اینستاگرام برای نام‌گذاری
-                try:
-                    insta_id = dubbing_app._extract_instagram_id(url)
-                    if insta_id:
-                        dubbing_app.set_session_id(insta_id[:11])
-                except Exception:
-                    pass
-        else:
-            with st.spinner("📥 دانلود ویدیو از یوتیوب..."):
-                if not dubbing_app.download_youtube_video(url):
-                    results.append((url, "download_failed"))
-                    continue
+        if start_stage <= 0:
+            if 'instagram.com' in url:
+                with st.spinner("📥 دانلود ویدیو از اینستاگرام..."):
+                    if not dubbing_app.download_instagram_video(url):
+                        results.append((url, "download_failed"))
+                        continue
+                    # استخراج ID اینستاگرام برای نام‌گذاری
+                    try:
+                        insta_id = dubbing_app._extract_instagram_id(url)
+                        if insta_id:
+                            dubbing_app.set_session_id(insta_id[:11])
+                    except Exception:
+                        pass
+            else:
+                with st.spinner("📥 دانلود ویدیو از یوتیوب..."):
+                    if not dubbing_app.download_youtube_video(url):
+                        results.append((url, "download_failed"))
+                        continue
+            if manifest is not None:
+                manifest.record_stage(url, "download", {
+                    "video": dubbing_app.workspace.video_path, "audio": dubbing_app.workspace.audio_path
+                }, session_id=dubbing_app.session_id)
 
         # 2) استخراج متن
-        with st.spinner("🔍 استخراج متن..."):
-            if not dubbing_app.extract_audio_with_whisper():
-                results.append((url, "transcript_failed"))
-                continue
+        if start_stage <= 1:
+            with st.spinner("🔍 استخراج متن..."):
+                if not dubbing_app.extract_audio_with_whisper():
+                    results.append((url, "transcript_failed"))
+                    continue
+            if manifest is not None:
+                manifest.record_stage(url, "transcript", {"srt_en": dubbing_app._srt_en_path()},
+                                      session_id=dubbing_app.session_id)
 
         # 3) ترجمه
         # بررسی اینکه آیا باید از Azure استفاده کنیم
@@ -615,11 +649,15 @@ if st.button("🚀 شروع پردازش", type="primary", use_container_width=T
                 if current_sid:
                     dubbing_app.set_session_id(current_sid)
         
-        spinner_text = f"🌐 ترجمه زیرنویس با {provider_name}..."
-        with st.spinner(spinner_text):
-            if not dubbing_app.translate_subtitles(TARGET_LANGUAGE, provider=provider_name):
-                results.append((url, "translate_failed"))
-                continue
+        if start_stage <= 2:
+            spinner_text = f"🌐 ترجمه زیرنویس با {provider_name}..."
+            with st.spinner(spinner_text):
+                if not dubbing_app.translate_subtitles(TARGET_LANGUAGE, provider=provider_name):
+                    results.append((url, "translate_failed"))
+                    continue
+            if manifest is not None:
+                manifest.record_stage(url, "translate", {"srt_fa": dubbing_app._srt_fa_path()},
+                                      session_id=dubbing_app.session_id)
 
         # 4) ایجاد ویدیو با زیرنویس
         with st.spinner("🎬 ساخت ویدیو با زیرنویس..."):
@@ -685,6 +723,9 @@ if st.button("🚀 شروع پردازش", type="primary", use_container_width=T
                     use_container_width=True
                 )
             results.append((url, f"ok:{os.path.basename(out)}"))
+            if manifest is not None:
+                manifest.record_stage(url, "render", {"output": out}, session_id=dubbing_app.session_id)
+                manifest.record_result(url, True, f"ok:{os.path.basename(out)}")
 
             # 5) آپلود به وردپرس (اگر فعال باشد)
             if st.session_state.get('upload_to_wp', False):
@@ -12,6 +12,8 @@ import subprocess
 import random
 import string
 from pathlib import Path
+from whisper_models import preload_whisper_model
+from batch_manifest import BatchManifest
 from s3_uploader import S3Uploader
 from sheets_logger import GoogleSheetsLogger
 import google.generativeai as genai
@@ -167,14 +169,12 @@ def init_dubbing_app():
     else:
         # بروزرسانی تنظیمات در صورت تغییر
         instance = st.session_state.dubbing_instance
-        instance.api_key = gemini_key
+        # کلاینت‌های گوگل به کلید وابسته‌اند و با تغییر آن دوباره ساخته می‌شوند
+        if instance.api_key != gemini_key:
+            instance.set_api_key(gemini_key)
         instance.azure_endpoint = azure_endpoint
         instance.azure_api_key = azure_api_key
         instance.azure_model = azure_model
-        # اگر کلاینت گوگل نیاز به ریست دارد
-        if hasattr(instance, 'client') and instance.api_key != gemini_key:
-            from google import genai
-            instance.client = genai.Client(api_key=gemini_key)
             
     return st.session_state.dubbing_instance
 
@@ -183,6 +183,9 @@ dubbing_app = init_dubbing_app()
 if dubbing_app is None:
     st.stop()
 
+# بارگذاری مدل Whisper در پس‌زمینه (یک بار برای هر پردازه)
+preload_whisper_model()
+
 # فرم ورودی
 st.markdown('<div class="input-container">', unsafe_allow_html=True)
 st.markdown("### 🔗 لینک ویدیو یا فایل CSV")
@@ -192,6 +195,7 @@ youtube_url = st.text_input(
 )
 
 csv_file = st.file_uploader("یا فایل CSV شامل لیست لینک‌ها را آپلود کنید", type=["csv"])
+resume_batch = st.checkbox("♻️ ادامه پردازش قبلی همین فهرست (رد کردن لینک‌های تمام‌شده)", value=False)
 
 # تنظیمات قابل تغییر
 with st.expander("⚙️ تنظیمات هوش مصنوعی (API Keys)", expanded=True):
@@ -363,6 +367,9 @@ with st.expander("🌐 تنظیمات Object Storage", expanded=False):
 
 st.markdown('</div>', unsafe_allow_html=True)
 
+# مراحل ثبت‌شده در مانیفست batch
+BATCH_STAGES = ("download", "transcript", "translate", "render", "upload")
+
 # دکمه شروع پردازش
 if st.button("🚀 شروع پردازش و آپلود", type="primary", use_container_width=True):
     urls = []
@@ -403,27 +410,52 @@ if st.button("🚀 شروع پردازش و آپلود", type="primary", use_con
     total = len(urls)
     progress = st.progress(0)
 
+    # Only multi-link batches are resumable; a single link needs no manifest on disk
+    manifest = BatchManifest.for_urls(urls, fresh=not resume_batch) if len(urls) > 1 else None
+
     for idx, url in enumerate(urls, start=1):
         st.write(f"[{idx}/{total}] پردازش: {url}")
         progress.progress(min(int(idx / total * 100), 100))
 
+        # ادامه از مانیفست: رد کردن لینک‌های تمام‌شده و شروع از اولین مرحله ناتمام
+        start_stage = 0
+        if manifest is not None:
+            start_stage = manifest.resume_point(url, BATCH_STAGES)
+            if manifest.is_finished(url) or start_stage >= len(BATCH_STAGES):
+                st.info(f"⏭️ قبلاً انجام شده: {manifest.detail(url)}")
+                results.append((url, manifest.detail(url) or "ok:resumed"))
+                continue
+            if start_stage > 0:
+                if manifest.session_id(url):
+                    dubbing_app.set_session_id(manifest.session_id(url))
+                st.info(f"♻️ ادامه از مرحله: {BATCH_STAGES[start_stage]}")
+
         # 1) دانلود
-        if 'instagram.com' in url:
-            with st.spinner("📥 دانلود از اینستاگرام..."):
-                if not dubbing_app.download_instagram_video(url):
-                    results.append((url, "download_failed"))
-                    continue
-        else:
-            with st.spinner("📥 دانلود از یوتیوب..."):
-                if not dubbing_app.download_youtube_video(url):
-                    results.append((url, "download_failed"))
-                    continue
+        if start_stage <= 0:
+            if 'instagram.com' in url:
+                with st.spinner("📥 دانلود از اینستاگرام..."):
+                    if not dubbing_app.download_instagram_video(url):
+                        results.append((url, "download_failed"))
+                        continue
+            else:
+                with st.spinner("📥 دانلود از یوتیوب..."):
+                    if not dubbing_app.download_youtube_video(url):
+                        results.append((url, "download_failed"))
+                        continue
+            if manifest is not None:
+                manifest.record_stage(url, "download", {
+                    "video": dubbing_app.workspace.video_path, "audio": dubbing_app.workspace.audio_path
+                }, session_id=dubbing_app.session_id)
 
         # 2) استخراج متن
-        with st.spinner("🔍 استخراج متن..."):
-            if not dubbing_app.extract_audio_with_whisper():
-                results.append((url, "transcript_failed"))
-                continue
+        if start_stage <= 1:
+            with st.spinner("🔍 استخراج متن..."):
+                if not dubbing_app.extract_audio_with_whisper():
+                    results.append((url, "transcript_failed"))
+                    continue
+            if manifest is not None:
+                manifest.record_stage(url, "transcript", {"srt_en": dubbing_app._srt_en_path()},
+                                      session_id=dubbing_app.session_id)
 
         # 3) ترجمه
         provider_name = "Gemini"
@@ -434,57 +466,66 @@ if st.button("🚀 شروع پردازش و آپلود", type="primary", use_con
             dubbing_app.azure_api_key = st.session_state.get('azure_api_key')
             dubbing_app.azure_model = st.session_state.get('azure_model')
 
-        with st.spinner(f"🌐 ترجمه زیرنویس با {provider_name}..."):
-            # ارسال صریح پارامترها به متد ترجمه
-            if not dubbing_app.translate_subtitles(TARGET_LANGUAGE, provider=provider_name):
-                results.append((url, "translate_failed"))
-                continue
+        if start_stage <= 2:
+            with st.spinner(f"🌐 ترجمه زیرنویس با {provider_name}..."):
+                # ارسال صریح پارامترها به متد ترجمه
+                if not dubbing_app.translate_subtitles(TARGET_LANGUAGE, provider=provider_name):
+                    results.append((url, "translate_failed"))
+                    continue
+            if manifest is not None:
+                manifest.record_stage(url, "translate", {"srt_fa": dubbing_app._srt_fa_path()},
+                                      session_id=dubbing_app.session_id)
 
         # 4) ایجاد ویدیو
-        with st.spinner("🎬 ساخت ویدیو..."):
-            subtitle_config = create_subtitle_config(
-                font=subtitle_font,
-                fontsize=subtitle_fontsize,
-                color=subtitle_color,
-                bg_color=subtitle_bg,
-                outline_color=subtitle_outline_color,
-                outline_width=subtitle_outline_width,
-                position=subtitle_pos,
-                margin_v=subtitle_margin,
-                shadow=subtitle_shadow,
-                shadow_color=subtitle_shadow_color,
-                bold=subtitle_bold,
-                italic=subtitle_italic
-            )
+        if start_stage <= 3:
+            with st.spinner("🎬 ساخت ویدیو..."):
+                subtitle_config = create_subtitle_config(
+                    font=subtitle_font,
+                    fontsize=subtitle_fontsize,
+                    color=subtitle_color,
+                    bg_color=subtitle_bg,
+                    outline_color=subtitle_outline_color,
+                    outline_width=subtitle_outline_width,
+                    position=subtitle_pos,
+                    margin_v=subtitle_margin,
+                    shadow=subtitle_shadow,
+                    shadow_color=subtitle_shadow_color,
+                    bold=subtitle_bold,
+                    italic=subtitle_italic
+                )
             
-            fixed_text_config = create_fixed_text_config(
-                enabled=fixed_enabled,
-                text=fixed_text,
-                font=fixed_font,
-                fontsize=fixed_size,
-                position=fixed_pos,
-                color=fixed_color,
-                background_color="none" if fixed_color == "yellow" else DEFAULT_FIXED_BG_COLOR,
-                margin_bottom=fixed_margin,
-                opacity=fixed_opacity,
-                bold=fixed_bold,
-                italic=fixed_italic
-            )
-
-            # بررسی وجود و محتوای فایل زیرنویس قبل از استفاده
-            srt_fa = dubbing_app._srt_fa_path()
-            if not srt_fa.exists() or srt_fa.stat().st_size < 10:
-                st.error("❌ فایل زیرنویس ترجمه شده معتبر نیست یا خالی است.")
-                results.append((url, "subtitle_invalid"))
-                continue
+                fixed_text_config = create_fixed_text_config(
+                    enabled=fixed_enabled,
+                    text=fixed_text,
+                    font=fixed_font,
+                    fontsize=fixed_size,
+                    position=fixed_pos,
+                    color=fixed_color,
+                    background_color="none" if fixed_color == "yellow" else DEFAULT_FIXED_BG_COLOR,
+                    margin_bottom=fixed_margin,
+                    opacity=fixed_opacity,
+                    bold=fixed_bold,
+                    italic=fixed_italic
+                )
+
+                # بررسی وجود و محتوای فایل زیرنویس قبل از استفاده
+                srt_fa = dubbing_app._srt_fa_path()
+                if not srt_fa.exists() or srt_fa.stat().st_size < 10:
+                    st.error("❌ فایل زیرنویس ترجمه شده معتبر نیست یا خالی است.")
+                    results.append((url, "subtitle_invalid"))
+                    continue
 
-            out = dubbing_app.create_subtitled_video(
-                subtitle_config=subtitle_config,
-                fixed_text_config=fixed_text_config
-            )
-            if not out or not os.path.exists(out):
-                results.append((url, "video_failed"))
-                continue
+                out = dubbing_app.create_subtitled_video(
+                    subtitle_config=subtitle_config,
+                    fixed_text_config=fixed_text_config
+                )
+                if not out or not os.path.exists(out):
+                    results.append((url, "video_failed"))
+                    continue
+            if manifest is not None:
+                manifest.record_stage(url, "render", {"output": out}, session_id=dubbing_app.session_id)
+        else:
+            out = manifest.artifacts(url, "render")["output"]
 
         # 5) آپلود به Object Storage
         with st.spinner("📡 آپلود به Object Storage..."):
@@ -521,6 +562,9 @@ if st.button("🚀 شروع پردازش و آپلود", type="primary", use_con
                         st.warning(f"⚠️ خطا در ثبت گوگل شیت: {e}")
                 
                 results.append((url, f"ok:{s3_res['url']}"))
+                if manifest is not None:
+                    manifest.record_stage(url, "upload", session_id=dubbing_app.session_id)
+                    manifest.record_result(url, True, f"ok:{s3_res['url']}")
             else:
                 st.error("❌ خطا در آپلود به Storage")
                 results.append((url, "upload_failed"))
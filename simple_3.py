@@ -13,6 +13,7 @@ import random
 import string
 import shutil
 from pathlib import Path
+from whisper_models import preload_whisper_model
 
 # Import توابع از combine_video.py
 from combine_video import (
@@ -186,6 +187,9 @@ if dubbing_app is None:
 else:
     st.success("✅ اتصال به Google AI برقرار شد")
 
+# بارگذاری مدل Whisper در پس‌زمینه (یک بار برای هر پردازه)
+preload_whisper_model()
+
 # فرم ورودی
 st.markdown('<div class="input-container">', unsafe_allow_html=True)
 st.markdown("### 🔗 لینک ویدیو یوتیوب، اینستاگرام یا فایل CSV فهرست لینک‌ها")
@@ -12,6 +12,7 @@ import subprocess
 import random
 import string
 from pathlib import Path
+from whisper_models import preload_whisper_model
 
 # تنظیمات صفحه
 st.set_page_config(
@@ -143,6 +144,9 @@ if dubbing_app is None:
 else:
     st.success("✅ اتصال به Google AI برقرار شد")
 
+# بارگذاری مدل Whisper در پس‌زمینه (یک بار برای هر پردازه)
+preload_whisper_model()
+
 # فرم ورودی
 st.markdown('<div class="input-container">', unsafe_allow_html=True)
 st.markdown("### 🔗 لینک ویدیو یوتیوب، اینستاگرام یا فایل CSV فهرست لینک‌ها")
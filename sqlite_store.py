@@ -0,0 +1,55 @@
+"""
+ابزارهای مشترک پایگاه‌های داده SQLite
+Shared SQLite connection and process-wide singleton helpers
+
+``open_sqlite`` creates the parent directory, opens one connection that is
+shared between threads (callers serialize access with their own lock),
+switches it to WAL and applies the schema. ``SharedInstance`` builds an
+object (e.g. a store from config.py) once per process on first use and also
+remembers a ``None`` result, so a disabled feature is not re-read on every
+call. Used by ``job_store``, ``artifact_cache``, ``translation_memory`` and
+``quota_scheduler``.
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Generic, Optional, TypeVar, Union
+
+T = TypeVar("T")
+
+
+def open_sqlite(db_path: Union[str, Path], schema: str = "", **connect_kwargs) -> sqlite3.Connection:
+    """
+    اتصال WAL به فایل SQLite با ساخت جدول‌ها
+
+    Args:
+        schema: دستورات CREATE ... IF NOT EXISTS
+        connect_kwargs: آرگومان‌های اضافی sqlite3.connect (مثل isolation_level)
+    """
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), check_same_thread=False, **connect_kwargs)
+    conn.execute("PRAGMA journal_mode=WAL")
+    if schema:
+        conn.executescript(schema)
+    if conn.in_transaction:
+        conn.commit()
+    return conn
+
+
+class SharedInstance(Generic[T]):
+    """نمونه مشترک در سطح پردازه که در اولین استفاده ساخته می‌شود"""
+
+    def __init__(self, factory: Callable[[], Optional[T]]):
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[T]:
+        with self._lock:
+            if not self._loaded:
+                self._instance = self._factory()
+                self._loaded = True
+            return self._instance
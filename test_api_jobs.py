@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+تست endpoint های مدیریت کار در API ها
+Test job endpoints of api.py and api_simple.py with FastAPI's TestClient
+
+Job stores point at a temporary database and no pipeline stage runs: startup
+hooks are not triggered (no ``with TestClient``) and background work is
+captured instead of executed.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from job_store import JobStore
+
+
+def test_simple_tasks_list_includes_download_url():
+    """GET /tasks لینک دانلود task های تکمیل‌شده را مثل قبل برمی‌گرداند"""
+    print("🔍 تست /tasks در api_simple...")
+    import api_simple
+
+    with tempfile.TemporaryDirectory() as tmp:
+        original = api_simple.processing_tasks
+        api_simple.processing_tasks = JobStore(str(Path(tmp) / "tasks.db"))
+        try:
+            api_simple.processing_tasks.create("done", "processing", kind="youtube")
+            api_simple.processing_tasks.update("done", status="completed", progress=100,
+                                               result={"download_url": "/download/done"})
+            api_simple.processing_tasks.create("running", "processing", kind="youtube")
+
+            response = TestClient(api_simple.app).get("/tasks")
+            assert response.status_code == 200
+            tasks = {task["task_id"]: task for task in response.json()["tasks"]}
+            assert tasks["done"]["download_url"] == "/download/done"
+            assert tasks["running"]["download_url"] is None
+        finally:
+            api_simple.processing_tasks.close()
+            api_simple.processing_tasks = original
+    print("✅ لینک دانلود در لیست task ها موجود است")
+
+
+class FakeDubbingApp:
+    def __init__(self, api_key, youtube_api_key=None, workspace=None):
+        self.api_key = api_key
+        self.youtube_api_key = youtube_api_key
+        self.workspace = workspace
+        self.session_id = None
+
+    def set_session_id(self, session_id):
+        self.session_id = session_id
+
+
+def test_interrupted_job_resumes_with_caller_key():
+    """کار متوقف‌شده با POST /jobs/{id}/resume و کلید فراخواننده روی همان فضای کاری ادامه می‌یابد"""
+    print("🔍 تست ادامه کار در api.py...")
+    import api
+
+    submitted = []
+    original = (api.job_store, api.VideoDubbingApp, api.worker_pool.submit_job)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # job workspaces are created under ./dubbing_work
+        api.job_store = JobStore(str(Path(tmp) / "jobs.db"))
+        api.VideoDubbingApp = FakeDubbingApp
+        api.worker_pool.submit_job = lambda workflow, *args: submitted.append((workflow, args))
+        try:
+            api.job_store.create("yt-job", "processing", kind="youtube", request={
+                "api_key": "secret", "youtube_url": "https://youtu.be/abc", "session_id": "abc", "voice": "Kore",
+            })
+            api.job_store.create("done-job", "completed", kind="youtube", request={"youtube_url": "x"})
+            api.job_store.create("upload-job", "failed", kind="upload", request={"voice": "Fenrir"})
+            assert api.fail_interrupted_jobs() == 1
+            assert api.job_store.get("yt-job")["status"] == "failed"
+
+            client = TestClient(api.app)
+            assert client.post("/jobs/missing/resume", json={"api_key": "k"}).status_code == 404
+            assert client.post("/jobs/done-job/resume", json={"api_key": "k"}).status_code == 409
+            # The uploaded video is gone, so there is nothing to resume from
+            assert client.post("/jobs/upload-job/resume", json={"api_key": "k"}).status_code == 400
+
+            response = client.post("/jobs/yt-job/resume", json={"api_key": "new-key"})
+            assert response.status_code == 200 and response.json()["status"] == "resuming"
+            workflow, (job_id, dubbing_app, request_data) = submitted[-1]
+            assert workflow is api.process_youtube_workflow and job_id == "yt-job"
+            assert dubbing_app.api_key == "new-key" and dubbing_app.session_id == "abc"
+            assert dubbing_app.workspace.root == Path("dubbing_work") / "jobs" / "yt-job"
+            assert request_data["youtube_url"] == "https://youtu.be/abc" and request_data["voice"] == "Kore"
+
+            job = api.job_store.get("yt-job")
+            assert job["status"] == "pending" and job["attempts"] == 1
+            assert "api_key" not in job["request"]
+            # Already queued again
+            assert client.post("/jobs/yt-job/resume", json={"api_key": "new-key"}).status_code == 409
+        finally:
+            api.release_dubbing_app("yt-job")
+            api.job_store.close()
+            api.job_store, api.VideoDubbingApp, api.worker_pool.submit_job = original
+            os.chdir(cwd)
+    print("✅ کار نیمه‌کاره با کلید جدید ادامه یافت")
+
+
+def main():
+    print("🧪 تست endpoint های کار")
+    print("=" * 50)
+    test_simple_tasks_list_includes_download_url()
+    test_interrupted_job_resumes_with_caller_key()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
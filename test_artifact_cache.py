@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+تست کش آرتیفکت‌ها
+Test content-addressed artifact cache
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from artifact_cache import ArtifactCache, LINK_MIN_BYTES
+from config import DEFAULT_CONFIG
+
+
+def _write(path: Path, size: int, fill: bytes = b"x") -> Path:
+    path.write_bytes(fill * size)
+    return path
+
+
+def test_hit_and_miss():
+    """پارامترهای متفاوت کلید متفاوت دارند و خروجی یکسان بازیابی می‌شود"""
+    print("🔍 تست hit/miss کش...")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = ArtifactCache(tmp / "cache")
+        srt = tmp / "audio.srt"
+        srt.write_text("1\n00:00:00,000 --> 00:00:01,000\nhello\n", encoding="utf-8")
+
+        params = {"model": "base", "language": "en"}
+        assert cache.store("transcript", "youtube:abc", params, {"audio.srt": srt})
+
+        restored = tmp / "job" / "audio_abc.srt"
+        assert cache.fetch("transcript", "youtube:abc", params, {"audio.srt": restored})
+        assert restored.read_text(encoding="utf-8") == srt.read_text(encoding="utf-8")
+        # Small text artifacts are copied, never shared
+        assert not os.path.samefile(restored, srt)
+
+        assert not cache.fetch("transcript", "youtube:abc", {"model": "small"}, {"audio.srt": restored})
+        assert not cache.fetch("transcript", "youtube:other", params, {"audio.srt": restored})
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 2 and stats["entries"] == 1
+        assert stats["hit_rate"] == 0.333
+    print("✅ hit/miss درست کار می‌کند")
+
+
+def test_large_files_are_hard_linked_and_rewrite_is_detected():
+    """فایل‌های بزرگ hard-link می‌شوند و بازنویسی در جای خود ورودی را نامعتبر می‌کند"""
+    print("🔍 تست hard-link و تشخیص خرابی...")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = ArtifactCache(tmp / "cache")
+        video = _write(tmp / "input_video.mp4", LINK_MIN_BYTES)
+        assert cache.store("download", "youtube:abc", {}, {"input_video.mp4": video})
+
+        restored = tmp / "job" / "input_video.mp4"
+        assert cache.fetch("download", "youtube:abc", {}, {"input_video.mp4": restored})
+        assert os.path.samefile(restored, video)
+
+        # Rewriting the workspace file in place also rewrites the cached inode
+        with open(restored, "wb") as f:
+            f.write(b"y" * LINK_MIN_BYTES)
+        os.utime(restored, ns=(1, 1))
+        assert not cache.fetch("download", "youtube:abc", {}, {"input_video.mp4": tmp / "again.mp4"})
+        assert cache.stats()["entries"] == 0
+    print("✅ hard-link و تشخیص خرابی درست کار می‌کند")
+
+
+def test_lru_eviction_under_budget():
+    """با عبور از بودجه دیسک، ورودی‌ای که دیرتر استفاده شده حذف می‌شود"""
+    print("🔍 تست حذف LRU...")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = ArtifactCache(tmp / "cache", max_bytes=2500)
+        for name in ("a", "b"):
+            cache.store("render", f"youtube:{name}", {}, {"output.mp4": _write(tmp / f"{name}.mp4", 1000)})
+
+        # Touch "a" so that "b" becomes the least recently used entry
+        assert cache.fetch("render", "youtube:a", {}, {"output.mp4": tmp / "a_out.mp4"})
+        cache.store("render", "youtube:c", {}, {"output.mp4": _write(tmp / "c.mp4", 1000)})
+
+        assert cache.total_size() <= 2500
+        assert cache.fetch("render", "youtube:a", {}, {"output.mp4": tmp / "a_out.mp4"})
+        assert not cache.fetch("render", "youtube:b", {}, {"output.mp4": tmp / "b_out.mp4"})
+        assert cache.fetch("render", "youtube:c", {}, {"output.mp4": tmp / "c_out.mp4"})
+    print("✅ حذف LRU درست کار می‌کند")
+
+
+def test_top_level_flag_disables_sections():
+    """cache.enabled=False کش TTS را هم غیرفعال می‌کند"""
+    print("🔍 تست غیرفعال‌سازی سراسری کش...")
+    cache_config = DEFAULT_CONFIG["cache"]
+    original = cache_config["enabled"]
+    try:
+        cache_config["enabled"] = False
+        assert ArtifactCache.from_config() is None
+        assert ArtifactCache.from_config("tts") is None
+    finally:
+        cache_config["enabled"] = original
+    print("✅ کش TTS با پرچم سراسری غیرفعال می‌شود")
+
+
+def main():
+    print("🧪 تست کش آرتیفکت‌ها")
+    print("=" * 50)
+    test_hit_and_miss()
+    test_large_files_are_hard_linked_and_rewrite_is_detected()
+    test_lru_eviction_under_budget()
+    test_top_level_flag_disables_sections()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
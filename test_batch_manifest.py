@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+تست مانیفست قابل ادامه batch
+Test resumable batch manifest
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from batch_manifest import BatchManifest
+
+STAGES = ("download", "transcript", "translate", "render")
+URLS = ["https://youtu.be/aaaaaaaaaaa", "https://youtu.be/bbbbbbbbbbb"]
+
+
+def test_resume_point_after_restart():
+    """پس از راه‌اندازی مجدد، لینک تمام‌شده رد و لینک نیمه‌کاره از مرحله بعد ادامه می‌یابد"""
+    print("🔍 تست ادامه پس از راه‌اندازی مجدد...")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        srt = tmp / "audio_b.srt"
+        srt.write_text("1\n00:00:00,000 --> 00:00:01,000\nhi\n", encoding="utf-8")
+
+        manifest = BatchManifest.for_urls(URLS, base_dir=tmp)
+        for stage in STAGES:
+            manifest.record_stage(URLS[0], stage)
+        manifest.record_result(URLS[0], True, "ok:a.mp4")
+        manifest.record_stage(URLS[1], "download", session_id="bbbbbbbbbbb")
+        manifest.record_stage(URLS[1], "transcript", {"srt_en": srt})
+
+        reopened = BatchManifest.for_urls(URLS, base_dir=tmp)
+        assert reopened.is_finished(URLS[0])
+        assert reopened.detail(URLS[0]) == "ok:a.mp4"
+        assert not reopened.is_finished(URLS[1])
+        assert reopened.resume_point(URLS[1], STAGES) == 2
+        assert reopened.session_id(URLS[1]) == "bbbbbbbbbbb"
+        assert reopened.artifacts(URLS[1], "transcript") == {"srt_en": str(srt)}
+
+        # A fresh run archives the old manifest instead of resuming it
+        fresh = BatchManifest.for_urls(URLS, base_dir=tmp, fresh=True)
+        assert fresh.resume_point(URLS[1], STAGES) == 0
+        assert len(list(tmp.glob("manifest_*.jsonl"))) == 1
+    print("✅ ادامه پس از راه‌اندازی مجدد درست کار می‌کند")
+
+
+def test_fresh_runs_prune_old_archives():
+    """شروع‌های مکرر از ابتدا فقط چند بایگانی آخر را نگه می‌دارند"""
+    print("🔍 تست حذف بایگانی‌های قدیمی...")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for run in range(5):
+            manifest = BatchManifest.for_urls(URLS, base_dir=tmp, fresh=True, keep_archives=2)
+            manifest.record_result(URLS[0], True, f"ok:run{run}")
+        archives = sorted(tmp.glob(f"{manifest.path.stem}.*.jsonl"))
+        assert len(archives) == 2
+        # The newest archives (runs 2 and 3) survive; run 4 is the live manifest
+        assert sorted(BatchManifest(path).detail(URLS[0]) for path in archives) == ["ok:run2", "ok:run3"]
+        assert manifest.detail(URLS[0]) == "ok:run4"
+    print("✅ بایگانی‌های قدیمی حذف شدند")
+
+
+def test_torn_last_line_is_ignored():
+    """خط ناقص انتهای فایل (قطع برق/کرش) نادیده گرفته می‌شود"""
+    print("🔍 تست خط ناقص...")
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = BatchManifest.for_urls(URLS, base_dir=tmp)
+        manifest.record_stage(URLS[0], "download")
+        with open(manifest.path, "a", encoding="utf-8") as f:
+            f.write('{"event": "stage", "url": "https://you')
+
+        reopened = BatchManifest(manifest.path)
+        assert reopened.completed_stages(URLS[0]) == ["download"]
+        reopened.record_stage(URLS[0], "transcript")
+        assert BatchManifest(manifest.path).completed_stages(URLS[0]) == ["download", "transcript"]
+    print("✅ خط ناقص نادیده گرفته شد")
+
+
+def test_changed_artifact_restarts_stage():
+    """اگر آرتیفکت یک مرحله حذف یا بازنویسی شود، آن مرحله دوباره اجرا می‌شود"""
+    print("🔍 تست آرتیفکت تغییر‌یافته...")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        video = tmp / "input_video.mp4"
+        video.write_bytes(b"first")
+        manifest = BatchManifest.for_urls(URLS, base_dir=tmp)
+        manifest.record_stage(URLS[0], "download", {"video": video})
+        assert manifest.resume_point(URLS[0], STAGES) == 1
+
+        # Another URL reused the shared workspace file
+        video.write_bytes(b"second url")
+        assert manifest.resume_point(URLS[0], STAGES) == 0
+        os.remove(video)
+        assert manifest.resume_point(URLS[0], STAGES) == 0
+    print("✅ آرتیفکت تغییر‌یافته تشخیص داده شد")
+
+
+def main():
+    print("🧪 تست مانیفست batch")
+    print("=" * 50)
+    test_resume_point_after_restart()
+    test_fresh_runs_prune_old_archives()
+    test_torn_last_line_is_ignored()
+    test_changed_artifact_restarts_stage()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+تست اجرای خط لوله‌ای batch
+Test the pipelined batch runner with fake dubbing apps
+"""
+
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from batch_process_csv import PipelinedBatchRunner
+from job_workspace import JobWorkspace
+
+STAGE_SECONDS = 0.05
+
+
+class Tracker:
+    """ثبت بازه اجرای هر مرحله هر URL"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []  # (url, stage, start, end)
+
+    def run(self, url, stage, result=True):
+        start = time.time()
+        time.sleep(STAGE_SECONDS)
+        with self.lock:
+            self.events.append((url, stage, start, time.time()))
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def spans(self):
+        spans = {}
+        for url, _, start, end in self.events:
+            first, last = spans.get(url, (start, end))
+            spans[url] = (min(first, start), max(last, end))
+        return spans
+
+
+class FakeApp:
+    def __init__(self, tracker, workspace, failures):
+        self.tracker = tracker
+        self.workspace = workspace
+        self.failures = failures
+        self.session_id = None
+        self.url = None
+
+    def set_session_id(self, session_id):
+        self.session_id = session_id
+
+    def download_youtube_video(self, url):
+        self.url = url
+        self.workspace.video_path.write_bytes(b"video")
+        self.workspace.audio_path.write_bytes(b"audio")
+        return self.tracker.run(url, "download")
+
+    def extract_audio_with_whisper(self):
+        return self.tracker.run(self.url, "transcript")
+
+    def translate_subtitles(self, target_language):
+        return self.tracker.run(self.url, "translate", self.failures.get(self.url, True))
+
+    def create_subtitled_video(self):
+        output = self.workspace.output_video_path(self.url.rsplit("/", 1)[-1])
+        output.write_bytes(b"rendered")
+        self.tracker.run(self.url, "render")
+        return str(output)
+
+
+def make_runner(tmp, tracker, failures=None, max_in_flight=0, keep_intermediates=False):
+    def app_factory(job_name):
+        return FakeApp(tracker, JobWorkspace.for_job(job_name, base_dir=tmp), failures or {})
+
+    concurrency = {"download": 2, "transcript": 1, "translate": 2, "render": 1}
+    return PipelinedBatchRunner(app_factory, "whisper", "Persian (FA)", concurrency,
+                                max_in_flight, keep_intermediates=keep_intermediates)
+
+
+def test_stages_overlap_and_results_keep_input_order():
+    """دانلود URL بعدی با مراحل URL قبلی هم‌پوشانی دارد و نتایج به ترتیب ورودی‌اند"""
+    print("🔍 تست هم‌پوشانی مراحل...")
+    tracker = Tracker()
+    urls = [f"https://youtu.be/v{i}" for i in range(5)]
+    with tempfile.TemporaryDirectory() as tmp:
+        finished_order = []
+        jobs = make_runner(tmp, tracker).run(urls, lambda job, done: finished_order.append(job.index))
+    assert [job.url for job in jobs] == urls
+    assert all(job.ok for job in jobs)
+    assert sorted(finished_order) == [1, 2, 3, 4, 5]
+
+    downloads = [(start, end) for url, stage, start, end in tracker.events if stage == "download"]
+    later_stages = [(start, end) for url, stage, start, end in tracker.events if stage != "download"]
+    assert any(d_start < o_end and o_start < d_end
+               for d_start, d_end in downloads for o_start, o_end in later_stages)
+    print("✅ مراحل هم‌پوشانی دارند")
+
+
+def test_max_in_flight_and_start_time():
+    """بیش از max_in_flight URL هم‌زمان پذیرفته نمی‌شود و زمان صف در مدت کار شمرده نمی‌شود"""
+    print("🔍 تست محدودیت URL های هم‌زمان...")
+    tracker = Tracker()
+    urls = [f"https://youtu.be/v{i}" for i in range(6)]
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = make_runner(tmp, tracker, max_in_flight=2).run(urls)
+    spans = tracker.spans()
+    for url, (start, _) in spans.items():
+        overlapping = sum(1 for other_start, other_end in spans.values() if other_start <= start < other_end)
+        assert overlapping <= 2, (url, overlapping)
+
+    for job in jobs:
+        first_stage_start = spans[job.url][0]
+        # started_at is taken right before the first stage, not when the job was queued
+        assert 0 <= first_stage_start - job.started_at < STAGE_SECONDS
+    assert jobs[-1].started_at >= spans[jobs[0].url][1] - STAGE_SECONDS
+    print("✅ محدودیت هم‌زمانی رعایت شد")
+
+
+def test_failing_url_does_not_stop_others_and_workspaces_are_pruned():
+    """شکست یک URL بقیه را متوقف نمی‌کند؛ فضای کاری URL موفق فقط ویدیو نهایی را نگه می‌دارد"""
+    print("🔍 تست شکست یک URL...")
+    tracker = Tracker()
+    urls = [f"https://youtu.be/v{i}" for i in range(4)]
+    failures = {urls[1]: RuntimeError("quota"), urls[2]: False}
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = make_runner(tmp, tracker, failures).run(urls)
+        assert [job.ok for job in jobs] == [True, False, False, True]
+        assert jobs[1].detail.startswith("exception:quota")
+        assert jobs[2].detail == "translate_failed"
+        assert "render" not in jobs[1].timings and "render" in jobs[3].timings
+
+        def files(job_name):
+            return sorted(path.name for path in (Path(tmp) / "jobs" / job_name).rglob("*") if path.is_file())
+
+        assert files("batch_1") == ["dubbed_video__v0_fa.mp4"]
+        # Failed URLs keep their media for a resumed run
+        assert {"input_video.mp4", "audio.wav"} <= set(files("batch_2"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_runner(tmp, Tracker(), keep_intermediates=True).run(urls[:1])
+        assert (Path(tmp) / "jobs" / "batch_1" / "input_video.mp4").exists()
+    print("✅ URL های دیگر ادامه یافتند")
+
+
+def main():
+    print("🧪 تست batch خط لوله‌ای")
+    print("=" * 50)
+    test_stages_overlap_and_results_keep_input_order()
+    test_max_in_flight_and_start_time()
+    test_failing_url_does_not_stop_others_and_workspaces_are_pruned()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
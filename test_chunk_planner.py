@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+تست برنامه‌ریز تکه‌بندی ترجمه
+Test token-budget chunk planner
+"""
+
+from chunk_planner import ChunkPlanner, is_throttle_error, is_timeout_error
+
+ENTRIES = [(str(i), "00:00:00,000", "00:00:01,000", "x" * 90) for i in range(1, 21)]  # 30 tokens each
+
+
+def test_plan_fills_token_budget():
+    """تکه‌ها تا سقف بودجه توکن و حداکثر تعداد زیرنویس پر می‌شوند"""
+    print("🔍 تست پر کردن بودجه...")
+    planner = ChunkPlanner(tokens_per_request=380, min_tokens=100, max_tokens=2000, max_items=40)
+    chunks = planner.plan(ENTRIES, "json")  # 38 tokens per cue with overhead
+    assert [len(chunk) for chunk in chunks] == [10, 10]
+    assert [cue for chunk in chunks for cue in chunk] == ENTRIES
+
+    assert [len(chunk) for chunk in planner.plan(ENTRIES, "json", max_items=8)] == [8, 8, 4]
+    # A single oversized cue still gets its own chunk
+    assert len(planner.plan([("1", "", "", "y" * 3000)], "json")) == 1
+    print("✅ بودجه توکن رعایت شد")
+
+
+def test_budget_adapts_to_throttling_and_latency():
+    """محدودیت نرخ و timeout بودجه را نصف و پاسخ سریع آن را بزرگ می‌کند؛ خطاهای دیگر اثری ندارند"""
+    print("🔍 تست تطبیق بودجه...")
+    planner = ChunkPlanner(tokens_per_request=1000, min_tokens=300, max_tokens=1200,
+                           target_latency_seconds=10, growth=1.5)
+    planner.record(2.0, ok=False, throttled=True)
+    assert planner.budget == 500
+    planner.record(2.0, ok=False)
+    assert planner.budget == 500  # a malformed reply or 5xx says nothing about size
+    planner.record(60.0, ok=False, timed_out=True)
+    assert planner.budget == 300  # clamped at min_tokens
+    planner.record(30.0, ok=True)
+    assert planner.budget == 300  # slow success does not grow
+    for _ in range(4):
+        planner.record(2.0, ok=True)
+    assert planner.budget == 1200  # clamped at max_tokens
+    assert planner.stats() == {"budget_tokens": 1200, "requests": 8, "failures": 3, "throttled": 1}
+
+    assert is_throttle_error(Exception("429 Resource has been exhausted (e.g. check quota)."))
+    assert not is_throttle_error(Exception("400 Invalid argument"))
+    assert is_timeout_error(TimeoutError()) and is_timeout_error(Exception("504 Deadline Exceeded"))
+    assert not is_timeout_error(Exception("500 Internal error"))
+    print("✅ بودجه با شرایط سرویس تطبیق یافت")
+
+
+def test_stream_applies_budget_changes_mid_plan():
+    """تکه‌های بعدی با بودجه جدید بریده می‌شوند (نه فقط در کارهای بعدی)"""
+    print("🔍 تست تکه‌بندی تنبل...")
+    planner = ChunkPlanner(tokens_per_request=380, min_tokens=100, max_tokens=2000, max_items=40)
+    stream = planner.stream(ENTRIES, "json")
+    number, first = stream.next()
+    assert number == 1 and len(first) == 10
+    planner.record(2.0, ok=False, throttled=True)  # budget 380 -> 190
+    assert [len(stream.next()[1]) for _ in range(2)] == [5, 5]
+    assert stream.next() is None and stream.taken == 3
+    print("✅ بودجه جدید روی باقی تکه‌ها اعمال شد")
+
+
+def main():
+    print("🧪 تست برنامه‌ریز تکه‌بندی")
+    print("=" * 50)
+    test_plan_fills_token_budget()
+    test_budget_adapts_to_throttling_and_latency()
+    test_stream_applies_budget_changes_mid_plan()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
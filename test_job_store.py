@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+تست ذخیره‌سازی پایدار کارها
+Test SQLite-backed job store
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+from job_store import JobStore
+
+
+def test_persistence_across_instances():
+    """وضعیت کار باید پس از باز کردن دوباره پایگاه داده باقی بماند"""
+    print("🔍 تست پایداری پس از راه‌اندازی مجدد...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "jobs.db"
+        store = JobStore(str(db_path))
+        store.create("job-1", "pending", "uploaded", "در انتظار", kind="upload",
+                     request={"api_key": "k", "voice": "Fenrir"})
+        store.update("job-1", status="processing", progress=40, current_step="translating")
+        store.close()
+
+        reopened = JobStore(str(db_path))
+        job = reopened.get("job-1")
+        assert job["status"] == "processing"
+        assert job["progress"] == 40
+        assert job["request"]["voice"] == "Fenrir"
+        assert [j["job_id"] for j in reopened.interrupted_jobs()] == ["job-1"]
+        reopened.close()
+    print("✅ وضعیت کار پایدار است")
+
+
+def test_pagination_and_filter():
+    """لیست کارها باید صفحه‌بندی و فیلتر شود"""
+    print("🔍 تست صفحه‌بندی و فیلتر...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(str(Path(tmp) / "jobs.db"))
+        for i in range(7):
+            store.create(f"job-{i}", "completed" if i % 2 else "failed")
+
+        page, total = store.list(limit=3, offset=0)
+        assert total == 7 and len(page) == 3
+        page2, _ = store.list(limit=3, offset=3)
+        assert not {j["job_id"] for j in page} & {j["job_id"] for j in page2}
+
+        completed, completed_total = store.list(status="completed")
+        assert completed_total == 3
+        assert all(j["status"] == "completed" for j in completed)
+        assert store.count_by_status() == {"completed": 3, "failed": 4}
+
+        # Listings carry the result (api_simple's /tasks reads download_url from it)
+        store.update("job-1", result={"download_url": "/download/job-1"})
+        listed = {j["job_id"]: j for j in store.list(limit=10)[0]}
+        assert listed["job-1"]["result"] == {"download_url": "/download/job-1"}
+        assert listed["job-0"]["result"] is None
+        store.close()
+    print("✅ صفحه‌بندی و فیلتر درست کار می‌کند")
+
+
+def test_ttl_eviction_keeps_active_jobs():
+    """فقط کارهای تمام‌شده قدیمی حذف می‌شوند"""
+    print("🔍 تست حذف کارهای منقضی...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(str(Path(tmp) / "jobs.db"))
+        store.create("done", "pending")
+        store.update("done", status="completed", result={"output_path": "x.mp4"})
+        store.create("running", "processing")
+        time.sleep(0.05)
+
+        evicted = store.evict_finished(ttl_seconds=0.01)
+        assert evicted == ["done"]
+        assert store.get("done") is None
+        assert "running" in store
+        store.close()
+    print("✅ حذف کارهای منقضی درست کار می‌کند")
+
+
+def test_api_keys_are_never_persisted():
+    """کلیدهای API در پایگاه داده ذخیره نمی‌شوند (و رکوردهای قدیمی پاک می‌شوند)"""
+    print("🔍 تست عدم ذخیره کلیدهای API...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "jobs.db"
+        store = JobStore(str(db_path))
+        store.create("job-1", "pending", request={"api_key": "secret-1", "youtube_api_key": "secret-2",
+                                                  "voice": "Fenrir"})
+        # A row written by an older version that still holds the key
+        store._conn.execute("INSERT INTO jobs (job_id, status, request, created_at, updated_at) "
+                            "VALUES ('old', 'completed', '{\"api_key\": \"secret-3\"}', 0, 0)")
+        store._conn.commit()
+        assert store.get("job-1")["request"] == {"voice": "Fenrir"}
+        store.close()
+
+        reopened = JobStore(str(db_path))
+        assert reopened.get("old")["request"] == {}
+        reopened.close()
+        assert b"secret-" not in db_path.read_bytes()
+    print("✅ کلیدهای API ذخیره نمی‌شوند")
+
+
+def main():
+    print("🧪 تست ذخیره‌سازی کارها")
+    print("=" * 50)
+    test_persistence_across_instances()
+    test_pagination_and_filter()
+    test_ttl_eviction_keeps_active_jobs()
+    test_api_keys_are_never_persisted()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+تست فضای کاری ایزوله کارها
+Test job-scoped workspaces
+"""
+
+import tempfile
+from pathlib import Path
+
+from job_workspace import JobWorkspace
+
+
+def test_isolated_paths():
+    """دو کار هم‌زمان نباید مسیر مشترکی داشته باشند"""
+    print("🔍 تست ایزوله بودن مسیرها...")
+    with tempfile.TemporaryDirectory() as base:
+        a = JobWorkspace.for_job("job-a", base_dir=base)
+        b = JobWorkspace.for_job("job-b", base_dir=base)
+
+        assert a.root != b.root
+        assert a.video_path != b.video_path
+        assert a.audio_path != b.audio_path
+        assert a.segment_path(1) != b.segment_path(1)
+        assert a.srt_fa_path("abc") != b.srt_fa_path("abc")
+        assert a.segments_dir.is_dir() and b.segments_dir.is_dir()
+        assert a.root == Path(base) / "jobs" / "job-a"
+    print("✅ مسیرها ایزوله هستند")
+
+
+def test_shared_layout_is_legacy():
+    """فضای کاری مشترک باید همان نام‌های قدیمی را تولید کند"""
+    print("🔍 تست سازگاری با ساختار قدیمی...")
+    with tempfile.TemporaryDirectory() as base:
+        ws = JobWorkspace.shared(base)
+        assert ws.video_path == Path(base) / "input_video.mp4"
+        assert ws.audio_path == Path(base) / "audio.wav"
+        assert ws.srt_en_path() == Path(base) / "audio.srt"
+        assert ws.srt_fa_path("xyz") == Path(base) / "audio_xyz_fa.srt"
+        assert ws.output_video_path("xyz") == Path(base) / "dubbed_video__xyz_fa.mp4"
+        assert ws.segment_path(3) == Path(base) / "dubbed_segments" / "dub_3.wav"
+    print("✅ ساختار قدیمی حفظ شده است")
+
+
+def test_remove_only_job_workspace():
+    """حذف فقط برای فضای کاری ایزوله انجام می‌شود"""
+    print("🔍 تست حذف فضای کاری...")
+    with tempfile.TemporaryDirectory() as base:
+        shared = JobWorkspace.shared(base)
+        job = JobWorkspace.for_job("../../evil", base_dir=base)
+        assert job.root.parent == Path(base) / "jobs"
+
+        job.video_path.write_bytes(b"x")
+        job.remove()
+        assert not job.root.exists()
+
+        shared.remove()
+        assert shared.root.exists()
+    print("✅ حذف فضای کاری درست کار می‌کند")
+
+
+def main():
+    print("🧪 تست فضای کاری کارها")
+    print("=" * 50)
+    test_isolated_paths()
+    test_shared_layout_is_legacy()
+    test_remove_only_job_workspace()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+تست کلاینت‌های ماندگار ترجمه
+Test long-lived translation provider clients
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from chunk_planner import is_throttle_error, is_timeout_error
+from provider_clients import AzureChatClient, GeminiTextClient, ProviderHTTPError
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+
+    def generate_content(self, prompt, generation_config=None):
+        self.calls.append(generation_config)
+        return FakeResponse(f" {self.name}:{prompt} ")
+
+
+class FakeSession:
+    def __init__(self):
+        self.posts = []
+        self.closed = False
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        self.posts.append((url, headers, json, timeout))
+        return "response"
+
+    def close(self):
+        self.closed = True
+
+
+def test_gemini_models_are_built_once():
+    """هر مدل Gemini فقط یک بار ساخته می‌شود حتی با درخواست‌های هم‌زمان"""
+    print("🔍 تست ساخت یک‌باره مدل...")
+    built = []
+    lock = threading.Lock()
+
+    def factory(name):
+        with lock:
+            built.append(name)
+        return FakeModel(name)
+
+    client = GeminiTextClient(model_factory=factory)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda i: client.generate("flash", f"p{i}"), range(20)))
+    assert results[3] == "flash:p3"
+    client.generate("lite", "x", json_mode=True)
+    assert sorted(built) == ["flash", "lite"]
+    assert client.model("lite").calls == [{"response_mime_type": "application/json"}]
+    print("✅ مدل‌ها دوباره‌سازی نمی‌شوند")
+
+
+def test_gemini_models_use_their_own_client():
+    """هر instance با client کلید خودش کار می‌کند (نه genai.configure سراسری)"""
+    print("🔍 تست جدا بودن کلید Gemini...")
+    client_a, client_b = object(), object()
+    gemini_a = GeminiTextClient(client=client_a)
+    gemini_b = GeminiTextClient(client=client_b)
+    assert gemini_a.model("flash")._client is client_a
+    assert gemini_b.model("flash")._client is client_b
+    assert gemini_a.model("flash") is gemini_a.model("flash")
+    try:
+        GeminiTextClient()
+        raise AssertionError("ValueError expected")
+    except ValueError:
+        pass
+    print("✅ هر کار کلید خودش را دارد")
+
+
+def test_azure_reuses_one_session():
+    """همه درخواست‌های Azure از یک Session مشترک استفاده می‌کنند"""
+    print("🔍 تست Session مشترک Azure...")
+    sessions = []
+
+    def factory(pool_size):
+        assert pool_size == 6
+        sessions.append(FakeSession())
+        return sessions[-1]
+
+    client = AzureChatClient(pool_size=6, session_factory=factory)
+    for _ in range(3):
+        client.chat("https://example.azure.com/", "key", "gpt", [{"role": "user", "content": "hi"}])
+    assert len(sessions) == 1 and len(sessions[0].posts) == 3
+    url, headers, data, timeout = sessions[0].posts[0]
+    assert url == "https://example.azure.com/openai/v1/chat/completions"
+    assert headers["api-key"] == "key" and data["model"] == "gpt" and data["max_tokens"] == 4000
+
+    client.close()
+    assert sessions[0].closed
+    print("✅ Session مشترک استفاده شد")
+
+
+def test_http_error_carries_status():
+    """خطای HTTP وضعیت را نگه می‌دارد تا 429 و timeout تشخیص داده شوند"""
+    print("🔍 تست وضعیت خطای HTTP...")
+    assert is_throttle_error(ProviderHTTPError(429, "Too Many Requests"))
+    assert is_timeout_error(ProviderHTTPError(504, "Gateway"))
+    assert not is_throttle_error(ProviderHTTPError(500, "Internal"))
+    assert not is_timeout_error(ProviderHTTPError(400, "Bad Request"))
+    print("✅ وضعیت HTTP در خطا حفظ شد")
+
+
+def main():
+    print("🧪 تست کلاینت‌های ترجمه")
+    print("=" * 50)
+    test_gemini_models_are_built_once()
+    test_gemini_models_use_their_own_client()
+    test_azure_reuses_one_session()
+    test_http_error_carries_status()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
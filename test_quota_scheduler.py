@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+تست زمان‌بند سهمیه
+Test token-bucket quota scheduler
+"""
+
+import os
+import tempfile
+
+from quota_scheduler import DailyQuotaStore, QuotaExceededError, QuotaScheduler, parse_retry_delay
+
+NOON_UTC = 1_700_000_000 - 1_700_000_000 % 86400 + 12 * 3600
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_requests_run_immediately_within_quota():
+    """تا وقتی سهمیه هست هیچ انتظاری نیست و پس از آن با نرخ پر شدن سطل پیش می‌رود"""
+    print("🔍 تست مصرف سهمیه...")
+    fake = FakeTime()
+    scheduler = QuotaScheduler(per_minute=3, per_day=100, clock=fake.clock, sleep=fake.sleep)
+    for _ in range(3):
+        assert scheduler.acquire() == 0
+    waited = scheduler.acquire()
+    assert abs(waited - 20.0) < 1e-6  # one token per 20s at 3/min
+    assert scheduler.stats()["requests"] == 4
+    print("✅ سهمیه دقیقه‌ای رعایت شد")
+
+
+def test_daily_quota_raises_when_wait_is_too_long():
+    """اتمام سهمیه روزانه به جای انتظار چندساعته خطا می‌دهد"""
+    print("🔍 تست سهمیه روزانه...")
+    fake = FakeTime()
+    scheduler = QuotaScheduler(per_minute=60, per_day=2, max_wait_seconds=600,
+                               clock=fake.clock, sleep=fake.sleep, wall_clock=lambda: NOON_UTC)
+    scheduler.acquire()
+    scheduler.acquire()
+    try:
+        scheduler.acquire()
+        raise AssertionError("QuotaExceededError expected")
+    except QuotaExceededError:
+        pass
+    assert fake.sleeps == []
+    print("✅ سهمیه روزانه اعمال شد")
+
+
+def test_daily_quota_survives_restart():
+    """مصرف روزانه در SQLite ذخیره می‌شود و فقط با شروع روز UTC بعدی آزاد می‌شود"""
+    print("🔍 تست سهمیه روزانه پایدار...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "quota.db")
+        wall = [NOON_UTC]
+
+        def scheduler_for(store, key_hash="key-a"):
+            fake = FakeTime()
+            return QuotaScheduler(per_minute=60, per_day=2, max_wait_seconds=600, daily_store=store,
+                                  service="tts", key_hash=key_hash,
+                                  clock=fake.clock, sleep=fake.sleep, wall_clock=lambda: wall[0])
+
+        store = DailyQuotaStore(db_path)
+        scheduler_for(store).acquire()
+        store.close()
+
+        # A restarted process sees the request already spent today
+        store = DailyQuotaStore(db_path)
+        restarted = scheduler_for(store)
+        assert restarted.daily_used() == 1
+        restarted.acquire()
+        try:
+            scheduler_for(store).acquire()
+            raise AssertionError("QuotaExceededError expected")
+        except QuotaExceededError:
+            pass
+        # Other keys have their own budget
+        assert scheduler_for(store, "key-b").acquire() == 0
+
+        # Waiting across UTC midnight frees the budget
+        wall[0] = NOON_UTC + 12 * 3600 - 60
+        fake = FakeTime()
+        scheduler = QuotaScheduler(per_minute=60, per_day=2, max_wait_seconds=600, daily_store=store,
+                                   service="tts", key_hash="key-a", clock=fake.clock,
+                                   sleep=lambda s: (fake.sleep(s), wall.__setitem__(0, wall[0] + s)),
+                                   wall_clock=lambda: wall[0])
+        assert abs(scheduler.acquire() - 60) < 1e-6
+        assert scheduler.daily_used() == 1
+        store.close()
+    print("✅ سهمیه روزانه پس از راه‌اندازی دوباره حفظ شد")
+
+
+def test_backoff_only_after_429():
+    """فقط پس از 429 عقب‌نشینی می‌شود؛ retryDelay سرور رعایت و در غیر این صورت دو برابر می‌شود"""
+    print("🔍 تست عقب‌نشینی...")
+    fake = FakeTime()
+    scheduler = QuotaScheduler(per_minute=1000, base_backoff_seconds=10, max_backoff_seconds=25,
+                               clock=fake.clock, sleep=fake.sleep)
+    assert scheduler.acquire() == 0
+    assert scheduler.report_throttled() == 10
+    assert scheduler.report_throttled() == 20
+    assert scheduler.report_throttled() == 25  # capped
+    assert scheduler.acquire() >= 25
+    scheduler.report_success()
+    assert scheduler.report_throttled(retry_after=7) == 7
+
+    error = "429 RESOURCE_EXHAUSTED ... 'retryDelay': '17s'"
+    assert parse_retry_delay(error) == 17.0
+    assert parse_retry_delay("500 internal") is None
+    print("✅ عقب‌نشینی درست کار می‌کند")
+
+
+def main():
+    print("🧪 تست زمان‌بند سهمیه")
+    print("=" * 50)
+    test_requests_run_immediately_within_quota()
+    test_daily_quota_raises_when_wait_is_too_long()
+    test_daily_quota_survives_restart()
+    test_backoff_only_after_429()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
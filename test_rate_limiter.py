@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+تست محدودکننده نرخ درخواست‌ها
+Test requests/tokens-per-minute rate limiter
+"""
+
+import os
+import tempfile
+
+import quota_scheduler
+import rate_limiter
+from config import get_config
+from quota_scheduler import DailyQuotaStore, QuotaExceededError
+from rate_limiter import RateLimiter, estimate_tokens, get_rate_limiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_requests_per_minute():
+    """درخواست‌های بیش از سقف دقیقه‌ای تا باز شدن پنجره منتظر می‌مانند"""
+    print("🔍 تست سقف درخواست در دقیقه...")
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=3, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        assert limiter.acquire() == 0
+    assert clock.now == 0
+
+    limiter.acquire()
+    assert abs(clock.now - 60.0) < 1e-6
+    print("✅ سقف درخواست در دقیقه رعایت شد")
+
+
+def test_tokens_per_minute():
+    """توکن‌های مصرفی پنجره ۶۰ ثانیه‌ای از سقف عبور نمی‌کنند"""
+    print("🔍 تست سقف توکن در دقیقه...")
+    clock = FakeClock()
+    limiter = RateLimiter(tokens_per_minute=1000, clock=clock, sleep=clock.sleep)
+    limiter.acquire(600)
+    clock.now = 10.0
+    limiter.acquire(300)
+    assert clock.now == 10.0
+
+    # 600 + 300 + 400 > 1000: waits until the first 600 leave the window
+    limiter.acquire(400)
+    assert abs(clock.now - 60.0) < 1e-6
+
+    # A single request above the budget still runs on an empty window
+    clock.now = 500.0
+    limiter.acquire(5000)
+    assert clock.now == 500.0
+    print("✅ سقف توکن در دقیقه رعایت شد")
+
+
+def test_daily_cap_is_persisted_per_key():
+    """سقف روزانه هر کلید در DailyQuotaStore شمرده می‌شود و پس از اتمام، خطای سهمیه برمی‌گرداند"""
+    print("🔍 تست سقف روزانه...")
+    clock = FakeClock()
+    wall = [1_700_000_000.0]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "quota.db")
+
+        def make_limiter(key_hash):
+            return RateLimiter(requests_per_day=2, daily_store=DailyQuotaStore(db_path),
+                               service="translation:Gemini", key_hash=key_hash,
+                               clock=clock, sleep=clock.sleep, wall_clock=lambda: wall[0])
+
+        limiter = make_limiter("key-a")
+        limiter.acquire()
+        # A restarted process sees the usage of the first one
+        limiter = make_limiter("key-a")
+        limiter.acquire()
+        try:
+            limiter.acquire()
+            raise AssertionError("daily cap not enforced")
+        except QuotaExceededError:
+            pass
+        # Another key has its own budget
+        make_limiter("key-b").acquire()
+        # The next UTC day starts fresh
+        wall[0] += 86400
+        limiter.acquire()
+    print("✅ سقف روزانه رعایت شد")
+
+
+def test_limiters_are_shared_per_api_key():
+    """هر کلید API محدودکننده خودش را دارد و کارهای هم‌کلید آن را به اشتراک می‌گذارند"""
+    print("🔍 تست محدودکننده هر کلید...")
+    rate_limiter._limiters.clear()
+    cwd = os.getcwd()
+    tmp = tempfile.TemporaryDirectory()
+    os.chdir(tmp.name)  # the daily store is opened under ./dubbing_work
+    try:
+        first = get_rate_limiter("Gemini", "key-a")
+        assert get_rate_limiter("Gemini", "key-a") is first
+        assert get_rate_limiter("Gemini", "key-b") is not first
+        assert get_rate_limiter("Azure", "key-a") is not first
+        limits = get_config()["translation"]["rate_limits"]["Gemini"]
+        assert first.requests_per_minute == limits["requests_per_minute"]
+        assert first.requests_per_day == limits.get("requests_per_day")
+    finally:
+        rate_limiter._limiters.clear()
+        for store in quota_scheduler._daily_stores.values():
+            store.close()
+        quota_scheduler._daily_stores.clear()
+        os.chdir(cwd)
+        tmp.cleanup()
+    print("✅ هر کلید محدودکننده جدا دارد")
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("a" * 30) == 10
+
+
+def main():
+    print("🧪 تست محدودکننده نرخ")
+    print("=" * 50)
+    test_requests_per_minute()
+    test_tokens_per_minute()
+    test_daily_cap_is_persisted_per_key()
+    test_limiters_are_shared_per_api_key()
+    test_estimate_tokens()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+تست ابزارهای مشترک SQLite
+Test shared SQLite connection and singleton helpers
+"""
+
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlite_store import SharedInstance, open_sqlite
+
+
+def test_open_sqlite_creates_wal_database():
+    """پوشه والد ساخته می‌شود، حالت WAL فعال است و جدول‌ها ایجاد می‌شوند"""
+    print("🔍 تست اتصال SQLite...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "nested", "store.db")
+        conn = open_sqlite(db_path, "CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY);")
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.execute("INSERT INTO items (id) VALUES (1)")
+        conn.commit()
+        conn.close()
+
+        reopened = open_sqlite(db_path, "CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY);")
+        assert reopened.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+        reopened.close()
+    print("✅ پایگاه داده درست ساخته شد")
+
+
+def test_shared_instance_is_built_once():
+    """نمونه مشترک فقط یک بار ساخته می‌شود، حتی اگر نتیجه None باشد"""
+    print("🔍 تست نمونه مشترک...")
+    built = []
+
+    def factory():
+        built.append(1)
+        return None
+
+    shared = SharedInstance(factory)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: shared.get(), range(32)))
+    assert results == [None] * 32
+    assert len(built) == 1
+
+    counter = SharedInstance(lambda: object())
+    assert counter.get() is counter.get()
+    print("✅ نمونه مشترک یک بار ساخته شد")
+
+
+def main():
+    print("🧪 تست ابزارهای SQLite")
+    print("=" * 50)
+    test_open_sqlite_creates_wal_database()
+    test_shared_instance_is_built_once()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
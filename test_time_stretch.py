@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+تست تغییر سرعت در حافظه
+Test in-process WSOLA time-stretch
+"""
+
+import math
+import struct
+import tempfile
+import wave
+from pathlib import Path
+
+from time_stretch import read_wav_format, stretch_wav, tempo_for, wav_duration
+
+
+def _write_tone(path, seconds=1.0, rate=24000, freq=220.0):
+    frames = b"".join(
+        struct.pack("<h", int(8000 * math.sin(2 * math.pi * freq * i / rate)))
+        for i in range(int(seconds * rate))
+    )
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(frames)
+
+
+def test_tempo_is_clamped():
+    """ضریب سرعت در بازه 0.5 تا 2.5 محدود می‌شود"""
+    print("🔍 تست ضریب سرعت...")
+    assert tempo_for(3.0, 2.0) == 1.5
+    assert tempo_for(10.0, 1.0) == 2.5
+    assert tempo_for(1.0, 5.0) == 0.5
+    assert tempo_for(1.0, 0) == 2.0  # non-positive cue length falls back to 0.5s
+    print("✅ ضریب سرعت درست محاسبه شد")
+
+
+def test_stretch_wav_hits_target_length():
+    """خروجی به طول هدف می‌رسد و قالب WAV حفظ می‌شود"""
+    print("🔍 تست تغییر طول WAV...")
+    with tempfile.TemporaryDirectory() as tmp:
+        src, dst = Path(tmp) / "dub_temp_1.wav", Path(tmp) / "dub_1.wav"
+        _write_tone(src, seconds=1.5)
+        assert abs(wav_duration(src) - 1.5) < 1e-6
+
+        stretch_wav(src, dst, tempo_for(1.5, 1.0))
+        frames, rate, channels, width = read_wav_format(dst)
+        assert (rate, channels, width) == (24000, 1, 2)
+        assert abs(frames / rate - 1.0) < 0.01
+    print("✅ طول خروجی با زیرنویس برابر شد")
+
+
+def main():
+    print("🧪 تست تغییر سرعت")
+    print("=" * 50)
+    test_tempo_is_clamped()
+    test_stretch_wav_hits_target_length()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+تست میکسر خط زمانی
+Test single-pass timeline mixer
+"""
+
+import io
+import struct
+import tempfile
+import wave
+from pathlib import Path
+
+import timeline_mixer
+from timeline_mixer import TimelineMixer, volume_to_gain
+
+
+def _write_wav(path, values, rate, channels):
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"".join(struct.pack("<h", v) for v in values))
+
+
+def test_segments_land_at_cue_offsets():
+    """سگمنت‌ها در زمان شروع زیرنویس قرار می‌گیرند و انتهای اضافه بریده می‌شود"""
+    print("🔍 تست جایگذاری سگمنت‌ها...")
+    with tempfile.TemporaryDirectory() as tmp:
+        segment = Path(tmp) / "dub_1.wav"
+        _write_wav(segment, [1000] * 100, rate=1000, channels=1)  # 0.1s mono
+
+        mixer = TimelineMixer(1.0, sample_rate=1000, channels=2)
+        assert mixer.add_segment(segment, 0.25) == 0.1
+        mixer.add_segment(segment, 0.95)  # only 50 frames fit
+        buffer = mixer.buffer
+        assert buffer[:250].max() == 0
+        assert (buffer[250:350] == 1000).all()
+        assert buffer[350:950].max() == 0 and (buffer[950:] == 1000).all()
+
+        out = mixer.write(Path(tmp) / "merged_audio.wav")
+        with wave.open(str(out), "rb") as wav:
+            assert wav.getnframes() == 1000 and wav.getnchannels() == 2 and wav.getframerate() == 1000
+    print("✅ سگمنت‌ها درست جایگذاری شدند")
+
+
+def test_base_track_gain_and_saturation():
+    """ترک اصلی با ضریب حجم جمع می‌شود و جمع‌ها اشباع می‌شوند"""
+    print("🔍 تست ترک اصلی و اشباع...")
+    with tempfile.TemporaryDirectory() as tmp:
+        original = Path(tmp) / "original_audio.wav"
+        _write_wav(original, [20000, 20000] * 1000, rate=1000, channels=2)
+        loud = Path(tmp) / "dub_1.wav"
+        _write_wav(loud, [30000] * 10, rate=1000, channels=1)
+
+        assert volume_to_gain(1.0) == 1.0
+        mixer = TimelineMixer(0.5, sample_rate=1000, channels=2)
+        mixer.add_base_track(original, gain=0.5)
+        assert (mixer.buffer == 10000).all()  # longer original is cut to the timeline
+        mixer.add_segment(loud, 0.0)
+        assert (mixer.buffer[:10] == 32767).all() and (mixer.buffer[10:] == 10000).all()
+    print("✅ ترک اصلی و اشباع درست کار می‌کند")
+
+
+def test_resamples_tts_rate_to_timeline():
+    """سگمنت 24 کیلوهرتز به نرخ خط زمانی تبدیل می‌شود"""
+    print("🔍 تست تبدیل نرخ نمونه‌برداری...")
+    with tempfile.TemporaryDirectory() as tmp:
+        segment = Path(tmp) / "dub_1.wav"
+        _write_wav(segment, [500] * 2400, rate=24000, channels=1)  # 0.1s
+        mixer = TimelineMixer(1.0)
+        assert abs(mixer.add_segment(segment, 0.0) - 0.1) < 1e-3
+        assert (mixer.buffer[:4410] == 500).all() and mixer.buffer[4411:].max() == 0
+    print("✅ نرخ نمونه‌برداری تبدیل شد")
+
+
+def test_base_track_resampling_is_continuous_across_blocks():
+    """ترک اصلی با نرخ متفاوت بلوک به بلوک و بدون پرش یا رانش در مرز بلوک‌ها تبدیل می‌شود"""
+    print("🔍 تست تبدیل نرخ پیوسته ترک اصلی...")
+    with tempfile.TemporaryDirectory() as tmp:
+        original = Path(tmp) / "original_audio.wav"
+        # A ramp stays a ramp under linear interpolation, so any seam shows up as an error
+        _write_wav(original, [10 * i for i in range(2400)], rate=24000, channels=1)
+        block_frames = timeline_mixer.READ_BLOCK_FRAMES
+        timeline_mixer.READ_BLOCK_FRAMES = 37  # does not divide the track or the rate ratio
+        try:
+            mixer = TimelineMixer(0.2, sample_rate=44100, channels=2)
+            mixer.add_base_track(original)
+        finally:
+            timeline_mixer.READ_BLOCK_FRAMES = block_frames
+
+        step = 24000 / 44100
+        covered = [j for j in range(mixer.frames) if j * step <= 2399]
+        for j in covered:
+            expected = 10 * j * step
+            assert abs(int(mixer.buffer[j, 0]) - expected) <= 0.5, (j, mixer.buffer[j, 0], expected)
+        assert (mixer.buffer[:, 0] == mixer.buffer[:, 1]).all()
+        # The track ends after round(2400 * 44100 / 24000) frames, holding its last sample
+        assert (mixer.buffer[covered[-1] + 1:4410, 0] == 23990).all()
+        assert mixer.buffer[4410:].max() == 0
+    print("✅ تبدیل نرخ ترک اصلی پیوسته است")
+
+
+class _TricklePipe(io.BytesIO):
+    """شبیه‌سازی pipe که تکه‌هایی با طول فرد (نیمه‌فریم) برمی‌گرداند"""
+
+    def read(self, size=-1):
+        return super().read(7)
+
+
+def test_base_stream_and_pcm_blocks():
+    """ترک اصلی از جریان خام خوانده می‌شود و PCM تکه‌تکه بدون تغییر خارج می‌شود"""
+    print("🔍 تست جریان خام ورودی/خروجی...")
+    pcm = struct.pack("<2h", 1200, -1200) * 300
+    mixer = TimelineMixer(0.25, sample_rate=1000, channels=2)
+    mixer.add_base_stream(_TricklePipe(pcm), gain=0.5)
+    assert (mixer.buffer[:, 0] == 600).all() and (mixer.buffer[:, 1] == -600).all()
+
+    blocks = list(mixer.pcm_blocks(block_frames=100))
+    assert [len(b) for b in blocks] == [400, 400, 200]
+    assert b"".join(blocks) == struct.pack("<2h", 600, -600) * 250
+    print("✅ جریان خام درست خوانده و نوشته شد")
+
+
+def main():
+    print("🧪 تست میکسر خط زمانی")
+    print("=" * 50)
+    test_segments_land_at_cue_offsets()
+    test_base_track_gain_and_saturation()
+    test_resamples_tts_rate_to_timeline()
+    test_base_track_resampling_is_continuous_across_blocks()
+    test_base_stream_and_pcm_blocks()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+تست هم‌ترازی ترجمه تکه‌ها
+Test chunk translation alignment
+"""
+
+import json
+
+from translation_alignment import align_chunk, build_json_payload, is_malformed, parse_json_reply
+
+CHUNK = [
+    ("7", "00:00:01,000", "00:00:02,000", "Hello"),
+    ("8", "00:00:02,000", "00:00:03,000", "How are you?"),
+    ("9", "00:00:03,000", "00:00:04,000", "Goodbye"),
+]
+
+
+def test_dropped_cue_does_not_shift_the_rest():
+    """جاافتادن یک زیرنویس بقیه را جابه‌جا نمی‌کند و فقط همان برای تلاش مجدد برمی‌گردد"""
+    print("🔍 تست زیرنویس جاافتاده...")
+    reply = [
+        ("1", "00:00:01,000", "00:00:02,000", "سلام"),
+        ("3", "00:00:03,000", "00:00:04,000", "خداحافظ"),
+    ]
+    translated, missing = align_chunk(CHUNK, reply)
+    assert translated == {"7": "سلام", "9": "خداحافظ"}
+    assert [cue[0] for cue in missing] == ["8"]
+    print("✅ فقط زیرنویس جاافتاده دوباره درخواست می‌شود")
+
+
+def test_malformed_and_failed_chunks():
+    """متن خراب و تکه کاملاً ناموفق به عنوان جاافتاده گزارش می‌شوند"""
+    print("🔍 تست متن خراب و تکه ناموفق...")
+    reply = [
+        ("1", "", "", "سلام"),
+        ("2", "", "", "00:00:02,000 --> 00:00:03,000"),
+        ("3", "", "", "   "),
+    ]
+    translated, missing = align_chunk(CHUNK, reply)
+    assert translated == {"7": "سلام"}
+    assert [cue[0] for cue in missing] == ["8", "9"]
+
+    translated, missing = align_chunk(CHUNK, [])
+    assert translated == {} and missing == CHUNK
+    assert is_malformed("12") and not is_malformed("۱۲ نفر")
+    print("✅ متن خراب و تکه ناموفق تشخیص داده شد")
+
+
+def test_renumbered_complete_reply_aligns_by_order():
+    """پاسخ کامل با شماره‌گذاری اصلی به ترتیب هم‌تراز می‌شود"""
+    print("🔍 تست شماره‌گذاری متفاوت...")
+    reply = [(str(n), "", "", text) for n, text in zip((7, 8, 9), ("سلام", "خوبی؟", "خداحافظ"))]
+    translated, missing = align_chunk(CHUNK, reply)
+    assert translated == {"7": "سلام", "8": "خوبی؟", "9": "خداحافظ"} and missing == []
+
+    # Incomplete with unusable numbers: nothing is trusted
+    translated, missing = align_chunk(CHUNK, reply[:2])
+    assert translated == {} and len(missing) == 3
+    print("✅ شماره‌گذاری متفاوت درست مدیریت شد")
+
+
+def test_json_protocol_round_trip():
+    """پروتکل JSON: بدون تایم‌کد ارسال و پس از اعتبارسنجی هم‌تراز می‌شود"""
+    print("🔍 تست پروتکل JSON...")
+    payload = build_json_payload(CHUNK)
+    assert "-->" not in payload and "00:00" not in payload
+    assert json.loads(payload)[1] == {"id": 2, "text": "How are you?"}
+
+    reply = '```json\n[{"id": 1, "text": "سلام"}, {"id": "3", "text": "خداحافظ"}, {"id": 2}, "oops"]\n```'
+    translated, missing = align_chunk(CHUNK, parse_json_reply(reply))
+    assert translated == {"7": "سلام", "9": "خداحافظ"}
+    assert [cue[0] for cue in missing] == ["8"]
+
+    assert parse_json_reply('{"translations": [{"id": 2, "text": "خوبی؟"}]}') == [("2", "", "", "خوبی؟")]
+    assert parse_json_reply("not json") == []
+    print("✅ پروتکل JSON درست کار می‌کند")
+
+
+def main():
+    print("🧪 تست هم‌ترازی ترجمه")
+    print("=" * 50)
+    test_dropped_cue_does_not_shift_the_rest()
+    test_malformed_and_failed_chunks()
+    test_renumbered_complete_reply_aligns_by_order()
+    test_json_protocol_round_trip()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+تست حافظه ترجمه
+Test segment-level translation memory
+"""
+
+import tempfile
+from pathlib import Path
+
+from translation_memory import TranslationMemory, normalize_text
+
+
+def test_lookup_after_store():
+    """جمله ذخیره‌شده با متن نرمال‌شده دوباره پیدا می‌شود"""
+    print("🔍 تست ذخیره و بازیابی...")
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = TranslationMemory(Path(tmp) / "tm.db")
+        stored = memory.store_many([("Welcome back to the channel!", "به کانال خوش برگشتید!")],
+                                   "Persian (FA)", "Gemini", "default")
+        assert stored == 1
+        hits = memory.lookup_many(["Something new", "  welcome back   to the CHANNEL! "],
+                                  "Persian (FA)", "Gemini", "default")
+        assert hits == {1: "به کانال خوش برگشتید!"}
+        memory.close()
+
+        # Survives a restart
+        reopened = TranslationMemory(Path(tmp) / "tm.db")
+        assert reopened.size() == 1
+        reopened.close()
+    print("✅ ذخیره و بازیابی درست کار می‌کند")
+
+
+def test_key_includes_language_and_model():
+    """ترجمه یک زبان/مدل برای زبان یا مدل دیگر استفاده نمی‌شود"""
+    print("🔍 تست جداسازی زبان و مدل...")
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = TranslationMemory(Path(tmp) / "tm.db")
+        memory.store_many([("Hello", "سلام")], "Persian (FA)", "Gemini", "default")
+        assert memory.lookup_many(["Hello"], "German (DE)", "Gemini", "default") == {}
+        assert memory.lookup_many(["Hello"], "Persian (FA)", "Azure", "gpt-4o") == {}
+        assert memory.lookup_many(["Hello"], "Persian (FA)", "Gemini", "default") == {0: "سلام"}
+        memory.close()
+    print("✅ کلید شامل زبان و مدل است")
+
+
+def test_empty_entries_are_skipped():
+    """متن یا ترجمه خالی ذخیره نمی‌شود"""
+    print("🔍 تست ورودی خالی...")
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = TranslationMemory(Path(tmp) / "tm.db")
+        assert memory.store_many([("   ", "x"), ("Hi", "  ")], "Persian (FA)", "Gemini", "default") == 0
+        assert normalize_text("Ａ\tb ") == "a b"
+        memory.close()
+    print("✅ ورودی خالی نادیده گرفته شد")
+
+
+def main():
+    print("🧪 تست حافظه ترجمه")
+    print("=" * 50)
+    test_lookup_after_store()
+    test_key_includes_language_and_model()
+    test_empty_entries_are_skipped()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
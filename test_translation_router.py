@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+تست مسیریاب ترجمه
+Test health-aware translation router
+"""
+
+from translation_router import TranslationRouter
+
+FLASH = ("Gemini", "gemini-2.0-flash")
+LITE = ("Gemini", "gemini-2.0-flash-lite")
+AZURE = ("Azure", "gpt-4o")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_routes_to_fastest_healthy_backend():
+    """درخواست‌ها به سریع‌ترین سرویس سالم فرستاده می‌شوند"""
+    print("🔍 تست انتخاب سریع‌ترین سرویس...")
+    router = TranslationRouter(prior_latency_seconds=5, clock=FakeClock())
+    backends = [FLASH, LITE, AZURE]
+    assert router.rank(backends) == backends  # untried: preference order
+
+    router.record(FLASH, 9.0, ok=True)
+    router.record(LITE, 2.0, ok=True)
+    assert router.rank(backends) == [LITE, AZURE, FLASH]
+    print("✅ سریع‌ترین سرویس انتخاب شد")
+
+
+def test_circuit_opens_and_recovers():
+    """مدار با 429 یا خطاهای پیاپی باز و پس از زمان استراحت دوباره امتحان می‌شود"""
+    print("🔍 تست مدار قطع‌کننده...")
+    clock = FakeClock()
+    router = TranslationRouter(failure_threshold=2, cooldown_seconds=60, max_cooldown_seconds=100, clock=clock)
+    backends = [FLASH, LITE]
+
+    router.record(FLASH, 1.0, ok=False, throttled=True)
+    assert router.rank(backends) == [LITE]
+    router.record(LITE, 1.0, ok=False)
+    assert router.rank(backends) == [LITE]  # one failure is tolerated
+    router.record(LITE, 1.0, ok=False)
+    assert router.rank(backends) == []
+    assert router.wait_time(backends) == 60
+
+    # Half-open probe fails: cool-down doubles (capped)
+    clock.now += 61
+    assert router.rank(backends) == [FLASH, LITE]
+    router.record(FLASH, 1.0, ok=False)
+    assert FLASH not in router.rank(backends)
+    assert router.wait_time([FLASH]) == 100
+
+    # Successful probe closes the circuit
+    clock.now += 101
+    router.record(FLASH, 1.0, ok=True)
+    router.record(FLASH, 1.0, ok=False)
+    assert FLASH in router.rank(backends)
+    assert router.stats([FLASH])["Gemini/gemini-2.0-flash"]["throttled"] == 1
+    print("✅ مدار قطع‌کننده درست کار می‌کند")
+
+
+def main():
+    print("🧪 تست مسیریاب ترجمه")
+    print("=" * 50)
+    test_routes_to_fastest_healthy_backend()
+    test_circuit_opens_and_recovers()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+تست مانیفست سگمنت‌های TTS
+Test resumable TTS segment manifest
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from tts_manifest import STATUS_OK, STATUS_SILENCE, TtsManifest, segment_fingerprint
+
+
+def test_only_changed_or_failed_segments_rerun():
+    """پس از قطع اجرا فقط سگمنت‌های تغییرکرده، ناموفق یا حذف‌شده دوباره تولید می‌شوند"""
+    print("🔍 تست ادامه مرحله TTS...")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        path = tmp / "tts_manifest.jsonl"
+        segments = {i: tmp / f"dub_{i}.wav" for i in (1, 2, 3)}
+        for segment in segments.values():
+            segment.write_bytes(b"RIFF")
+        fingerprints = {i: segment_fingerprint(f"متن {i}", "Fenrir", "tts-model", "", 1500) for i in segments}
+
+        manifest = TtsManifest(path)
+        manifest.record(1, segments[1], fingerprints[1], STATUS_OK, 1.5)
+        manifest.record(2, segments[2], fingerprints[2], STATUS_SILENCE, 1.5)
+        # Segment 3 was never recorded: the run was interrupted before it finished
+
+        reopened = TtsManifest(path)
+        assert reopened.is_current(1, segments[1], fingerprints[1])
+        assert not reopened.is_current(2, segments[2], fingerprints[2])
+        assert not reopened.is_current(3, segments[3], fingerprints[3])
+
+        # Edited text, another voice or new cue timing invalidate the segment
+        assert not reopened.is_current(1, segments[1], segment_fingerprint("متن جدید", "Fenrir", "tts-model", "", 1500))
+        assert not reopened.is_current(1, segments[1], segment_fingerprint("متن 1", "Kore", "tts-model", "", 1500))
+        assert not reopened.is_current(1, segments[1], segment_fingerprint("متن 1", "Fenrir", "tts-model", "", 2000))
+
+        # A file replaced or deleted since it was recorded is not trusted
+        segments[1].write_bytes(b"RIFF-other")
+        assert not reopened.is_current(1, segments[1], fingerprints[1])
+        os.remove(segments[1])
+        assert not reopened.is_current(1, segments[1], fingerprints[1])
+    print("✅ فقط سگمنت‌های لازم دوباره تولید می‌شوند")
+
+
+def test_last_record_wins_and_torn_line_ignored():
+    """رکورد آخر هر سگمنت معتبر است و خط نیمه‌نوشته پس از crash نادیده گرفته می‌شود"""
+    print("🔍 تست بازخوانی مانیفست...")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        path = tmp / "tts_manifest.jsonl"
+        segment = tmp / "dub_1.wav"
+        segment.write_bytes(b"RIFF")
+        fingerprint = segment_fingerprint("سلام", "Fenrir", "tts-model")
+
+        manifest = TtsManifest(path)
+        manifest.record(1, segment, fingerprint, STATUS_SILENCE)
+        manifest.record(1, segment, fingerprint, STATUS_OK, 0.8)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"index": 1, "status": "sil')
+
+        reopened = TtsManifest(path)
+        assert reopened.is_current(1, segment, fingerprint)
+        reopened.record(2, segment, fingerprint, STATUS_OK)
+        assert TtsManifest(path).is_current(2, segment, fingerprint)
+    print("✅ مانیفست درست بازخوانی شد")
+
+
+def main():
+    print("🧪 تست مانیفست TTS")
+    print("=" * 50)
+    test_only_changed_or_failed_segments_rerun()
+    test_last_record_wins_and_torn_line_ignored()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+تست تولید هم‌زمان سگمنت‌های TTS
+Test concurrent TTS synthesis, stretching, silence fallback and ordered assembly
+
+generate_tts_segment is stubbed (no API calls): segments finish out of order,
+one of them fails, and every dub_N.wav must still match cue N.
+"""
+
+import io
+import math
+import os
+import struct
+import tempfile
+import threading
+import time
+import wave
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from dubbing_functions import VideoDubbingApp
+from job_workspace import JobWorkspace
+from time_stretch import wav_duration
+from tts_manifest import STATUS_OK, STATUS_SILENCE, TtsManifest, segment_fingerprint
+
+RATE = 24000
+CUES = [0.75, 1.0, 1.25, 1.5, 1.75]  # cue N lasts CUES[N - 1] seconds
+FAILING_INDEX = 3
+
+
+def _srt_time(seconds):
+    ms = int(round(seconds * 1000))
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d},{ms % 1000:03d}"
+
+
+def _write_srt(path):
+    blocks, start = [], 0.0
+    for index, length in enumerate(CUES, start=1):
+        blocks.append(f"{index}\n{_srt_time(start)} --> {_srt_time(start + length)}\nجمله {index}\n")
+        start += length + 0.5
+    path.write_text("\n".join(blocks), encoding="utf-8")
+
+
+def _write_tone(path, seconds):
+    frames = b"".join(
+        struct.pack("<h", int(8000 * math.sin(2 * math.pi * 220.0 * i / RATE)))
+        for i in range(int(seconds * RATE))
+    )
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(frames)
+
+
+def test_segments_are_assembled_in_cue_order():
+    """سگمنت‌ها خارج از ترتیب تمام می‌شوند اما dub_N همیشه به زیرنویس N تعلق دارد؛ شکست به سکوت می‌رسد"""
+    print("🔍 تست تولید هم‌زمان TTS...")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # caches configured under ./dubbing_work stay inside the temp dir
+        try:
+            workspace = JobWorkspace(Path(tmp) / "job", job_id="job")
+            app = VideoDubbingApp("test-key", workspace=workspace)
+            app.tts_cache = object()  # lookups are reported by the stub below
+            _write_srt(app._srt_fa_path())
+
+            finished = []
+            lock = threading.Lock()
+
+            def fake_tts(text, voice, model, output_path, speech_prompt="", max_retries=3, on_cache_lookup=None):
+                index = int(text.split()[-1])
+                on_cache_lookup(index % 2 == 0)
+                # Later cues finish first
+                time.sleep(0.05 * (len(CUES) - index))
+                with lock:
+                    finished.append(index)
+                if index == FAILING_INDEX:
+                    raise RuntimeError("TTS unavailable")
+                # 20% too long, so every segment is stretched to its own cue
+                _write_tone(output_path, CUES[index - 1] * 1.2)
+                return output_path
+
+            app.generate_tts_segment = fake_tts
+            output = io.StringIO()
+            with redirect_stdout(output):
+                assert app.create_audio_segments(voice="Fenrir", model="tts-model")
+            assert finished != sorted(finished)
+            assert "2 یافت شد | 3 ناموفق" in output.getvalue()
+
+            manifest = TtsManifest(workspace.tts_manifest_path())
+            for index, length in enumerate(CUES, start=1):
+                segment = workspace.segment_path(index)
+                assert abs(wav_duration(segment) - length) < 0.06, (index, wav_duration(segment))
+                fingerprint = segment_fingerprint(f"جمله {index}", "Fenrir", "tts-model", "", int(length * 1000))
+                status = manifest._segments[index]["status"]
+                if index == FAILING_INDEX:
+                    assert status == STATUS_SILENCE
+                    assert not manifest.is_current(index, segment, fingerprint)
+                    with wave.open(str(segment), "rb") as wav:
+                        assert not any(wav.readframes(wav.getnframes()))
+                else:
+                    assert status == STATUS_OK
+                    assert manifest.is_current(index, segment, fingerprint)
+        finally:
+            os.chdir(cwd)
+    print("✅ سگمنت‌ها به ترتیب زیرنویس و با سکوت برای سگمنت ناموفق ساخته شدند")
+
+
+def main():
+    print("🧪 تست تولید هم‌زمان TTS")
+    print("=" * 50)
+    test_segments_are_assembled_in_cue_order()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
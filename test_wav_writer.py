@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+تست نویسنده جریانی WAV
+Test streaming WAV writer
+"""
+
+import os
+import struct
+import tempfile
+import wave
+from pathlib import Path
+
+from wav_writer import StreamingWavWriter, wav_header, write_silence_wav
+
+
+def test_streamed_chunks_form_a_valid_wav():
+    """تکه‌های PCM پشت سر هم نوشته و هدر در پایان اصلاح می‌شود"""
+    print("🔍 تست نوشتن جریانی...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "dub_temp_1.wav"
+        chunks = [bytes([i]) * 960 for i in range(50)]
+        with StreamingWavWriter(path, 24000) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+            assert not path.exists()  # only the .part file exists until close
+
+        with wave.open(str(path), "rb") as wav:
+            assert wav.getframerate() == 24000 and wav.getnchannels() == 1 and wav.getsampwidth() == 2
+            assert wav.readframes(wav.getnframes()) == b"".join(chunks)
+        assert path.read_bytes() == wav_header(24000, 16, 1, 48000) + b"".join(chunks)
+        assert os.listdir(tmp) == ["dub_temp_1.wav"]
+    print("✅ فایل WAV معتبر ساخته شد")
+
+
+def test_failed_stream_leaves_target_untouched():
+    """خطا در میانه جریان فایل قبلی را خراب نمی‌کند"""
+    print("🔍 تست قطع جریان...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "dub_temp_1.wav"
+        path.write_bytes(b"previous")
+        linked = Path(tmp) / "cached.wav"
+        os.link(path, linked)
+        try:
+            with StreamingWavWriter(path, 24000) as writer:
+                writer.write(b"\0\0" * 10)
+                raise ConnectionError("stream dropped")
+        except ConnectionError:
+            pass
+        assert path.read_bytes() == b"previous"
+        assert sorted(os.listdir(tmp)) == ["cached.wav", "dub_temp_1.wav"]
+
+        # A successful write replaces the inode instead of writing through the link
+        with StreamingWavWriter(path, 24000) as writer:
+            writer.write(b"\1\0")
+        assert linked.read_bytes() == b"previous"
+    print("✅ فایل قبلی سالم ماند")
+
+
+def test_silence_wav_is_zero_filled():
+    """فایل سکوت با طول درست و نمونه‌های صفر ساخته می‌شود"""
+    print("🔍 تست فایل سکوت...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "dub_3.wav"
+        path.write_bytes(b"stale")
+        write_silence_wav(path, 1.5)
+        with wave.open(str(path), "rb") as wav:
+            assert wav.getframerate() == 24000 and wav.getnchannels() == 1
+            assert wav.getnframes() == 36000
+            assert wav.readframes(wav.getnframes()) == bytes(72000)
+
+        stereo = write_silence_wav(Path(tmp) / "silence.wav", 0.1, sample_rate=44100, channels=2)
+        with wave.open(str(stereo), "rb") as wav:
+            assert wav.getnchannels() == 2 and wav.getnframes() == 4410
+        assert sorted(os.listdir(tmp)) == ["dub_3.wav", "silence.wav"]
+    print("✅ فایل سکوت درست ساخته شد")
+
+
+def test_odd_data_is_padded_inside_riff_size():
+    """داده با طول فرد یک بایت پرکننده می‌گیرد که در اندازه RIFF شمرده می‌شود اما در اندازه data نه"""
+    print("🔍 تست داده با طول فرد...")
+    with tempfile.TemporaryDirectory() as tmp:
+        streamed = Path(tmp) / "odd.wav"
+        with StreamingWavWriter(streamed, 8000, bits_per_sample=8) as writer:
+            writer.write(b"\x80\x81")
+            writer.write(b"\x82")
+        silence = write_silence_wav(Path(tmp) / "silence.wav", 3 / 8000, sample_rate=8000, bits_per_sample=8)
+
+        for path, frames in ((streamed, b"\x80\x81\x82"), (silence, bytes(3))):
+            data = path.read_bytes()
+            assert len(data) == 44 + 3 + 1
+            riff, data_size = struct.unpack_from("<I", data, 4)[0], struct.unpack_from("<I", data, 40)[0]
+            assert riff == len(data) - 8 == 40
+            assert data_size == 3
+            with wave.open(str(path), "rb") as wav:
+                assert wav.readframes(wav.getnframes()) == frames
+    print("✅ اندازه RIFF بایت پرکننده را شامل می‌شود")
+
+
+def main():
+    print("🧪 تست نویسنده WAV")
+    print("=" * 50)
+    test_streamed_chunks_form_a_valid_wav()
+    test_failed_stream_leaves_target_untouched()
+    test_silence_wav_is_zero_filled()
+    test_odd_data_is_padded_inside_riff_size()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
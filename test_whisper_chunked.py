@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+تست برش صدا برای رونویسی تکه‌ای
+Test silence-aware splitting for chunked Whisper transcription
+"""
+
+import os
+import tempfile
+import wave
+from pathlib import Path
+
+from whisper_chunked import pick_split_points, plan_workers, should_chunk, wav_duration_seconds
+
+
+def test_splits_land_in_silence():
+    """نقاط برش در سکوت نزدیک هر مرز هدف قرار می‌گیرند"""
+    print("🔍 تست انتخاب نقاط برش...")
+    energies = [1.0] * 1000
+    # Quiet gaps near (but not exactly at) the 300-frame boundaries
+    for start in (290, 610):
+        for i in range(start, start + 10):
+            energies[i] = 0.0
+
+    points = pick_split_points(energies, chunk_frames=300, window_frames=40, silence_frames=10)
+    assert points == [295, 615], points
+    assert all(b - a > 0 for a, b in zip([0] + points, points + [len(energies)]))
+    print("✅ نقاط برش در سکوت قرار گرفتند")
+
+
+def test_short_audio_is_not_split():
+    """صدای کوتاه‌تر از یک تکه برش نمی‌خورد"""
+    print("🔍 تست صدای کوتاه...")
+    assert pick_split_points([1.0] * 200, chunk_frames=300, window_frames=40, silence_frames=10) == []
+    print("✅ صدای کوتاه برش نخورد")
+
+
+def test_chunking_threshold_uses_wav_duration():
+    """تصمیم تکه‌ای کردن بر اساس مدت فایل WAV گرفته می‌شود"""
+    print("🔍 تست آستانه مدت صدا...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "audio.wav"
+        with wave.open(str(path), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(8000)
+            wav.writeframes(b"\0\0" * 8000 * 3)
+        assert abs(wav_duration_seconds(path) - 3.0) < 1e-6
+        assert not should_chunk(path)
+        assert wav_duration_seconds(Path(tmp) / "missing.wav") is None
+    print("✅ آستانه مدت صدا درست کار می‌کند")
+
+
+def test_worker_count_is_bounded_by_memory():
+    """تعداد کارگرها به سقف، حافظه آزاد و مراحل سنگین هم‌زمان محدود می‌شود"""
+    print("🔍 تست محدودیت تعداد کارگرها...")
+    gb = 1024 ** 3
+    cpus = os.cpu_count() or 1
+    assert plan_workers("base", requested=16, available_bytes=None) == min(16, cpus)
+    assert plan_workers("base", requested=16, available_bytes=None, max_workers=2) == min(2, cpus)
+    # Automatic: one worker per core while memory allows
+    assert plan_workers("tiny", available_bytes=1024 * gb) == cpus
+    assert plan_workers("medium", available_bytes=64 * gb) == min(12, cpus)
+    assert plan_workers("large-v3", available_bytes=12 * gb) == 1
+    assert plan_workers("large", available_bytes=8 * gb) == 0
+    # Two heavy stages may run at once: each gets half of the memory budget
+    assert plan_workers("medium.en", available_bytes=12 * gb, cpu_workers=2) == 1
+    print("✅ تعداد کارگرها محدود است")
+
+
+def main():
+    print("🧪 تست رونویسی تکه‌ای")
+    print("=" * 50)
+    test_splits_land_in_silence()
+    test_short_audio_is_not_split()
+    test_chunking_threshold_uses_wav_duration()
+    test_worker_count_is_bounded_by_memory()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+تست رجیستری مدل‌های Whisper
+Test process-wide Whisper model registry
+"""
+
+import threading
+import time
+
+from whisper_models import WhisperModelRegistry, configured_model_name
+
+
+def _slow_loader(loaded):
+    def load(name):
+        time.sleep(0.05)
+        loaded.append(name)
+        return object()
+    return load
+
+
+def test_model_loaded_once_across_threads():
+    """درخواست هم‌زمان یک مدل فقط یک بار آن را بارگذاری می‌کند"""
+    print("🔍 تست بارگذاری یک‌باره مدل...")
+    loaded = []
+    registry = WhisperModelRegistry(loader=_slow_loader(loaded))
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.get("base"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert loaded == ["base"]
+    assert len({id(m) for m in models}) == 1
+    assert registry.get("base") is models[0]
+    registry.get("small")
+    assert loaded == ["base", "small"]
+    assert registry.loaded_models() == ["base", "small"]
+    print("✅ هر اندازه مدل فقط یک بار بارگذاری شد")
+
+
+def test_preload_and_inference_lock():
+    """بارگذاری پیش‌از‌موعد تکراری نخ جدید نمی‌سازد و قفل هر مدل مشترک است"""
+    print("🔍 تست preload و قفل استنتاج...")
+    loaded = []
+    registry = WhisperModelRegistry(loader=_slow_loader(loaded))
+    first = registry.preload_async("tiny")
+    second = registry.preload_async("tiny")
+    assert first is second
+    first.join()
+    assert loaded == ["tiny"]
+    assert registry.lock("tiny") is registry.lock("tiny")
+    assert registry.lock("tiny") is not registry.lock("base")
+    print("✅ preload و قفل استنتاج درست کار می‌کنند")
+
+
+def test_model_name_comes_from_config():
+    """اندازه مدل از config.py خوانده می‌شود"""
+    print("🔍 تست خواندن اندازه مدل از تنظیمات...")
+    loaded = []
+    registry = WhisperModelRegistry(loader=_slow_loader(loaded))
+    registry.get()
+    assert loaded == [configured_model_name()]
+    print("✅ اندازه مدل از تنظیمات خوانده شد")
+
+
+def main():
+    print("🧪 تست رجیستری مدل‌های Whisper")
+    print("=" * 50)
+    test_model_loaded_once_across_threads()
+    test_preload_and_inference_lock()
+    test_model_name_comes_from_config()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
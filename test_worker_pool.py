@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+تست استخر کارگرها
+Test bounded worker pool
+"""
+
+import threading
+import time
+
+from worker_pool import WorkerPool
+
+
+def test_max_concurrency_and_queue_depth():
+    """بیش از max_concurrent_jobs کار نباید هم‌زمان اجرا شود"""
+    print("🔍 تست حداکثر هم‌زمانی...")
+    pool = WorkerPool(max_concurrent_jobs=2, cpu_workers=1, io_workers=2)
+    release = threading.Event()
+
+    def job():
+        release.wait(5)
+        return True
+
+    futures = [pool.submit_job(job) for _ in range(5)]
+    time.sleep(0.2)
+    stats = pool.stats()
+    assert stats["running"] == 2
+    assert stats["queue_depth"] == 3
+    assert stats["max_concurrency"] == 2
+
+    release.set()
+    assert all(f.result(timeout=5) for f in futures)
+    stats = pool.stats()
+    assert stats["running"] == 0 and stats["queue_depth"] == 0
+    assert stats["completed"] == 5
+    pool.shutdown()
+    print("✅ هم‌زمانی محدود است")
+
+
+def test_stage_pools_are_bounded():
+    """مراحل CPU حتی با چند کار هم‌زمان از cpu_workers بیشتر نمی‌شوند"""
+    print("🔍 تست محدودیت استخر CPU...")
+    pool = WorkerPool(max_concurrent_jobs=3, cpu_workers=1, io_workers=3)
+    peak = {"cpu": 0}
+    active = {"cpu": 0}
+    lock = threading.Lock()
+
+    def cpu_stage():
+        with lock:
+            active["cpu"] += 1
+            peak["cpu"] = max(peak["cpu"], active["cpu"])
+        time.sleep(0.05)
+        with lock:
+            active["cpu"] -= 1
+        return "done"
+
+    def job():
+        return pool.run_cpu(cpu_stage)
+
+    futures = [pool.submit_job(job) for _ in range(3)]
+    assert [f.result(timeout=5) for f in futures] == ["done"] * 3
+    assert peak["cpu"] == 1
+    pool.shutdown()
+    print("✅ استخر CPU محدود است")
+
+
+def test_failed_job_is_counted():
+    """خطای کار باید در آمار ثبت شود"""
+    print("🔍 تست شمارش کارهای ناموفق...")
+    pool = WorkerPool(max_concurrent_jobs=1)
+
+    def broken():
+        raise RuntimeError("boom")
+
+    future = pool.submit_job(broken)
+    try:
+        future.result(timeout=5)
+        assert False, "exception expected"
+    except RuntimeError:
+        pass
+    assert pool.stats()["failed"] == 1
+    pool.shutdown()
+    print("✅ کار ناموفق ثبت شد")
+
+
+def main():
+    print("🧪 تست استخر کارگرها")
+    print("=" * 50)
+    test_max_concurrency_and_queue_depth()
+    test_stage_pools_are_bounded()
+    test_failed_job_is_counted()
+    print("🎉 همه تست‌ها موفق بودند")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+میکسر خط زمانی صدای دوبله
+Single-pass PCM timeline mixer for the final dub track
+
+One int16 buffer covering the whole video is allocated up front. The
+original track (optionally, gain-scaled) is read into it block by block and
+every dub segment is added in place at its cue offset with saturation, so
+the work is O(total samples) and the result is written once. TTS segments
+(24 kHz mono) are converted to the timeline rate/layout on the fly; a base
+track at another rate is resampled block by block with ``_BlockResampler``,
+which keeps the read position continuous across blocks.
+
+``extract_base_track`` and ``mux_into`` talk to ffmpeg over pipes (raw
+s16le on stdout/stdin), so no intermediate WAV touches the disk.
+"""
+
+import subprocess
+import wave
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, Union
+
+from wav_writer import StreamingWavWriter
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+READ_BLOCK_FRAMES = 1 << 16
+
+
+def volume_to_gain(volume: float) -> float:
+    """تبدیل حجم 0..1 رابط کاربری به ضریب خطی (همان نگاشت قبلی: -60dB × (1 - حجم))"""
+    return 10 ** (-(60 * (1 - volume)) / 20)
+
+
+def _to_layout(samples, source_rate: int, source_channels: int, rate: int, channels: int):
+    """تبدیل آرایه (frames, source_channels) به نرخ و تعداد کانال خط زمانی"""
+    import numpy as np
+
+    if source_channels != channels:
+        mono = samples.mean(axis=1, keepdims=True)
+        samples = np.repeat(mono, channels, axis=1)
+    if source_rate != rate and len(samples):
+        length = int(round(len(samples) * rate / source_rate))
+        positions = np.arange(length) * (source_rate / rate)
+        source_positions = np.arange(len(samples))
+        samples = np.stack(
+            [np.interp(positions, source_positions, samples[:, c]) for c in range(channels)], axis=1
+        )
+    return samples
+
+
+class _BlockResampler:
+    """
+    تبدیل نرخ پیوسته برای ورودی تکه‌تکه (درون‌یابی خطی)
+
+    Output frame n always sits at source position ``n * source_rate / rate``
+    of the whole stream, and the last source frame of each block is kept to
+    interpolate across the boundary, so blocks join without clicks or drift.
+    """
+
+    def __init__(self, source_rate: int, rate: int):
+        self.step = source_rate / rate
+        self.rate_ratio = rate / source_rate
+        self.out_index = 0  # next output frame
+        self.carry = None  # last source frame of the previous block
+        self.carry_index = -1  # its index in the source stream
+
+    def feed(self, samples):
+        import numpy as np
+
+        if not len(samples):
+            return samples
+        if self.carry is not None:
+            samples = np.concatenate([self.carry, samples])
+            first_index = self.carry_index
+        else:
+            first_index = 0
+        last_index = first_index + len(samples) - 1
+        count = max(0, int(last_index / self.step) - self.out_index + 1)
+        positions = (self.out_index + np.arange(count)) * self.step - first_index
+        self.out_index += count
+        self.carry, self.carry_index = samples[-1:], last_index
+        return np.stack([np.interp(positions, np.arange(len(samples)), samples[:, c])
+                         for c in range(samples.shape[1])], axis=1)
+
+    def flush(self):
+        """فریم‌های انتهایی تا طول کل (round(frames × نسبت نرخ)) با تکرار آخرین نمونه"""
+        import numpy as np
+
+        if self.carry is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        total = int(round((self.carry_index + 1) * self.rate_ratio))
+        count = max(0, total - self.out_index)
+        self.out_index += count
+        return np.repeat(self.carry, count, axis=0)
+
+
+def read_wav(path: Union[str, Path], rate: int = SAMPLE_RATE, channels: int = CHANNELS):
+    """خواندن WAV 16 بیتی به آرایه float32 با نرخ و کانال خط زمانی"""
+    import numpy as np
+
+    with wave.open(str(path), "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"فقط WAV 16 بیتی پشتیبانی می‌شود: {path}")
+        source_rate, source_channels = wav.getframerate(), wav.getnchannels()
+        pcm = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+    samples = pcm.reshape(-1, source_channels).astype(np.float32)
+    return _to_layout(samples, source_rate, source_channels, rate, channels)
+
+
+class TimelineMixer:
+    def __init__(self, duration_seconds: float, sample_rate: int = SAMPLE_RATE, channels: int = CHANNELS):
+        import numpy as np
+
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames = max(0, int(round(duration_seconds * sample_rate)))
+        self.buffer = np.zeros((self.frames, channels), dtype=np.int16)
+
+    def _add(self, start_frame: int, samples) -> int:
+        """جمع اشباعی نمونه‌ها در محل؛ تعداد فریم‌های اضافه‌شده برگردانده می‌شود"""
+        import numpy as np
+
+        start_frame = max(0, start_frame)
+        count = min(len(samples), self.frames - start_frame)
+        if count <= 0:
+            return 0
+        target = self.buffer[start_frame:start_frame + count]
+        mixed = target.astype(np.int32) + np.round(samples[:count]).astype(np.int32)
+        np.clip(mixed, -32768, 32767, out=mixed)
+        target[...] = mixed
+        return count
+
+    def _add_pcm_blocks(self, read_block: Callable[[int], bytes], source_rate: int, source_channels: int,
+                        gain: float) -> bool:
+        """True اگر منبع تا انتها خوانده شد (نه اینکه خط زمانی زودتر پر شد)"""
+        import numpy as np
+
+        frame_bytes = 2 * source_channels
+        resampler = _BlockResampler(source_rate, self.sample_rate) if source_rate != self.sample_rate else None
+        position = 0
+        pending = b""
+        while position < self.frames:
+            block = read_block(READ_BLOCK_FRAMES * frame_bytes)
+            if not block:
+                if resampler is not None:
+                    position += self._add(position, resampler.flush() * gain)
+                return True
+            # Pipes may return partial frames; carry the remainder to the next block
+            block = pending + block
+            usable = len(block) // frame_bytes * frame_bytes
+            block, pending = block[:usable], block[usable:]
+            samples = np.frombuffer(block, dtype="<i2").reshape(-1, source_channels).astype(np.float32)
+            samples = _to_layout(samples, source_rate, source_channels, source_rate, self.channels)
+            if resampler is not None:
+                samples = resampler.feed(samples)
+            position += self._add(position, samples * gain)
+        return False
+
+    def add_base_track(self, path: Union[str, Path], gain: float = 1.0) -> None:
+        """افزودن ترک اصلی از فایل WAV با ضریب gain (بلوک به بلوک، بدون بارگذاری کامل)"""
+        with wave.open(str(path), "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError(f"فقط WAV 16 بیتی پشتیبانی می‌شود: {path}")
+            frame_bytes = 2 * wav.getnchannels()
+            self._add_pcm_blocks(lambda size: wav.readframes(size // frame_bytes),
+                                 wav.getframerate(), wav.getnchannels(), gain)
+
+    def add_base_stream(self, stream: BinaryIO, gain: float = 1.0) -> None:
+        """افزودن ترک اصلی از جریان خام s16le با نرخ و کانال‌های خط زمانی"""
+        self._add_pcm_blocks(stream.read, self.sample_rate, self.channels, gain)
+
+    def extract_base_track(self, video_path: Union[str, Path], gain: float = 1.0) -> None:
+        """خواندن صدای اصلی ویدیو مستقیماً از خروجی ffmpeg (بدون original_audio.wav)"""
+        process = subprocess.Popen([
+            'ffmpeg', '-i', str(video_path), '-vn',
+            '-f', 's16le', '-acodec', 'pcm_s16le', '-ar', str(self.sample_rate), '-ac', str(self.channels),
+            'pipe:1'
+        ], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        drained = False
+        try:
+            drained = self._add_pcm_blocks(process.stdout.read, self.sample_rate, self.channels, gain)
+        finally:
+            # The timeline may be shorter than the track; stop ffmpeg instead of draining it
+            process.stdout.close()
+            returncode = process.wait()
+        # A non-zero exit only matters if ffmpeg quit on its own, not after we hung up
+        if drained and returncode != 0:
+            raise subprocess.CalledProcessError(returncode, 'ffmpeg')
+
+    def add_segment(self, path: Union[str, Path], offset_seconds: float) -> float:
+        """افزودن یک سگمنت دوبله در زمان شروع زیرنویس؛ مدت سگمنت برگردانده می‌شود"""
+        samples = read_wav(path, self.sample_rate, self.channels)
+        self._add(int(round(offset_seconds * self.sample_rate)), samples)
+        return len(samples) / float(self.sample_rate)
+
+    def pcm_blocks(self, block_frames: int = READ_BLOCK_FRAMES) -> Iterator[bytes]:
+        """PCM خام s16le خط زمانی، تکه به تکه (بدون کپی کامل بافر)"""
+        for start in range(0, self.frames, block_frames):
+            yield self.buffer[start:start + block_frames].astype("<i2", copy=False).tobytes()
+
+    def mux_into(self, video_path: Union[str, Path], output_path: Union[str, Path]) -> Path:
+        """ارسال PCM خط زمانی از stdin به ffmpeg و کپی جریان ویدیو (بدون فایل صوتی میانی)"""
+        process = subprocess.Popen([
+            'ffmpeg', '-i', str(video_path),
+            '-f', 's16le', '-ar', str(self.sample_rate), '-ac', str(self.channels), '-i', 'pipe:0',
+            '-c:v', 'copy', '-c:a', 'aac', '-map', '0:v', '-map', '1:a',
+            '-shortest', '-y', str(output_path)
+        ], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            for block in self.pcm_blocks():
+                process.stdin.write(block)
+        except BrokenPipeError:
+            pass  # ffmpeg exited early; its return code says whether that was an error
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            returncode = process.wait()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, 'ffmpeg')
+        return Path(output_path)
+
+    def write(self, path: Union[str, Path]) -> Path:
+        """نوشتن یک‌باره خط زمانی به WAV"""
+        with StreamingWavWriter(path, self.sample_rate, channels=self.channels) as writer:
+            for block in self.pcm_blocks():
+                writer.write(block)
+        return Path(path)
@@ -0,0 +1,109 @@
+"""
+هم‌ترازی ترجمه تکه‌ها با زیرنویس‌های منبع
+Align translated chunk cues back onto the source cues
+
+Chunks are sent with local numbering 1..n. The reply is matched by that
+number rather than by position, so a single dropped or merged cue no longer
+shifts every following translation. Cues that are missing or malformed are
+reported back so the caller can re-request just those.
+
+In the JSON protocol only ``[{"id": n, "text": ...}]`` arrays are exchanged;
+timings never leave the process and are re-attached from the source cues.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
+Cue = Tuple[str, str, str, str]
+
+_TIMESTAMP = re.compile(r"\d{2}:\d{2}:\d{2}[,.]\d{3}")
+
+
+def is_malformed(text: str) -> bool:
+    """متن ترجمه خالی است یا بقایای ساختار SRT (تایم‌کد/شماره) در آن مانده"""
+    stripped = (text or "").strip()
+    return not stripped or stripped.isdigit() or "-->" in stripped or bool(_TIMESTAMP.search(stripped))
+
+
+def align_chunk(chunk: Sequence[Cue], tr_blocks: Sequence[Cue]) -> Tuple[Dict[str, str], List[Cue]]:
+    """
+    هم‌ترازی پاسخ مدل با تکه منبع
+
+    Args:
+        chunk: زیرنویس‌های منبع (idx, start, end, text) به ترتیب ارسال
+        tr_blocks: بلوک‌های SRT پاسخ مدل با شماره‌گذاری محلی 1..n
+
+    Returns:
+        (نگاشت شماره اصلی به ترجمه، زیرنویس‌های منبعی که باید دوباره ترجمه شوند)
+    """
+    numbers = []
+    for number, _, _, _ in tr_blocks:
+        try:
+            numbers.append(int(str(number).strip()))
+        except ValueError:
+            numbers.append(-1)
+
+    by_number = all(1 <= n <= len(chunk) for n in numbers) and len(set(numbers)) == len(numbers)
+    if by_number:
+        pairs = [(chunk[n - 1], block) for n, block in zip(numbers, tr_blocks)]
+    elif len(tr_blocks) == len(chunk):
+        # Renumbered but complete: the order is still trustworthy
+        pairs = list(zip(chunk, tr_blocks))
+    else:
+        # Neither numbering nor count can be trusted; re-request the whole chunk
+        pairs = []
+
+    translated: Dict[str, str] = {}
+    for (orig_idx, _, _, _), (_, _, _, tr_text) in pairs:
+        if not is_malformed(tr_text):
+            translated[orig_idx] = tr_text.strip()
+    missing = [cue for cue in chunk if cue[0] not in translated]
+    return translated, missing
+
+
+def build_json_payload(chunk: Sequence[Cue]) -> str:
+    """آرایه JSON فقط شامل شماره محلی و متن (بدون تایم‌کد)"""
+    items = [{"id": i, "text": text.strip()} for i, (_, _, _, text) in enumerate(chunk, start=1)]
+    return json.dumps(items, ensure_ascii=False)
+
+
+def _json_items(reply: str) -> Any:
+    cleaned = (reply or "").strip()
+    try:
+        return json.loads(cleaned)
+    except ValueError:
+        pass
+    # Markdown fences or a sentence around the array: take the outermost [...]
+    start, end = cleaned.find("["), cleaned.rfind("]")
+    if start == -1 or end <= start:
+        return None
+    try:
+        return json.loads(cleaned[start:end + 1])
+    except ValueError:
+        return None
+
+
+def parse_json_reply(reply: str) -> List[Cue]:
+    """
+    اعتبارسنجی پاسخ JSON مدل
+
+    Returns:
+        بلوک‌های (id, "", "", text) قابل استفاده در align_chunk؛ آیتم‌های نامعتبر حذف می‌شوند
+    """
+    items = _json_items(reply)
+    if isinstance(items, dict):
+        # Some models wrap the array, e.g. {"translations": [...]}
+        items = next((value for value in items.values() if isinstance(value, list)), None)
+    if not isinstance(items, list):
+        return []
+
+    blocks: List[Cue] = []
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get("text"), str):
+            continue
+        cue_id = item.get("id")
+        if isinstance(cue_id, bool) or not isinstance(cue_id, (int, str)) or not str(cue_id).strip().isdigit():
+            continue
+        blocks.append((str(int(cue_id)), "", "", item["text"]))
+    return blocks
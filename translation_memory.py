@@ -0,0 +1,126 @@
+"""
+حافظه ترجمه پایدار در سطح جمله
+Persistent segment-level translation memory
+
+Cues are keyed by normalized source text + target language + provider/model,
+so intros, outros, catchphrases and re-uploads are translated once and then
+served from SQLite. Only memory misses are sent to the LLM.
+"""
+
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from config import get_config
+from sqlite_store import SharedInstance, open_sqlite
+
+
+def normalize_text(text: str) -> str:
+    """یکسان‌سازی متن منبع (یونیکد، فاصله‌ها و حروف بزرگ/کوچک)"""
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory (
+    key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    target_language TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+"""
+
+
+class TranslationMemory:
+    def __init__(self, db_path: Union[str, Path] = "dubbing_work/translation_memory.db"):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.db_path, _SCHEMA)
+
+    @classmethod
+    def from_config(cls) -> Optional["TranslationMemory"]:
+        """ساخت حافظه از بخش translation.memory در config.py (None اگر غیرفعال باشد)"""
+        memory_config = get_config().get("translation", {}).get("memory", {})
+        if not memory_config.get("enabled", True):
+            return None
+        return cls(memory_config.get("db_path", "dubbing_work/translation_memory.db"))
+
+    @staticmethod
+    def make_key(text: str, target_language: str, provider: str, model: str) -> str:
+        payload = "\0".join([normalize_text(text), target_language, provider, model or ""])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup_many(self, texts: List[str], target_language: str, provider: str,
+                    model: str) -> Dict[int, str]:
+        """
+        جستجوی گروهی ترجمه‌ها
+
+        Returns:
+            نگاشت اندیس متن ورودی به ترجمه ذخیره‌شده (فقط موارد موجود)
+        """
+        keys = [self.make_key(text, target_language, provider, model) for text in texts]
+        found: Dict[str, str] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, translation FROM memory WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+            if found:
+                self._conn.executemany(
+                    "UPDATE memory SET hits = hits + 1, last_used = ? WHERE key = ?",
+                    [(time.time(), key) for key in found]
+                )
+                self._conn.commit()
+        return {i: found[key] for i, key in enumerate(keys) if key in found}
+
+    def store_many(self, pairs: Iterable[Tuple[str, str]], target_language: str, provider: str,
+                   model: str) -> int:
+        """ذخیره جفت‌های (متن منبع، ترجمه)؛ تعداد ذخیره‌شده برگردانده می‌شود"""
+        now = time.time()
+        rows = [
+            (self.make_key(source, target_language, provider, model), source, target_language,
+             provider, model or "", translation.strip(), now, now)
+            for source, translation in pairs
+            if normalize_text(source) and translation and translation.strip()
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO memory "
+                "(key, source, target_language, provider, model, translation, hits, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_shared_memory = SharedInstance(TranslationMemory.from_config)
+
+
+def get_translation_memory() -> Optional[TranslationMemory]:
+    """حافظه ترجمه مشترک در سطح پردازه"""
+    return _shared_memory.get()
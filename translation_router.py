@@ -0,0 +1,148 @@
+"""
+مسیریاب ترجمه بر اساس سلامت و تأخیر سرویس‌ها
+Latency- and health-aware routing across translation backends
+
+A backend is one provider/model pair (e.g. ``("Gemini", "gemini-2.0-flash")``).
+The router keeps a rolling window of outcomes per backend and an exponential
+moving average of its latency. A rate-limit error or ``failure_threshold``
+consecutive failures open the backend's circuit for a cool-down; a failed
+probe once the cool-down expires (half-open) doubles it. Each chunk is sent
+to the fastest backend whose circuit is closed; health is shared
+process-wide, so one job's 429s steer the other jobs away as well.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from config import get_config
+
+Backend = Tuple[str, str]
+
+DEFAULT_ROUTER = {
+    "failure_threshold": 3,
+    "cooldown_seconds": 60,
+    "max_cooldown_seconds": 600,
+    "window": 20,
+    "prior_latency_seconds": 5,
+}
+
+
+class BackendHealth:
+    def __init__(self, window: int = 20):
+        self.outcomes: Deque[bool] = deque(maxlen=max(1, window))
+        self.latency: Optional[float] = None
+        self.consecutive_failures = 0
+        self.throttled = 0
+        self.open_until = 0.0
+        self.cooldown = 0.0
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+
+
+class TranslationRouter:
+    def __init__(self, failure_threshold: int = 3, cooldown_seconds: float = 60,
+                 max_cooldown_seconds: float = 600, window: int = 20, prior_latency_seconds: float = 5,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max(cooldown_seconds, max_cooldown_seconds)
+        self.window = window
+        self.prior_latency_seconds = prior_latency_seconds
+        self._clock = clock
+        self._health: Dict[Backend, BackendHealth] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "TranslationRouter":
+        settings: Dict[str, Any] = dict(DEFAULT_ROUTER)
+        settings.update({
+            key: value
+            for key, value in get_config().get("translation", {}).get("router", {}).items()
+            if key in DEFAULT_ROUTER
+        })
+        return cls(**settings)
+
+    def _get(self, backend: Backend) -> BackendHealth:
+        health = self._health.get(backend)
+        if health is None:
+            health = BackendHealth(self.window)
+            self._health[backend] = health
+        return health
+
+    def _score(self, health: BackendHealth) -> float:
+        latency = self.prior_latency_seconds if health.latency is None else health.latency
+        # Penalise flaky backends even while their circuit is still closed
+        return latency * (1.0 + 2.0 * health.error_rate)
+
+    def rank(self, backends: Sequence[Backend]) -> List[Backend]:
+        """سرویس‌های سالم به ترتیب سرعت (ترتیب ورودی در امتیاز برابر حفظ می‌شود)"""
+        with self._lock:
+            now = self._clock()
+            healthy = [
+                (self._score(self._get(backend)), position, backend)
+                for position, backend in enumerate(backends)
+                if self._get(backend).open_until <= now
+            ]
+        return [backend for _, _, backend in sorted(healthy)]
+
+    def wait_time(self, backends: Sequence[Backend]) -> float:
+        """زمان باقی‌مانده تا باز شدن نزدیک‌ترین سرویس (0 اگر سرویس سالمی هست)"""
+        with self._lock:
+            now = self._clock()
+            return max(0.0, min((self._get(backend).open_until for backend in backends), default=now) - now)
+
+    def record(self, backend: Backend, latency_seconds: float, ok: bool, throttled: bool = False) -> None:
+        """ثبت نتیجه درخواست و به‌روزرسانی وضعیت مدار"""
+        with self._lock:
+            health = self._get(backend)
+            health.outcomes.append(ok)
+            if ok:
+                health.latency = latency_seconds if health.latency is None else 0.7 * health.latency + 0.3 * latency_seconds
+                health.consecutive_failures = 0
+                health.cooldown = 0.0
+                return
+
+            health.consecutive_failures += 1
+            health.throttled += int(throttled)
+            if health.open_until > self._clock():
+                # A request that started before the circuit opened
+                return
+            half_open = health.cooldown > 0
+            if throttled or half_open or health.consecutive_failures >= self.failure_threshold:
+                health.cooldown = min(self.max_cooldown_seconds,
+                                      health.cooldown * 2 if half_open else self.cooldown_seconds)
+                health.open_until = self._clock() + health.cooldown
+                print(f"⛔ مدار {backend[0]}/{backend[1]} برای {health.cooldown:.0f} ثانیه باز شد")
+
+    def stats(self, backends: Optional[Sequence[Backend]] = None) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            now = self._clock()
+            return {
+                f"{provider}/{model}": {
+                    "latency_seconds": None if health.latency is None else round(health.latency, 2),
+                    "error_rate": round(health.error_rate, 2),
+                    "throttled": health.throttled,
+                    "open": health.open_until > now,
+                }
+                for (provider, model), health in self._health.items()
+                if backends is None or (provider, model) in backends
+            }
+
+
+_router: Optional[TranslationRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_translation_router() -> TranslationRouter:
+    """مسیریاب مشترک در سطح پردازه"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = TranslationRouter.from_config()
+        return _router
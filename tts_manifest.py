@@ -0,0 +1,71 @@
+"""
+مانیفست سگمنت‌های TTS برای ادامه مرحله تولید صدا
+Per-segment manifest that makes the TTS stage resumable
+
+Every finalized ``dub_N.wav`` is appended as one JSON line (flushed and
+fsync'ed) with the fingerprint it was generated for (text hash, voice,
+model, speech prompt hash, cue length), its duration, status and the file's
+size/mtime. On a re-run a segment is skipped only if its last record is
+``ok``, the fingerprint still matches the current subtitle and the file on
+disk is exactly the one recorded; changed, failed or silent placeholder
+segments are generated again. The last record per segment wins and a torn
+last line from a crash is ignored.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Union
+
+from jsonl_manifest import JsonlManifest, file_stamp
+
+STATUS_OK = "ok"
+STATUS_SILENCE = "silence"  # TTS failed; a silent placeholder was written
+STATUS_UNSTRETCHED = "unstretched"  # audio exists but could not be fitted to the cue
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()[:16]
+
+
+def segment_fingerprint(text: str, voice: str, model: str, speech_prompt: str = "",
+                        target_ms: int = 0) -> Dict[str, Any]:
+    """هر چیزی که محتوای dub_N.wav به آن وابسته است"""
+    return {
+        "text_hash": _digest(text),
+        "voice": voice,
+        "model": model,
+        "prompt_hash": _digest(speech_prompt),
+        "target_ms": int(target_ms),
+    }
+
+
+class TtsManifest(JsonlManifest):
+    def __init__(self, path: Union[str, Path]):
+        self._segments: Dict[int, Dict[str, Any]] = {}
+        super().__init__(path)
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        self._segments[int(record["index"])] = record
+
+    def record(self, index: int, segment_path: Union[str, Path], fingerprint: Dict[str, Any],
+               status: str, duration: float = 0.0) -> None:
+        """ثبت نتیجه نهایی یک سگمنت (پس از زمان‌بندی یا ساخت سکوت)"""
+        record = dict(fingerprint)
+        record.update({
+            "index": index,
+            "status": status,
+            "duration": round(duration, 3),
+            "file": file_stamp(segment_path),
+        })
+        self._append(record)
+
+    def is_current(self, index: int, segment_path: Union[str, Path], fingerprint: Dict[str, Any]) -> bool:
+        """آیا dub_N.wav موجود برای همین متن/صدا/مدل/زمان‌بندی با موفقیت ساخته شده است؟"""
+        with self._lock:
+            record = self._segments.get(index)
+        if not record or record.get("status") != STATUS_OK:
+            return False
+        if any(record.get(key) != value for key, value in fingerprint.items()):
+            return False
+        stamp = file_stamp(segment_path)
+        return stamp is not None and stamp == record.get("file")
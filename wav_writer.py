@@ -0,0 +1,98 @@
+"""
+نوشتن جریانی فایل‌های WAV
+Streaming PCM WAV writer with in-place RIFF header patching
+
+The header is written with placeholder sizes, PCM chunks are appended to the
+file as they arrive, and the RIFF and data sizes are patched on close. Memory
+use stays constant however long the segment is. Output goes to a ``.part``
+file that replaces the target atomically, so readers never see a half-written
+WAV and a hard-linked target (e.g. from the TTS cache) is never written
+through.
+
+``write_silence_wav`` produces silent placeholders without ffmpeg: the header
+is written and the file is extended with ``truncate``, so the zero samples
+are never written (sparse on most filesystems).
+"""
+
+import os
+import struct
+from pathlib import Path
+from typing import Optional, Union
+
+HEADER_BYTES = 44
+
+
+def riff_size(data_size: int) -> int:
+    """اندازه chunk اصلی RIFF؛ بایت پرکننده داده فرد شمرده می‌شود اما در اندازه data نه"""
+    return 36 + data_size + (data_size & 1)
+
+
+def wav_header(sample_rate: int, bits_per_sample: int = 16, channels: int = 1, data_size: int = 0) -> bytes:
+    """هدر استاندارد 44 بایتی PCM"""
+    block_align = channels * bits_per_sample // 8
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", riff_size(data_size), b"WAVE", b"fmt ", 16, 1,
+        channels, sample_rate, sample_rate * block_align, block_align,
+        bits_per_sample, b"data", data_size
+    )
+
+
+def write_silence_wav(path: Union[str, Path], duration_seconds: float, sample_rate: int = 24000,
+                      bits_per_sample: int = 16, channels: int = 1) -> Path:
+    """فایل WAV سکوت (نمونه‌های صفر) بدون اجرای ffmpeg"""
+    path = Path(path)
+    frames = max(0, int(round(duration_seconds * sample_rate)))
+    data_size = frames * channels * bits_per_sample // 8
+    part_path = path.with_name(path.name + ".part")
+    with open(part_path, "wb") as f:
+        f.write(wav_header(sample_rate, bits_per_sample, channels, data_size))
+        f.truncate(HEADER_BYTES + data_size + (data_size & 1))
+    os.replace(part_path, path)
+    return path
+
+
+class StreamingWavWriter:
+    def __init__(self, path: Union[str, Path], sample_rate: int, bits_per_sample: int = 16, channels: int = 1):
+        self.path = Path(path)
+        self.sample_rate = sample_rate
+        self.bits_per_sample = bits_per_sample
+        self.channels = channels
+        self.data_size = 0
+        self._part_path = self.path.with_name(self.path.name + ".part")
+        self._file = open(self._part_path, "wb")
+        self._file.write(wav_header(sample_rate, bits_per_sample, channels))
+
+    def write(self, pcm: bytes) -> None:
+        self._file.write(pcm)
+        self.data_size += len(pcm)
+
+    def close(self) -> Path:
+        """اصلاح اندازه‌های هدر و جایگزینی اتمی فایل مقصد"""
+        if self.data_size & 1:
+            # RIFF chunks are word-aligned: the pad byte belongs to the RIFF size, not the data size
+            self._file.write(b"\0")
+        self._file.seek(4)
+        self._file.write(struct.pack("<I", riff_size(self.data_size)))
+        self._file.seek(40)
+        self._file.write(struct.pack("<I", self.data_size))
+        self._file.close()
+        os.replace(self._part_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        """حذف فایل نیمه‌کاره"""
+        if not self._file.closed:
+            self._file.close()
+        if self._part_path.exists():
+            self._part_path.unlink()
+
+    def __enter__(self) -> "StreamingWavWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> Optional[bool]:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return None
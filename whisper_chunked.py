@@ -0,0 +1,237 @@
+"""
+رونویسی موازی و تکه‌ای صداهای طولانی با Whisper
+Parallel chunked Whisper transcription for long audio
+
+The 16 kHz mono signal is cut near every ``chunk_minutes`` boundary at the
+quietest stretch within a search window, so words are not split mid-way.
+Chunks are transcribed on a pool of worker processes and their segments are
+shifted back onto the global timeline. The result has the same
+``{"segments": [...]}`` shape as ``model.transcribe``.
+
+Every worker loads its own copy of the model, so the feature is opt-in
+(``whisper.chunked.enabled``) and the pool is sized by available memory for
+the model size, with the budget shared by the ``workers.cpu_workers`` heavy
+stages that may run at once. ``max_workers`` (default: the CPU count) is an
+optional hard cap on top of that. The pool only lives for one transcription.
+"""
+
+import multiprocessing
+import os
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from config import get_config
+
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.02
+
+# Approximate resident memory of one loaded model (GB), from the Whisper model card
+MODEL_MEMORY_GB = {"tiny": 1, "base": 1, "small": 2, "medium": 5, "large": 10, "turbo": 6}
+
+
+def chunked_config() -> Dict[str, Any]:
+    return get_config().get("whisper", {}).get("chunked", {})
+
+
+def wav_duration_seconds(path: Union[str, Path]) -> Optional[float]:
+    """مدت فایل WAV بدون بارگذاری نمونه‌ها (None اگر قابل خواندن نباشد)"""
+    try:
+        with wave.open(str(path), "rb") as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except (wave.Error, EOFError, OSError):
+        return None
+
+
+def available_memory_bytes() -> Optional[int]:
+    """حافظه آزاد سیستم (None اگر قابل تشخیص نباشد)"""
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def plan_workers(model_name: str, requested: int = 0, cpu_workers: int = 1,
+                 available_bytes: Optional[int] = None, max_workers: Optional[int] = None) -> int:
+    """
+    تعداد پردازه‌های کارگر با توجه به حافظه، اندازه مدل و تعداد مراحل سنگین هم‌زمان
+
+    Args:
+        requested: تعداد درخواستی در config (0 = خودکار)
+        cpu_workers: تعداد مراحل سنگین هم‌زمان (workers.cpu_workers)؛ بودجه حافظه بین آن‌ها تقسیم می‌شود
+        available_bytes: حافظه آزاد (None = بدون محدودیت حافظه)
+        max_workers: سقف کارگرها (None = تعداد هسته‌های CPU)
+    """
+    cpu_count = os.cpu_count() or 1
+    cap = min(max_workers or cpu_count, cpu_count)
+    workers = min(requested or cap, cap)
+    if available_bytes is not None:
+        model_bytes = MODEL_MEMORY_GB.get(model_name.split(".")[0].split("-")[0], 10) * 1024 ** 3
+        workers = min(workers, int(available_bytes // (model_bytes * max(1, cpu_workers))))
+    return max(0, workers)
+
+
+def configured_workers(model_name: str) -> int:
+    config = chunked_config()
+    return plan_workers(
+        model_name,
+        requested=config.get("workers", 0),
+        cpu_workers=get_config().get("workers", {}).get("cpu_workers", 1),
+        available_bytes=available_memory_bytes(),
+        max_workers=config.get("max_workers"),
+    )
+
+
+def should_chunk(path: Union[str, Path], model_name: Optional[str] = None) -> bool:
+    """آیا صدا به اندازه کافی طولانی است و حافظه برای دست‌کم دو کارگر کافی است"""
+    config = chunked_config()
+    if not config.get("enabled", False):
+        return False
+    duration = wav_duration_seconds(path)
+    if duration is None or duration < config.get("min_duration_minutes", 10) * 60:
+        return False
+    # With a single worker the shared in-process model is just as fast
+    return model_name is None or configured_workers(model_name) >= 2
+
+
+def pick_split_points(frame_energies: Sequence[float], chunk_frames: int,
+                      window_frames: int, silence_frames: int) -> List[int]:
+    """
+    انتخاب نقاط برش در کم‌صداترین بخش نزدیک هر مرز تکه
+
+    Args:
+        frame_energies: انرژی هر فریم کوتاه صدا
+        chunk_frames: طول هدف هر تکه (فریم)
+        window_frames: بازه جستجو در دو طرف هر مرز هدف
+        silence_frames: طول سکوتی که میانگین انرژی روی آن سنجیده می‌شود
+
+    Returns:
+        اندیس فریم‌های برش به ترتیب صعودی
+    """
+    total = len(frame_energies)
+    silence_frames = max(1, silence_frames)
+    # Prefix sums give the mean energy of any run of ``silence_frames`` in O(1)
+    prefix = [0.0]
+    for energy in frame_energies:
+        prefix.append(prefix[-1] + energy)
+
+    points: List[int] = []
+    last = 0
+    target = chunk_frames
+    # Stop once the remainder would be under half a chunk; it joins the last chunk
+    while target + chunk_frames // 2 < total:
+        lo = max(last + 1, target - window_frames)
+        hi = min(total - silence_frames, target + window_frames)
+        if hi <= lo:
+            break
+        best_start = min(range(lo, hi + 1), key=lambda i: prefix[i + silence_frames] - prefix[i])
+        split = best_start + silence_frames // 2
+        points.append(split)
+        last = split
+        target = split + chunk_frames
+    return points
+
+
+def split_audio(samples, sample_rate: int = SAMPLE_RATE, chunk_seconds: float = 300,
+                window_seconds: float = 30, min_silence_seconds: float = 0.5) -> List[Tuple[int, int]]:
+    """تقسیم آرایه نمونه‌ها به بازه‌های (شروع، پایان) در مرزهای سکوت"""
+    import numpy as np
+
+    frame = int(sample_rate * FRAME_SECONDS)
+    usable = len(samples) // frame * frame
+    energies = np.square(samples[:usable].reshape(-1, frame)).mean(axis=1) if usable else np.zeros(0)
+    points = pick_split_points(
+        energies.tolist(),
+        chunk_frames=int(chunk_seconds / FRAME_SECONDS),
+        window_frames=int(window_seconds / FRAME_SECONDS),
+        silence_frames=int(min_silence_seconds / FRAME_SECONDS),
+    )
+    bounds = [0] + [p * frame for p in points] + [len(samples)]
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+# ===== Worker process side =====
+_worker_model = None
+
+
+def _init_worker(model_name: str, threads: int) -> None:
+    global _worker_model
+    import torch
+    import whisper
+    torch.set_num_threads(max(1, threads))
+    _worker_model = whisper.load_model(model_name)
+
+
+def _transcribe_chunk(samples, offset_seconds: float, language: Optional[str]) -> List[Dict[str, Any]]:
+    result = _worker_model.transcribe(samples, language=language)
+    chunk_end = offset_seconds + len(samples) / SAMPLE_RATE
+    segments = []
+    for segment in result.get("segments", []):
+        text = segment.get("text", "")
+        if not text.strip():
+            continue
+        segments.append({
+            "start": offset_seconds + float(segment["start"]),
+            "end": min(chunk_end, offset_seconds + float(segment["end"])),
+            "text": text,
+        })
+    return segments
+
+
+# ===== Parent side =====
+class ChunkedTranscriber:
+    """رونویسی تکه‌ای روی استخری از پردازه‌های Whisper که فقط در طول یک فراخوانی زنده است"""
+
+    def __init__(self, model_name: str, workers: int = 2, cpu_workers: int = 1):
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self.threads = max(1, (os.cpu_count() or 1) // (self.workers * max(1, cpu_workers)))
+
+    def transcribe(self, audio_path: Union[str, Path], language: Optional[str] = "en") -> Dict[str, Any]:
+        from whisper.audio import load_audio
+
+        config = chunked_config()
+        started = time.time()
+        samples = load_audio(str(audio_path))
+        ranges = split_audio(
+            samples,
+            chunk_seconds=config.get("chunk_minutes", 5) * 60,
+            window_seconds=config.get("search_window_seconds", 30),
+            min_silence_seconds=config.get("min_silence_ms", 500) / 1000.0,
+        )
+        workers = min(self.workers, len(ranges))
+        print(f"🔄 رونویسی موازی {len(ranges)} تکه با {workers} پردازه...")
+        segments: List[Dict[str, Any]] = []
+        # spawn: forking a parent that already holds torch/OpenMP state can deadlock.
+        # The with block shuts the workers (and their model copies) down even on error.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_name, self.threads),
+        ) as pool:
+            futures = [
+                pool.submit(_transcribe_chunk, samples[start:end], start / SAMPLE_RATE, language)
+                for start, end in ranges
+            ]
+            try:
+                for future in futures:
+                    segments.extend(future.result())
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        print(f"✅ رونویسی تکه‌ای در {time.time() - started:.1f} ثانیه انجام شد")
+        return {"segments": segments, "language": language}
+
+
+def get_chunked_transcriber(model_name: str) -> ChunkedTranscriber:
+    """رونویس تکه‌ای با تعداد کارگر محدود به حافظه و workers.cpu_workers"""
+    return ChunkedTranscriber(
+        model_name,
+        workers=max(1, configured_workers(model_name)),
+        cpu_workers=get_config().get("workers", {}).get("cpu_workers", 1),
+    )
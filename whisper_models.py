@@ -0,0 +1,113 @@
+"""
+رجیستری مدل‌های Whisper در سطح پردازه
+Process-wide registry of warm, shared Whisper models
+
+Each model size is loaded once per process and reused by every
+``VideoDubbingApp`` instance. A Whisper model installs key/value-cache hooks
+on itself while decoding, so concurrent ``transcribe`` calls on the same
+instance are not safe; callers hold ``lock(name)`` around inference.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from config import get_config
+
+
+DEFAULT_MODEL = "base"
+
+
+def configured_model_name() -> str:
+    """اندازه مدل از بخش whisper در config.py"""
+    return get_config().get("whisper", {}).get("model") or DEFAULT_MODEL
+
+
+def _load_whisper(name: str) -> Any:
+    import whisper
+    return whisper.load_model(name)
+
+
+class WhisperModelRegistry:
+    def __init__(self, loader: Callable[[str], Any] = _load_whisper):
+        self._loader = loader
+        self._models: Dict[str, Any] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._inference_locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self._preloading: Dict[str, threading.Thread] = {}
+        self.loads = 0
+
+    def _locks_for(self, name: str):
+        with self._guard:
+            if name not in self._load_locks:
+                self._load_locks[name] = threading.Lock()
+                self._inference_locks[name] = threading.Lock()
+            return self._load_locks[name], self._inference_locks[name]
+
+    def get(self, name: Optional[str] = None) -> Any:
+        """دریافت مدل؛ فقط در اولین درخواست هر اندازه بارگذاری می‌شود"""
+        name = name or configured_model_name()
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        load_lock, _ = self._locks_for(name)
+        with load_lock:
+            model = self._models.get(name)
+            if model is None:
+                print(f"🔄 در حال بارگذاری مدل Whisper ({name})...")
+                started = time.time()
+                model = self._loader(name)
+                self._models[name] = model
+                self.loads += 1
+                print(f"✅ مدل Whisper ({name}) در {time.time() - started:.1f} ثانیه بارگذاری شد")
+        return model
+
+    def lock(self, name: Optional[str] = None) -> threading.Lock:
+        """قفل استنتاج برای اجرای ترتیبی transcribe روی یک مدل مشترک"""
+        return self._locks_for(name or configured_model_name())[1]
+
+    def preload(self, name: Optional[str] = None) -> bool:
+        """بارگذاری پیش‌از‌موعد مدل (برای راه‌اندازی API/Streamlit)"""
+        try:
+            self.get(name)
+            return True
+        except Exception as e:
+            print(f"⚠️ بارگذاری اولیه مدل Whisper ناموفق بود: {e}")
+            return False
+
+    def preload_async(self, name: Optional[str] = None) -> threading.Thread:
+        """بارگذاری در پس‌زمینه؛ فراخوانی‌های تکراری (مثلاً rerun های Streamlit) نخ جدید نمی‌سازند"""
+        name = name or configured_model_name()
+        with self._guard:
+            thread = self._preloading.get(name)
+            if thread is None:
+                thread = threading.Thread(target=self.preload, args=(name,), daemon=True,
+                                          name=f"whisper-preload-{name}")
+                self._preloading[name] = thread
+                thread.start()
+        return thread
+
+    def loaded_models(self) -> List[str]:
+        return list(self._models)
+
+
+_registry = WhisperModelRegistry()
+
+
+def get_registry() -> WhisperModelRegistry:
+    return _registry
+
+
+def get_whisper_model(name: Optional[str] = None) -> Any:
+    return _registry.get(name)
+
+
+def preload_whisper_model(name: Optional[str] = None, background: bool = True) -> None:
+    """بارگذاری مدل تنظیم‌شده در config.py؛ به صورت پیش‌فرض در پس‌زمینه"""
+    if not get_config().get("whisper", {}).get("preload", True):
+        return
+    if background:
+        _registry.preload_async(name)
+    else:
+        _registry.preload(name)
@@ -0,0 +1,136 @@
+"""
+لایه اجرای کارها با استخر کارگرهای محدود
+Bounded worker-pool execution layer for dubbing jobs
+
+Jobs run on a dedicated executor whose size is the max-concurrency setting.
+Inside a job, each heavy stage is dispatched to either the CPU-bound pool
+(Whisper, ffmpeg renders) or the IO-bound pool (yt-dlp, Gemini/Azure calls,
+TTS) so the number of simultaneous transcriptions/renders stays bounded even
+when many jobs are in flight. The API event loop only ever awaits futures.
+"""
+
+import asyncio
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import get_config
+
+
+class WorkerPool:
+    def __init__(self, max_concurrent_jobs: int = 2, cpu_workers: int = 1, io_workers: int = 4):
+        """
+        Args:
+            max_concurrent_jobs: حداکثر تعداد کارهای هم‌زمان
+            cpu_workers: اندازه استخر مراحل سنگین پردازشی (Whisper، ffmpeg)
+            io_workers: اندازه استخر مراحل شبکه‌ای (دانلود، ترجمه، TTS)
+        """
+        self.max_concurrent_jobs = max(1, int(max_concurrent_jobs))
+        self.cpu_workers = max(1, int(cpu_workers))
+        self.io_workers = max(1, int(io_workers))
+
+        self._jobs = ThreadPoolExecutor(max_workers=self.max_concurrent_jobs, thread_name_prefix="dub-job")
+        self._cpu = ThreadPoolExecutor(max_workers=self.cpu_workers, thread_name_prefix="dub-cpu")
+        self._io = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="dub-io")
+
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._stage_running = {"cpu": 0, "io": 0}
+        self._stage_waiting = {"cpu": 0, "io": 0}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]] = None) -> "WorkerPool":
+        """ساخت استخر از بخش workers در config.py"""
+        workers = (config or get_config()).get("workers", {})
+        return cls(
+            max_concurrent_jobs=workers.get("max_concurrent_jobs", 2),
+            cpu_workers=workers.get("cpu_workers", 1),
+            io_workers=workers.get("io_workers", 4),
+        )
+
+    # ===== Jobs =====
+    def submit_job(self, fn: Callable, *args, **kwargs) -> Future:
+        """ثبت یک کار کامل در صف؛ اگر ظرفیت پر باشد کار در صف می‌ماند"""
+        with self._lock:
+            self._queued += 1
+        return self._jobs.submit(self._run_job, fn, args, kwargs)
+
+    def _run_job(self, fn: Callable, args, kwargs):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            failed = True
+            traceback.print_exc()
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    # ===== Stages =====
+    def run_cpu(self, fn: Callable, *args, **kwargs) -> Any:
+        """اجرای یک مرحله سنگین پردازشی و انتظار برای نتیجه (از داخل thread کار)"""
+        return self._run_stage("cpu", self._cpu, fn, args, kwargs)
+
+    def run_io(self, fn: Callable, *args, **kwargs) -> Any:
+        """اجرای یک مرحله شبکه‌ای و انتظار برای نتیجه (از داخل thread کار)"""
+        return self._run_stage("io", self._io, fn, args, kwargs)
+
+    def _run_stage(self, kind: str, executor: ThreadPoolExecutor, fn: Callable, args, kwargs) -> Any:
+        with self._lock:
+            self._stage_waiting[kind] += 1
+
+        def _wrapped():
+            with self._lock:
+                self._stage_waiting[kind] -= 1
+                self._stage_running[kind] += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._stage_running[kind] -= 1
+
+        return executor.submit(_wrapped).result()
+
+    async def run_io_async(self, fn: Callable, *args, **kwargs) -> Any:
+        """اجرای کار مسدودکننده از داخل یک endpoint بدون قفل کردن event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io, lambda: fn(*args, **kwargs))
+
+    # ===== Introspection =====
+    def stats(self) -> Dict[str, Any]:
+        """وضعیت صف و کارهای در حال اجرا"""
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrent_jobs,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "cpu_pool": {
+                    "workers": self.cpu_workers,
+                    "running": self._stage_running["cpu"],
+                    "waiting": self._stage_waiting["cpu"],
+                },
+                "io_pool": {
+                    "workers": self.io_workers,
+                    "running": self._stage_running["io"],
+                    "waiting": self._stage_waiting["io"],
+                },
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._jobs.shutdown(wait=wait)
+        self._cpu.shutdown(wait=wait)
+        self._io.shutdown(wait=wait)